@@ -0,0 +1,54 @@
+"""
+Background tasks for the contentstore app.
+
+Image thumbnails and derivatives are generated here rather than inside the upload
+request. The upload saves the asset without a thumbnail and queues
+generate_image_derivatives with the md5 of what was uploaded; the thumbnail shows
+up in the asset library once the task has run. With CELERY_ALWAYS_EAGER (as in the
+dev and test settings) the task runs in-process.
+"""
+import hashlib
+import logging
+
+from celery import task
+
+from cache_toolbox.core import del_cached_content
+from xmodule.contentstore.content import IMAGE_DERIVATIVE_SIZES
+from xmodule.contentstore.django import contentstore
+from xmodule.modulestore import Location
+
+log = logging.getLogger(__name__)
+
+
+@task
+def generate_image_derivatives(location_url, md5):
+    """
+    Generate the thumbnail and the IMAGE_DERIVATIVE_SIZES derivatives for the image asset at
+    `location_url`, then point the asset at its thumbnail.
+
+    `md5` is the digest of the asset contents this task was queued for. If the asset has
+    since been replaced or removed nothing is done, since its replacement queues its own
+    task; if its thumbnail was already generated for these contents nothing is done either.
+    """
+    store = contentstore()
+    location = Location(location_url)
+    content = store.find(location, throw_on_not_found=False)
+
+    if content is None or hashlib.md5(content.data).hexdigest() != md5:
+        log.debug('Skipping derivatives for {0}, it has changed since they were queued'.format(location_url))
+        return
+
+    if content.thumbnail_location is not None:
+        return
+
+    thumbnail_content, thumbnail_location = store.generate_thumbnail(content, progressive=True)
+    del_cached_content(thumbnail_location)
+    if thumbnail_content is None:
+        return
+
+    for dimensions in IMAGE_DERIVATIVE_SIZES:
+        derivative_content, derivative_location = store.generate_thumbnail(content, dimensions, progressive=True)
+        del_cached_content(derivative_location)
+
+    store.set_thumbnail_location(location, thumbnail_location)
+    del_cached_content(location)
@@ -1,4 +1,6 @@
+import fcntl
 import json
+import os
 import shutil
 import mock
 from django.test.client import Client
@@ -28,7 +30,7 @@ from xmodule.modulestore.store_utilities import delete_course
 from xmodule.modulestore.django import modulestore
 from xmodule.contentstore.django import contentstore, _CONTENTSTORE
 from xmodule.templates import update_templates
-from xmodule.modulestore.xml_exporter import export_to_xml
+from xmodule.modulestore.xml_exporter import export_to_xml, EXPORT_MANIFEST_FILENAME
 from xmodule.modulestore.xml_importer import import_from_xml, perform_xlint
 from xmodule.modulestore.inheritance import own_metadata
 from xmodule.contentstore.content import StaticContent
@@ -448,6 +450,30 @@ class ContentStoreToyCourseTest(ModuleStoreTestCase):
         #
         # self.assertIsNotNone(thumbnail)
 
+    def test_asset_listing_pages(self):
+        '''
+        This test validates that assets can be listed a page at a time, in order, with a matching count
+        '''
+        content_store = contentstore()
+        import_from_xml(modulestore('direct'), 'common/test/data/', ['full'], static_content_store=content_store)
+        course_location = CourseDescriptor.id_to_location('edX/full/6.002_Spring_2012')
+
+        all_assets = content_store.get_all_content_for_course(course_location)
+        self.assertEqual(content_store.get_content_count_for_course(course_location), len(all_assets))
+
+        sort = [('displayname', 1)]
+        first_page = content_store.get_all_content_for_course(course_location, start=0, maxresults=2, sort=sort,
+                                                              fields=['displayname'])
+        second_page = content_store.get_all_content_for_course(course_location, start=2, maxresults=2, sort=sort,
+                                                               fields=['displayname'])
+        names = sorted(asset['displayname'] for asset in all_assets)
+        self.assertEqual([asset['displayname'] for asset in first_page + second_page], names[:4])
+        self.assertNotIn('uploadDate', first_page[0])
+
+        resp = self.client.get(reverse('asset_index', kwargs={'org': 'edX', 'course': 'full', 'name': '6.002_Spring_2012'}),
+                               {'page': 1, 'sort': 'name', 'direction': 'asc'})
+        self.assertContains(resp, names[0])
+
     def test_asset_delete_and_restore(self):
         '''
         This test will exercise the soft delete/restore functionality of the assets
@@ -816,6 +842,60 @@ class ContentStoreToyCourseTest(ModuleStoreTestCase):
         # export out to a tempdir
         export_to_xml(module_store, content_store, location, root_dir, 'test_export')
 
+    def test_incremental_export_course(self):
+        module_store = modulestore('direct')
+        content_store = contentstore()
+
+        import_from_xml(module_store, 'common/test/data/', ['full'], static_content_store=content_store)
+        location = CourseDescriptor.id_to_location('edX/full/6.002_Spring_2012')
+
+        root_dir = path(mkdtemp_clean())
+        export_dir = root_dir / 'test_export'
+
+        export_to_xml(module_store, content_store, location, root_dir, 'test_export', incremental=True)
+        self.assertTrue((export_dir / EXPORT_MANIFEST_FILENAME).exists())
+
+        # backdate everything that was written, so we can tell what a second export rewrites
+        for exported_file in export_dir.walkfiles():
+            os.utime(exported_file, (0, 0))
+
+        course = module_store.get_item(location)
+        metadata = own_metadata(course)
+        metadata['display_name'] = 'Changed display name'
+        module_store.update_metadata(location, metadata)
+        handouts_location = Location(['i4x', 'edX', 'full', 'course_info', 'handouts', None])
+        module_store.delete_item(handouts_location)
+
+        export_to_xml(module_store, content_store, location, root_dir, 'test_export', incremental=True)
+
+        # only the course's own files changed, the static assets and other modules were left alone
+        self.assertNotEqual(os.path.getmtime(export_dir / 'policies' / '6.002_Spring_2012' / 'policy.json'), 0)
+        self.assertEqual(os.path.getmtime(export_dir / 'static' / 'handouts' / 'schematic_tutorial.pdf'), 0)
+        self.assertEqual(os.path.getmtime(export_dir / 'course.xml'), 0)
+
+        # and files for content which no longer exists were removed
+        self.assertFalse((export_dir / 'info' / 'handouts.html').exists())
+
+        shutil.rmtree(root_dir)
+
+    def test_export_view_locks_export_dir_until_streamed(self):
+        import_from_xml(modulestore('direct'), 'common/test/data/', ['toy'])
+        root_dir = path(mkdtemp_clean())
+
+        with override_settings(COURSE_EXPORT_ROOT=root_dir):
+            response = self.client.get(reverse('generate_export_course', kwargs={
+                'org': 'edX', 'course': 'toy', 'name': '2012_Fall'}))
+        self.assertEqual(response.status_code, 200)
+
+        # another export of the course has to wait while the tarball is streamed
+        with open(root_dir / 'edX' / 'toy' / '.export.lock', 'w') as lock_file:
+            self.assertRaises(IOError, fcntl.flock, lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            self.assertTrue(response.content)
+            response.close()
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+        shutil.rmtree(root_dir)
+
 
 @override_settings(CONTENTSTORE=TEST_DATA_CONTENTSTORE)
 class ContentStoreTest(ModuleStoreTestCase):
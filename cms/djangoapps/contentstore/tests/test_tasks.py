@@ -0,0 +1,52 @@
+"""
+Tests for the contentstore background tasks
+"""
+import copy
+import hashlib
+from uuid import uuid4
+
+from django.conf import settings
+from django.test.utils import override_settings
+from pymongo import MongoClient
+
+from contentstore.tasks import generate_image_derivatives
+from xmodule.contentstore.content import StaticContent, IMAGE_DERIVATIVE_SIZES
+from xmodule.contentstore.django import contentstore, _CONTENTSTORE
+from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
+
+TEST_DATA_CONTENTSTORE = copy.deepcopy(settings.CONTENTSTORE)
+TEST_DATA_CONTENTSTORE['OPTIONS']['db'] = 'test_xcontent_%s' % uuid4().hex
+
+
+@override_settings(CONTENTSTORE=TEST_DATA_CONTENTSTORE)
+class GenerateImageDerivativesTest(ModuleStoreTestCase):
+    """
+    Tests for generate_image_derivatives
+    """
+    def setUp(self):
+        with open('common/test/data/full/static/circuits/Lab1_1.png', 'rb') as image_file:
+            self.data = image_file.read()
+        self.location = StaticContent.compute_location('edX', 'full', 'Lab1_1.png')
+        contentstore().save(StaticContent(self.location, 'Lab1_1.png', 'image/png', self.data))
+
+    def tearDown(self):
+        MongoClient().drop_database(TEST_DATA_CONTENTSTORE['OPTIONS']['db'])
+        _CONTENTSTORE.clear()
+
+    def test_generates_thumbnail_and_derivatives(self):
+        generate_image_derivatives(self.location.url(), hashlib.md5(self.data).hexdigest())
+
+        content = contentstore().find(self.location)
+        self.assertIsNotNone(content.thumbnail_location)
+        self.assertIsNotNone(contentstore().find(content.thumbnail_location, throw_on_not_found=False))
+        for dimensions in IMAGE_DERIVATIVE_SIZES:
+            derivative_location = StaticContent.compute_location(
+                'edX', 'full', StaticContent.generate_thumbnail_name('Lab1_1.png', dimensions), is_thumbnail=True
+            )
+            self.assertIsNotNone(contentstore().find(derivative_location, throw_on_not_found=False))
+
+    def test_skips_replaced_content(self):
+        # the task was queued for contents which have since been replaced
+        generate_image_derivatives(self.location.url(), hashlib.md5('other contents').hexdigest())
+
+        self.assertIsNone(contentstore().find(self.location).thumbnail_location)
@@ -1,3 +1,5 @@
+import fcntl
+import hashlib
 import logging
 import json
 import os
@@ -5,14 +7,13 @@ import tarfile
 import shutil
 from tempfile import mkdtemp
 from path import path
+import pymongo
 
 from django.conf import settings
 from django.http import HttpResponse, HttpResponseBadRequest
 from django.contrib.auth.decorators import login_required
 from django_future.csrf import ensure_csrf_cookie
 from django.core.urlresolvers import reverse
-from django.core.servers.basehttp import FileWrapper
-from django.core.files.temp import NamedTemporaryFile
 
 from mitxmako.shortcuts import render_to_response
 from cache_toolbox.core import del_cached_content
@@ -20,7 +21,7 @@ from auth.authz import create_all_course_groups
 
 from xmodule.modulestore.xml_importer import import_from_xml
 from xmodule.contentstore.django import contentstore
-from xmodule.modulestore.xml_exporter import export_to_xml
+from xmodule.modulestore.xml_exporter import export_to_xml, EXPORT_MANIFEST_FILENAME
 from xmodule.modulestore.django import modulestore
 from xmodule.modulestore import Location
 from xmodule.contentstore.content import StaticContent
@@ -28,6 +29,7 @@ from xmodule.util.date_utils import get_default_time_display
 from xmodule.modulestore import InvalidLocationError
 from xmodule.exceptions import NotFoundError
 
+from ..tasks import generate_image_derivatives
 from ..utils import get_url_reverse
 from .access import get_location_and_verify_access
 
@@ -35,13 +37,29 @@ from .access import get_location_and_verify_access
 __all__ = ['asset_index', 'upload_asset', 'import_course', 'generate_export_course', 'export_course']
 
 
+# the number of assets shown on each page of the asset library
+ASSETS_PER_PAGE = 50
+
+# the asset fields that the asset library needs, so that listing doesn't fetch anything else
+ASSET_LISTING_FIELDS = ['_id', 'displayname', 'uploadDate', 'thumbnail_location']
+
+# the document keys the asset library can be sorted by, keyed by the 'sort' request parameter
+ASSET_SORT_KEYS = {
+    'date': 'uploadDate',
+    'name': 'displayname',
+}
+
+
 @login_required
 @ensure_csrf_cookie
 def asset_index(request, org, course, name):
     """
-    Display an editable asset library
+    Display an editable asset library, a page at a time
 
     org, course, name: Attributes of the Location for the item to edit
+
+    The optional 'page' (1-based), 'sort' ('date' or 'name') and 'direction'
+    ('asc' or 'desc') GET parameters select which assets are shown.
     """
     location = get_location_and_verify_access(request, org, course, name)
 
@@ -53,11 +71,31 @@ def asset_index(request, org, course, name):
 
     course_module = modulestore().get_item(location)
 
-    course_reference = StaticContent.compute_location(org, course, name)
-    assets = contentstore().get_all_content_for_course(course_reference)
+    sort = request.GET.get('sort', 'date')
+    if sort not in ASSET_SORT_KEYS:
+        return HttpResponseBadRequest()
+    # default to reverse upload date order
+    direction = request.GET.get('direction', 'desc' if sort == 'date' else 'asc')
+    if direction not in ('asc', 'desc'):
+        return HttpResponseBadRequest()
+
+    try:
+        page = max(int(request.GET.get('page', 1)), 1)
+    except ValueError:
+        return HttpResponseBadRequest()
 
-    # sort in reverse upload date order
-    assets = sorted(assets, key=lambda asset: asset['uploadDate'], reverse=True)
+    course_reference = StaticContent.compute_location(org, course, name)
+    total_count = contentstore().get_content_count_for_course(course_reference)
+    page_count = max((total_count + ASSETS_PER_PAGE - 1) // ASSETS_PER_PAGE, 1)
+    page = min(page, page_count)
+
+    assets = contentstore().get_all_content_for_course(
+        course_reference,
+        start=(page - 1) * ASSETS_PER_PAGE,
+        maxresults=ASSETS_PER_PAGE,
+        sort=[(ASSET_SORT_KEYS[sort], pymongo.DESCENDING if direction == 'desc' else pymongo.ASCENDING)],
+        fields=ASSET_LISTING_FIELDS
+    )
 
     asset_display = []
     for asset in assets:
@@ -80,6 +118,11 @@ def asset_index(request, org, course, name):
         'active_tab': 'assets',
         'context_course': course_module,
         'assets': asset_display,
+        'page': page,
+        'page_count': page_count,
+        'total_count': total_count,
+        'sort': sort,
+        'direction': direction,
         'upload_asset_callback_url': upload_asset_callback_url,
         'remove_asset_callback_url': reverse('remove_asset', kwargs={
             'org': org,
@@ -126,26 +169,25 @@ def upload_asset(request, org, course, coursename):
     content_loc = StaticContent.compute_location(org, course, filename)
     content = StaticContent(content_loc, filename, mime_type, filedata)
 
-    # first let's see if a thumbnail can be created
-    (thumbnail_content, thumbnail_location) = contentstore().generate_thumbnail(content)
-
-    # delete cached thumbnail even if one couldn't be created this time (else the old thumbnail will continue to show)
-    del_cached_content(thumbnail_location)
-    # now store thumbnail location only if we could create it
-    if thumbnail_content is not None:
-        content.thumbnail_location = thumbnail_location
-
-    # then commit the content
+    # commit the content without a thumbnail, and delete any cached thumbnail (else the
+    # old thumbnail would continue to show until the new one has been generated)
     contentstore().save(content)
     del_cached_content(content.location)
+    del_cached_content(StaticContent.compute_location(
+        org, course, StaticContent.generate_thumbnail_name(content_loc.name), is_thumbnail=True
+    ))
 
-    # readback the saved content - we need the database timestamp
+    # thumbnails are generated in the background, so large images don't hold up the upload
+    if mime_type is not None and mime_type.split('/')[0] == 'image':
+        generate_image_derivatives.delay(content_loc.url(), hashlib.md5(filedata).hexdigest())
+
+    # readback the saved content - we need the database timestamp, and the thumbnail if it is ready already
     readback = contentstore().find(content.location)
 
     response_payload = {'displayname': content.name,
                         'uploadDate': get_default_time_display(readback.last_modified_at),
                         'url': StaticContent.get_url_path_from_location(content.location),
-                        'thumb_url': StaticContent.get_url_path_from_location(thumbnail_location) if thumbnail_content is not None else None,
+                        'thumb_url': StaticContent.get_url_path_from_location(readback.thumbnail_location),
                         'msg': 'Upload completed'
                         }
 
@@ -279,33 +321,119 @@ def import_course(request, org, course, name):
         })
 
 
+class _TarStreamBuffer(object):
+    """
+    A write-only file object that tarfile streams into, from which the chunks
+    written so far can be drained and sent on to the client
+    """
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(data)
+
+    def drain(self):
+        data = ''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+class _ExportLock(object):
+    """
+    An exclusive lock on a course's reusable export directory, held from the start
+    of an export until its tarball has been streamed, so that a concurrent export
+    of the course can't rewrite or remove files while they are being read
+    """
+    def __init__(self, root_dir):
+        self.lock_file = open(root_dir / '.export.lock', 'w')
+        fcntl.flock(self.lock_file, fcntl.LOCK_EX)
+
+    def release(self):
+        if not self.lock_file.closed:
+            self.lock_file.close()
+
+
+class _ExportStream(object):
+    """
+    The chunks of an export's tarball, which release its lock when the response is
+    closed, even if the client went away before the first chunk was generated
+    """
+    def __init__(self, chunks, lock):
+        self.chunks = chunks
+        self.lock = lock
+
+    def __iter__(self):
+        return self.chunks
+
+    def close(self):
+        self.chunks.close()
+        if self.lock is not None:
+            self.lock.release()
+
+
+def _stream_tar_gz(source_dir, arcname, cleanup=False, lock=None):
+    """
+    Generate a tar.gz of source_dir chunk by chunk, one file at a time, so that the
+    response can start while the archive is still being built. If cleanup is True,
+    source_dir is removed once the archive is complete; if lock is given, it is
+    released then.
+    """
+    try:
+        buf = _TarStreamBuffer()
+        tar_file = tarfile.open(fileobj=buf, mode='w|gz')
+        for dirname, dirnames, filenames in os.walk(source_dir):
+            dirnames.sort()
+            for filename in sorted(filenames):
+                if filename == EXPORT_MANIFEST_FILENAME:
+                    continue
+                file_path = os.path.join(dirname, filename)
+                tar_file.add(file_path, arcname=os.path.join(arcname, os.path.relpath(file_path, source_dir)))
+                yield buf.drain()
+        tar_file.close()
+        yield buf.drain()
+    finally:
+        if cleanup:
+            shutil.rmtree(source_dir, ignore_errors=True)
+        if lock is not None:
+            lock.release()
+
+
 @ensure_csrf_cookie
 @login_required
 def generate_export_course(request, org, course, name):
     location = get_location_and_verify_access(request, org, course, name)
 
     loc = Location(location)
-    export_file = NamedTemporaryFile(prefix=name + '.', suffix=".tar.gz")
 
-    root_dir = path(mkdtemp())
+    # when COURSE_EXPORT_ROOT is configured each course gets a reusable export directory there,
+    # and only the modules and assets that changed since the last export are rewritten
+    export_root = getattr(settings, 'COURSE_EXPORT_ROOT', None)
+    if export_root is not None:
+        root_dir = path(export_root) / org / course
+        if not root_dir.isdir():
+            root_dir.makedirs()
+        incremental = True
+        lock = _ExportLock(root_dir)
+    else:
+        root_dir = path(mkdtemp())
+        incremental = False
+        lock = None
 
-    # export out to a tempdir
+    # export out to the export dir
     logging.debug('root = {0}'.format(root_dir))
 
-    export_to_xml(modulestore('direct'), contentstore(), loc, root_dir, name, modulestore())
-
-    logging.debug('tar file being generated at {0}'.format(export_file.name))
-    tar_file = tarfile.open(name=export_file.name, mode='w:gz')
-    tar_file.add(root_dir / name, arcname=name)
-    tar_file.close()
-
-    # remove temp dir
-    shutil.rmtree(root_dir / name)
-
-    wrapper = FileWrapper(export_file)
-    response = HttpResponse(wrapper, content_type='application/x-tgz')
-    response['Content-Disposition'] = 'attachment; filename=%s' % os.path.basename(export_file.name)
-    response['Content-Length'] = os.path.getsize(export_file.name)
+    try:
+        export_to_xml(modulestore('direct'), contentstore(), loc, root_dir, name, modulestore(),
+                      incremental=incremental)
+    except:
+        if lock is not None:
+            lock.release()
+        raise
+
+    logging.debug('streaming tar file of {0}'.format(root_dir / name))
+    chunks = _stream_tar_gz(root_dir / name, name, cleanup=not incremental, lock=lock)
+    response = HttpResponse(_ExportStream(chunks, lock), content_type='application/x-tgz')
+    response['Content-Disposition'] = 'attachment; filename=%s' % (name + '.tar.gz')
     return response
 
 
@@ -74,6 +74,10 @@ ENV_ROOT = REPO_ROOT.dirname()  # virtualenv dir /mitx is in
 
 GITHUB_REPO_ROOT = ENV_ROOT / "data"
 
+# If set, Studio exports each course into a reusable directory under this root and only
+# rewrites the files that changed since the previous export. Otherwise a tempdir is used.
+COURSE_EXPORT_ROOT = None
+
 sys.path.append(REPO_ROOT)
 sys.path.append(PROJECT_ROOT / 'djangoapps')
 sys.path.append(PROJECT_ROOT / 'lib')
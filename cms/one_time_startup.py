@@ -1,6 +1,7 @@
 from dogapi import dog_http_api, dog_stats_api
 from django.conf import settings
 from xmodule.modulestore.django import modulestore
+from xmodule.contentstore.django import contentstore
 from django.dispatch import Signal
 from request_cache.middleware import RequestCache
 
@@ -14,6 +15,10 @@ for store_name in settings.MODULESTORE:
 
     modulestore_update_signal = Signal(providing_args=['modulestore', 'course_id', 'location'])
     store.modulestore_update_signal = modulestore_update_signal
+
+# cache per-course asset counts for the paginated Files & Uploads page
+contentstore().count_cache = get_cache('default')
+
 if hasattr(settings, 'DATADOG_API'):
     dog_http_api.api_key = settings.DATADOG_API
     dog_stats_api.start(api_key=settings.DATADOG_API, statsd=True)
@@ -6,13 +6,23 @@ forums, and to the cohort admin views.
 from django.http import Http404
 import logging
 import random
+import time
 
 from courseware import courses
 from student.models import get_user_by_username_or_email
+from util.cache import cache
 from .models import CourseUserGroup
 
 log = logging.getLogger(__name__)
 
+# Seconds the cohort of a user is cached for. Changes to the cohorts made here
+# are seen straight away, but changes to the cohort config of a course are only
+# seen once this has passed.
+COHORT_CACHE_TIME = 10 * 60
+
+# What's cached for a user who isn't in a cohort (None means not cached)
+NO_COHORT = 0
+
 
 # tl;dr: global state is bad.  capa reseeds random every time a problem is loaded.  Even
 # if and when that's fixed, it's a good idea to have a local generator to avoid any other
@@ -43,13 +53,113 @@ def is_course_cohorted(course_id):
     return courses.get_course_by_id(course_id).is_cohorted
 
 
+def _is_course_cohorted_cached(course_id):
+    """
+    Whether course_id is cohorted, cached so that it doesn't load the course.
+
+    Raises:
+       ValueError if the course doesn't exist.
+    """
+    key = u'cohorted/{0}'.format(course_id)
+    cohorted = cache.get(key)
+    if cohorted is None:
+        try:
+            cohorted = is_course_cohorted(course_id)
+        except Http404:
+            raise ValueError("Invalid course_id")
+        cache.set(key, cohorted, COHORT_CACHE_TIME)
+    return cohorted
+
+
+def _membership_generation(course_id):
+    """
+    The generation of the cached cohort memberships of course_id. Bumping it
+    (see _invalidate_memberships) drops all of them at once.
+    """
+    key = u'cohort_generation/{0}'.format(course_id)
+    generation = cache.get(key)
+    if generation is None:
+        # never reuse a generation which may still have memberships cached
+        generation = int(time.time() * 1000)
+        if not cache.add(key, generation):
+            generation = cache.get(key, generation)
+    return generation
+
+
+def _invalidate_memberships(course_id):
+    """
+    Drop the cached cohort memberships of every user in course_id
+    """
+    key = u'cohort_generation/{0}'.format(course_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        # nothing cached for the course yet
+        pass
+
+
+# The memberships are cached as they are stored, whether or not the course is
+# cohorted: readers check _is_course_cohorted_cached before trusting them.
+def _membership_key(course_id, generation, user_id):
+    return u'cohort_membership/{0}/{1}/{2}'.format(course_id, generation, user_id)
+
+
+def _cache_membership(course_id, user_id, cohort_id):
+    cache.set(_membership_key(course_id, _membership_generation(course_id), user_id),
+              NO_COHORT if cohort_id is None else cohort_id,
+              COHORT_CACHE_TIME)
+
+
 def get_cohort_id(user, course_id):
     """
     Given a course id and a user, return the id of the cohort that user is
     assigned to in that course.  If they don't have a cohort, return None.
+
+    Served from the cache when possible, so that it doesn't load the course.
     """
-    cohort = get_cohort(user, course_id)
-    return None if cohort is None else cohort.id
+    if not _is_course_cohorted_cached(course_id):
+        return None
+
+    cohort_id = cache.get(_membership_key(course_id, _membership_generation(course_id), user.id))
+    if cohort_id is None:
+        cohort = get_cohort(user, course_id)
+        cohort_id = None if cohort is None else cohort.id
+        _cache_membership(course_id, user.id, cohort_id)
+
+    return None if cohort_id == NO_COHORT else cohort_id
+
+
+def get_cohorts_for_users(course_id, user_ids):
+    """
+    Return a dict mapping each of user_ids to the id of the cohort the user is in
+    in course_id, or None if they aren't in one. Cached memberships are used, and
+    the rest are looked up in a single query.
+
+    Like get_cohort, no user is in a cohort in a course which isn't cohorted.
+    Unlike it, users aren't assigned to cohorts in auto-cohorted courses.
+    """
+    if not _is_course_cohorted_cached(course_id):
+        return dict.fromkeys(user_ids)
+
+    generation = _membership_generation(course_id)
+    keys = dict((_membership_key(course_id, generation, user_id), user_id) for user_id in user_ids)
+    cohort_ids = dict((keys[key], None if cohort_id == NO_COHORT else cohort_id)
+                      for key, cohort_id in cache.get_many(keys.keys()).iteritems())
+
+    missing = [user_id for user_id in user_ids if user_id not in cohort_ids]
+    if missing:
+        cohort_ids.update(dict.fromkeys(missing))
+        memberships = CourseUserGroup.users.through.objects.filter(
+            courseusergroup__course_id=course_id,
+            courseusergroup__group_type=CourseUserGroup.COHORT,
+            user__in=missing
+        ).values_list('user_id', 'courseusergroup_id')
+        for user_id, cohort_id in memberships:
+            cohort_ids[user_id] = cohort_id
+            # users who aren't in a cohort aren't cached: they may get one from get_cohort
+            _cache_membership(course_id, user_id, cohort_id)
+
+    return cohort_ids
 
 
 def is_commentable_cohorted(course_id, commentable_id):
@@ -154,6 +264,7 @@ def get_cohort(user, course_id):
         name=group_name)
 
     user.course_groups.add(group)
+    _cache_membership(course_id, user.id, group.id)
     return group
 
 
@@ -171,6 +282,14 @@ def get_course_cohorts(course_id):
     return list(CourseUserGroup.objects.filter(course_id=course_id,
                                                group_type=CourseUserGroup.COHORT))
 
+
+def get_cohort_names(course_id):
+    """
+    Return a dict mapping the id of each cohort in the given course to its name.
+    """
+    return dict(CourseUserGroup.objects.filter(course_id=course_id,
+                                               group_type=CourseUserGroup.COHORT).values_list('id', 'name'))
+
 ### Helpers for cohort management views
 
 
@@ -205,9 +324,11 @@ def add_cohort(course_id, name):
                                       name=name).exists():
         raise ValueError("Can't create two cohorts with the same name")
 
-    return CourseUserGroup.objects.create(course_id=course_id,
-                                          group_type=CourseUserGroup.COHORT,
-                                          name=name)
+    cohort = CourseUserGroup.objects.create(course_id=course_id,
+                                            group_type=CourseUserGroup.COHORT,
+                                            name=name)
+    _invalidate_memberships(course_id)
+    return cohort
 
 
 class CohortConflict(Exception):
@@ -253,9 +374,22 @@ def add_user_to_cohort(cohort, username_or_email):
                                          course_cohorts[0].name))
 
     cohort.users.add(user)
+    _cache_membership(cohort.course_id, user.id, cohort.id)
     return user
 
 
+def remove_user_from_cohort(cohort, user):
+    """
+    Remove the given user from the specified cohort.
+
+    Arguments:
+        cohort: CourseUserGroup
+        user: User object
+    """
+    cohort.users.remove(user)
+    _cache_membership(cohort.course_id, user.id, None)
+
+
 def get_course_cohort_names(course_id):
     """
     Return a list of the cohort names in a course.
@@ -274,3 +408,4 @@ def delete_empty_cohort(course_id, name):
                 name, course_id))
 
     cohort.delete()
+    _invalidate_memberships(course_id)
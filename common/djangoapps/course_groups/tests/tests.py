@@ -1,12 +1,16 @@
 import django.test
 from django.contrib.auth.models import User
 from django.conf import settings
+from django.core.cache import get_cache
+from mock import patch
 
 from django.test.utils import override_settings
 
 from course_groups.models import CourseUserGroup
 from course_groups.cohorts import (get_cohort, get_course_cohorts,
-                                   is_commentable_cohorted, get_cohort_by_name)
+                                   is_commentable_cohorted, get_cohort_by_name,
+                                   get_cohort_id, get_cohorts_for_users,
+                                   add_cohort, add_user_to_cohort, remove_user_from_cohort)
 
 from xmodule.modulestore.django import modulestore, _MODULESTORES
 
@@ -255,3 +259,69 @@ class TestCohorts(django.test.TestCase):
         self.assertTrue(
             is_commentable_cohorted(course.id, to_id("Feedback")),
             "Feedback was listed as cohorted.  Should be.")
+
+
+@override_settings(MODULESTORE=TEST_DATA_XML_MODULESTORE)
+class TestCohortCache(django.test.TestCase):
+    """
+    Tests for the cached cohort memberships
+    """
+    def setUp(self):
+        _MODULESTORES.clear()
+        self.course = modulestore().get_course("edX/toy/2012_Fall")
+        TestCohorts.config_course_cohorts(self.course, [], cohorted=True)
+        self.user = User.objects.create(username="test", email="a@b.com")
+        self.other_user = User.objects.create(username="test2", email="a2@b.com")
+        self.cohort = CourseUserGroup.objects.create(name="TestCohort",
+                                                     course_id=self.course.id,
+                                                     group_type=CourseUserGroup.COHORT)
+        self.cohort.users.add(self.user)
+
+        # the general cache is a dummy in tests
+        cache = get_cache('django.core.cache.backends.locmem.LocMemCache')
+        cache.clear()
+        patcher = patch('course_groups.cohorts.cache', cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_get_cohort_id_is_cached(self):
+        self.assertEqual(get_cohort_id(self.user, self.course.id), self.cohort.id)
+        with patch('course_groups.cohorts.get_cohort') as mock_get_cohort:
+            self.assertEqual(get_cohort_id(self.user, self.course.id), self.cohort.id)
+            self.assertFalse(mock_get_cohort.called)
+
+    def test_membership_changes_are_seen(self):
+        self.assertIsNone(get_cohort_id(self.other_user, self.course.id))
+        add_user_to_cohort(self.cohort, self.other_user.username)
+        self.assertEqual(get_cohort_id(self.other_user, self.course.id), self.cohort.id)
+
+        remove_user_from_cohort(self.cohort, self.other_user)
+        self.assertIsNone(get_cohort_id(self.other_user, self.course.id))
+
+        # moved to another cohort behind the cache's back: dropped by add_cohort
+        other_cohort = CourseUserGroup.objects.create(name="OtherCohort",
+                                                      course_id=self.course.id,
+                                                      group_type=CourseUserGroup.COHORT)
+        other_cohort.users.add(self.other_user)
+        add_cohort(self.course.id, "NewCohort")
+        self.assertEqual(get_cohort_id(self.other_user, self.course.id), other_cohort.id)
+
+    def test_get_cohorts_for_users(self):
+        user_ids = [self.user.id, self.other_user.id]
+        expected = {self.user.id: self.cohort.id, self.other_user.id: None}
+        self.assertEqual(get_cohorts_for_users(self.course.id, user_ids), expected)
+
+        # the membership found is cached
+        with self.assertNumQueries(1):
+            self.assertEqual(get_cohorts_for_users(self.course.id, user_ids), expected)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_cohorts_for_users(self.course.id, [self.user.id]),
+                             {self.user.id: self.cohort.id})
+
+    def test_uncohorted_course_has_no_cohorts(self):
+        TestCohorts.config_course_cohorts(self.course, [], cohorted=False)
+        add_user_to_cohort(self.cohort, self.other_user.username)
+        self.assertIsNone(get_cohort_id(self.user, self.course.id))
+        self.assertIsNone(get_cohort_id(self.other_user, self.course.id))
+        self.assertEqual(get_cohorts_for_users(self.course.id, [self.user.id, self.other_user.id]),
+                         {self.user.id: None, self.other_user.id: None})
@@ -0,0 +1,45 @@
+"""
+Time what MakoMiddleware costs a request which doesn't render a template (eg an
+ajax handler) now that the request context is only built on first render,
+against building it up front as every request used to.
+"""
+import time
+from optparse import make_option
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import NoArgsCommand
+from django.http import HttpResponse
+from django.test.client import RequestFactory
+
+from mitxmako import middleware
+
+
+class Command(NoArgsCommand):
+    help = "Time the mako request context of requests which render templates and of requests which don't."
+
+    option_list = NoArgsCommand.option_list + (
+        make_option('--requests', type='int', default=1000, help='Number of requests to time'),
+        make_option('--path', default='/courses/', help='Path of the requests'),
+    )
+
+    def handle_noargs(self, **options):
+        mako_middleware = middleware.MakoMiddleware()
+        request = RequestFactory().get(options['path'])
+        request.user = AnonymousUser()
+        response = HttpResponse()
+
+        def without_render():
+            mako_middleware.process_request(request)
+            mako_middleware.process_response(request, response)
+
+        def with_render():
+            mako_middleware.process_request(request)
+            middleware.get_request_context()
+            mako_middleware.process_response(request, response)
+
+        for name, handle in (('without rendering', without_render), ('rendering', with_render)):
+            start = time.time()
+            for _ in xrange(options['requests']):
+                handle()
+            self.stdout.write("{0}: {1:.3f} ms per request\n".format(
+                name, (time.time() - start) * 1000 / options['requests']))
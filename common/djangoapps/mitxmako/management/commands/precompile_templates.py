@@ -0,0 +1,34 @@
+"""
+Compile all the mako templates of every namespace in MAKO_TEMPLATES into
+MAKO_MODULE_DIR, so that processes started afterwards load the compiled
+templates instead of compiling each of them on first use.
+
+Run this at deploy time with MAKO_MODULE_DIR set to a persistent directory
+shared by the workers (and MAKO_PRELOAD_TEMPLATES on to load the templates at
+startup). Templates which change are recompiled when they are next loaded.
+The command fails if MAKO_MODULE_DIR is unset or left at its default, a
+temporary directory which is deleted when the command exits.
+"""
+from django.conf import settings
+from django.core.management.base import CommandError, NoArgsCommand
+
+from mitxmako import middleware
+from tempdir import is_clean_tempdir
+
+
+class Command(NoArgsCommand):
+    help = "Compile all the mako templates into MAKO_MODULE_DIR."
+
+    def handle_noargs(self, **options):
+        module_dir = getattr(settings, 'MAKO_MODULE_DIR', None)
+        if not module_dir or is_clean_tempdir(module_dir):
+            raise CommandError("MAKO_MODULE_DIR must be set to a persistent directory, "
+                               "e.g. in env.json, for the compiled templates to be kept")
+
+        middleware.MakoMiddleware()
+        loaded, failed = middleware.load_templates()
+
+        self.stdout.write("Compiled {0} templates into {1}\n".format(loaded, settings.MAKO_MODULE_DIR))
+        if int(options.get('verbosity', 1)) > 1:
+            for namespace, uri in failed:
+                self.stdout.write("Not a mako template: {0} {1}\n".format(namespace, uri))
@@ -12,14 +12,112 @@
 #   See the License for the specific language governing permissions and
 #   limitations under the License.
 
+import logging
+import os
+import threading
+
 from mako.lookup import TemplateLookup
 import tempdir
 from django.template import RequestContext
 from django.conf import settings
 
-requestcontext = None
+log = logging.getLogger(__name__)
+
 lookup = {}
 
+# whether the templates have been preloaded in this process (see MAKO_PRELOAD_TEMPLATES)
+_preloaded = False
+
+# the request being processed by the current thread, and the template context built from it
+_current = threading.local()
+
+
+def get_request_context():
+    """
+    Return the context of the request being processed by the current thread, as a
+    single dictionary to render templates with, or None if there is no current
+    request (as in management commands and some tests).
+
+    The context processors are only run the first time this is called for a
+    request, so requests which don't render templates (eg ajax handlers) don't pay
+    for them.
+    """
+    request = getattr(_current, 'request', None)
+    if request is None:
+        return None
+
+    if getattr(_current, 'context', None) is None:
+        requestcontext = RequestContext(request)
+        requestcontext['is_secure'] = request.is_secure()
+        requestcontext['site'] = request.get_host()
+
+        # collapse requestcontext to a single dictionary for mako
+        context = {}
+        for d in requestcontext:
+            context.update(d)
+        _current.context = context
+
+    return _current.context
+
+
+def template_uris(directories):
+    """
+    Yield the uri, as TemplateLookup.get_template takes it, of every file in
+    directories (skipping hidden files), each uri once
+    """
+    seen = set()
+    for directory in directories:
+        for root, _, filenames in os.walk(directory):
+            for filename in filenames:
+                if filename.startswith('.'):
+                    continue
+                uri = '/' + os.path.relpath(os.path.join(root, filename), directory).replace(os.sep, '/')
+                if uri not in seen:
+                    seen.add(uri)
+                    yield uri
+
+
+def load_templates():
+    """
+    Load every file in the template directories of every namespace of lookup,
+    compiling it into the module directory of the namespace unless it has
+    already been compiled there.
+
+    Returns the number of templates loaded, and a list of (namespace, uri) of
+    the files which couldn't be compiled: mostly files which aren't mako
+    templates, such as underscore templates.
+    """
+    loaded, failed = 0, []
+    for namespace, template_lookup in lookup.items():
+        for uri in template_uris(template_lookup.directories):
+            try:
+                template_lookup.get_template(uri)
+            except Exception:
+                failed.append((namespace, uri))
+            else:
+                loaded += 1
+    return loaded, failed
+
+
+def preload_templates():
+    """
+    Load all the templates once per process, warning about the namespaces whose
+    templates haven't been compiled yet by the precompile_templates command, as
+    they are compiled now instead.
+    """
+    global _preloaded
+    if _preloaded:
+        return
+    _preloaded = True
+
+    for namespace, template_lookup in lookup.items():
+        if not os.path.isdir(template_lookup.module_directory) or not os.listdir(template_lookup.module_directory):
+            log.warning("The mako templates of {0} haven't been precompiled into {1}, compiling them now".format(
+                namespace, template_lookup.module_directory))
+
+    loaded, failed = load_templates()
+    log.info("Preloaded {0} mako templates ({1} other files)".format(loaded, len(failed)))
+
 
 class MakoMiddleware(object):
     def __init__(self):
@@ -31,9 +129,11 @@ class MakoMiddleware(object):
         if module_directory is None:
             module_directory = tempdir.mkdtemp_clean()
 
+        # each namespace is compiled into its own directory, since the same template
+        # uri can name different templates in different namespaces
         for location in template_locations:
             lookup[location] = TemplateLookup(directories=template_locations[location],
-                                module_directory=module_directory,
+                                module_directory=os.path.join(module_directory, location),
                                 output_encoding='utf-8',
                                 input_encoding='utf-8',
                                 encoding_errors='replace',
@@ -42,8 +142,14 @@ class MakoMiddleware(object):
         import mitxmako
         mitxmako.lookup = lookup
 
+        if getattr(settings, 'MAKO_PRELOAD_TEMPLATES', False):
+            preload_templates()
+
     def process_request(self, request):
-        global requestcontext
-        requestcontext = RequestContext(request)
-        requestcontext['is_secure'] = request.is_secure()
-        requestcontext['site'] = request.get_host()
+        _current.request = request
+        _current.context = None
+
+    def process_response(self, request, response):
+        _current.request = None
+        _current.context = None
+        return response
@@ -80,9 +80,9 @@ def render_to_string(template_name, dictionary, context=None, namespace='main'):
     context_instance['marketing_link'] = marketing_link
 
     # In various testing contexts, there might not be a current request context.
-    if middleware.requestcontext is not None:
-        for d in middleware.requestcontext:
-            context_dictionary.update(d)
+    request_context = middleware.get_request_context()
+    if request_context is not None:
+        context_dictionary.update(request_context)
     for d in context_instance:
         context_dictionary.update(d)
     if context:
@@ -47,9 +47,9 @@ class Template(MakoTemplate):
         context_dictionary = {}
 
         # In various testing contexts, there might not be a current request context.
-        if middleware.requestcontext is not None:
-            for d in middleware.requestcontext:
-                context_dictionary.update(d)
+        request_context = middleware.get_request_context()
+        if request_context is not None:
+            context_dictionary.update(request_context)
         for d in context_instance:
             context_dictionary.update(d)
         context_dictionary['settings'] = settings
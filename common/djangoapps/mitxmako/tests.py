@@ -1,8 +1,20 @@
+import os
+import shutil
+import tempfile
+
+from mako.lookup import TemplateLookup
+
+from django.http import HttpResponse
 from django.test import TestCase
+from django.test.client import RequestFactory
 from django.test.utils import override_settings
+from django.core.management import call_command
+from django.core.management.base import CommandError
 from django.core.urlresolvers import reverse
+from mitxmako import middleware
 from mitxmako.shortcuts import marketing_link
-from mock import patch
+from mock import MagicMock, patch
+from tempdir import mkdtemp_clean
 from util.testing import UrlResetMixin
 
 
@@ -24,3 +36,77 @@ class ShortcutsTests(UrlResetMixin, TestCase):
             expected_link = reverse('login')
             link = marketing_link('ABOUT')
             self.assertEquals(link, expected_link)
+
+
+class MakoMiddlewareTests(TestCase):
+    """
+    Test the lazy request context of the mako middleware
+    """
+    def setUp(self):
+        self.middleware = middleware.MakoMiddleware()
+        self.request = RequestFactory().get('/')
+
+    def tearDown(self):
+        self.middleware.process_response(self.request, HttpResponse())
+
+    def test_request_context_is_lazy(self):
+        with patch('mitxmako.middleware.RequestContext', return_value=MagicMock()) as request_context:
+            self.middleware.process_request(self.request)
+            self.assertFalse(request_context.called)
+
+            middleware.get_request_context()
+            middleware.get_request_context()
+            request_context.assert_called_once_with(self.request)
+
+    def test_request_context_is_flattened(self):
+        self.middleware.process_request(self.request)
+        context = middleware.get_request_context()
+        self.assertEqual(context['site'], self.request.get_host())
+        self.assertIs(context['request'], self.request)
+
+    def test_request_context_is_cleared(self):
+        self.middleware.process_request(self.request)
+        self.middleware.process_response(self.request, HttpResponse())
+        self.assertIsNone(middleware.get_request_context())
+
+
+class LoadTemplatesTests(TestCase):
+    """
+    Test the precompilation of the mako templates
+    """
+    def setUp(self):
+        self.template_dir = tempfile.mkdtemp()
+        self.module_dir = tempfile.mkdtemp()
+        os.mkdir(os.path.join(self.template_dir, 'sub'))
+        for name, source in (('base.html', '${1 + 1}'),
+                             ('sub/page.html', '<%inherit file="/base.html"/>'),
+                             ('item.underscore', '<%= item %>')):
+            with open(os.path.join(self.template_dir, name), 'w') as template_file:
+                template_file.write(source)
+
+    def tearDown(self):
+        shutil.rmtree(self.template_dir)
+        shutil.rmtree(self.module_dir)
+
+    def test_load_templates(self):
+        template_lookup = TemplateLookup(directories=[self.template_dir], module_directory=self.module_dir)
+        with patch.dict(middleware.lookup, {'test': template_lookup}, clear=True):
+            loaded, failed = middleware.load_templates()
+
+        self.assertEqual(loaded, 2)
+        self.assertEqual(failed, [('test', '/item.underscore')])
+        self.assertTrue(os.path.exists(os.path.join(self.module_dir, 'sub', 'page.html.py')))
+
+    def test_precompile_needs_persistent_module_dir(self):
+        with override_settings(MAKO_MODULE_DIR=mkdtemp_clean('mako')):
+            with self.assertRaises(CommandError):
+                call_command('precompile_templates')
+
+    def test_precompile_templates(self):
+        template_lookup = TemplateLookup(directories=[self.template_dir], module_directory=self.module_dir)
+        with override_settings(MAKO_MODULE_DIR=self.module_dir):
+            with patch.dict(middleware.lookup, {'test': template_lookup}, clear=True):
+                with patch('mitxmako.middleware.MakoMiddleware'):
+                    call_command('precompile_templates')
+
+        self.assertTrue(os.path.exists(os.path.join(self.module_dir, 'sub', 'page.html.py')))
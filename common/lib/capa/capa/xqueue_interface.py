@@ -10,6 +10,12 @@ import requests
 log = logging.getLogger(__name__)
 dateformat = '%Y%m%d%H%M%S'
 
+# seconds to wait for xqueue to answer a request
+DEFAULT_TIMEOUT = 10
+
+# keep-alive connections kept open to xqueue by each XQueueInterface
+DEFAULT_POOL_SIZE = 10
+
 
 def make_hashkey(seed):
     '''
@@ -59,10 +65,17 @@ class XQueueInterface(object):
     Interface to the external grading system
     '''
 
-    def __init__(self, url, django_auth, requests_auth=None):
+    def __init__(self, url, django_auth, requests_auth=None, timeout=DEFAULT_TIMEOUT,
+                 pool_size=DEFAULT_POOL_SIZE):
         self.url  = url
         self.auth = django_auth
-        self.session = requests.session(auth=requests_auth)
+        self.timeout = timeout
+        # The session keeps its connections to xqueue alive between requests
+        self.session = requests.session(auth=requests_auth, config={
+            'keep_alive': True,
+            'pool_connections': pool_size,
+            'pool_maxsize': pool_size,
+        })
 
     def send_to_queue(self, header, body, files_to_upload=None):
         """
@@ -115,10 +128,13 @@ class XQueueInterface(object):
 
     def _http_post(self, url, data, files=None):
         try:
-            r = self.session.post(url, data=data, files=files)
+            r = self.session.post(url, data=data, files=files, timeout=self.timeout)
         except requests.exceptions.ConnectionError, err:
             log.error(err)
             return (1, 'cannot connect to server')
+        except requests.exceptions.Timeout, err:
+            log.error(err)
+            return (1, 'timed out waiting for server')
 
         if r.status_code not in [200]:
             return (1, 'unexpected HTTP status code [%d]' % r.status_code)
@@ -5,12 +5,20 @@ import os.path
 import shutil
 import tempfile
 
+# the directories made by mkdtemp_clean
+_clean_dirs = set()
+
 def mkdtemp_clean(suffix="", prefix="tmp", dir=None):
     """Just like mkdtemp, but the directory will be deleted when the process ends."""
     the_dir = tempfile.mkdtemp(suffix=suffix, prefix=prefix, dir=dir)
     atexit.register(cleanup_tempdir, the_dir)
+    _clean_dirs.add(the_dir)
     return the_dir
 
+def is_clean_tempdir(the_dir):
+    """Is the_dir a directory made by mkdtemp_clean, to be deleted when the process ends?"""
+    return the_dir in _clean_dirs
+
 def cleanup_tempdir(the_dir):
     """Called on process exit to remove a temp directory."""
     if os.path.exists(the_dir):
@@ -3,12 +3,17 @@ XASSET_SRCREF_PREFIX = 'xasset:'
 
 XASSET_THUMBNAIL_TAIL_NAME = '.jpg'
 
+# the bounding box of the thumbnail that is shown for image assets
+THUMBNAIL_SIZE = (128, 128)
+
+# the bounding boxes of the additional derivatives that are generated for uploaded images
+IMAGE_DERIVATIVE_SIZES = [(256, 256), (512, 512)]
+
 import os
 import logging
 import StringIO
 
 from xmodule.modulestore import Location
-from .django import contentstore
 # to install PIL on MacOSX: 'easy_install http://dist.repoze.org/PIL-1.1.6.tar.gz'
 from PIL import Image
 
@@ -30,8 +35,15 @@ class StaticContent(object):
         return self.location.category == 'thumbnail'
 
     @staticmethod
-    def generate_thumbnail_name(original_name):
-        return ('{0}' + XASSET_THUMBNAIL_TAIL_NAME).format(os.path.splitext(original_name)[0])
+    def generate_thumbnail_name(original_name, dimensions=None):
+        """
+        The name of the thumbnail for original_name, or of its derivative with the
+        given (width, height) dimensions if specified
+        """
+        base_name = os.path.splitext(original_name)[0]
+        if dimensions is not None:
+            base_name = '{0}-{1}x{2}'.format(base_name, dimensions[0], dimensions[1])
+        return ('{0}' + XASSET_THUMBNAIL_TAIL_NAME).format(base_name)
 
     @staticmethod
     def compute_location(org, course, name, revision=None, is_thumbnail=False):
@@ -91,9 +103,16 @@ class ContentStore(object):
     def find(self, filename):
         raise NotImplementedError
 
-    def get_all_content_for_course(self, location):
+    def get_all_content_for_course(self, location, start=0, maxresults=-1, sort=None, fields=None):
         '''
-        Returns a list of all static assets for a course. The return format is a list of dictionary elements. Example:
+        Returns a list of all static assets for a course.
+
+        start, maxresults: return only the page of `maxresults` assets beginning at `start`
+            (a maxresults <= 0 returns everything from start onwards)
+        sort: a list of (key, direction) pairs to order the assets by, e.g. [('uploadDate', -1)]
+        fields: if specified, the list of document fields to return for each asset
+
+        The return format is a list of dictionary elements. Example:
 
             [
 
@@ -113,10 +132,32 @@ class ContentStore(object):
         '''
         raise NotImplementedError
 
-    def generate_thumbnail(self, content):
+    def get_content_count_for_course(self, location):
+        '''
+        Returns the number of static assets for a course, as get_all_content_for_course would list them.
+        '''
+        raise NotImplementedError
+
+    def set_thumbnail_location(self, location, thumbnail_location):
+        '''
+        Point the asset at location to thumbnail_location, without rewriting the asset itself.
+        '''
+        raise NotImplementedError
+
+    def generate_thumbnail(self, content, dimensions=None, progressive=False):
+        '''
+        Generate and save a JPEG thumbnail for an image asset, bounded by dimensions (default
+        THUMBNAIL_SIZE). Derivatives with other dimensions are saved under their own names.
+        Returns a (thumbnail content, thumbnail location) pair; the content is None if no
+        thumbnail could be generated.
+        '''
         thumbnail_content = None
         # use a naming convention to associate originals with the thumbnail
-        thumbnail_name = StaticContent.generate_thumbnail_name(content.location.name)
+        if dimensions is None:
+            thumbnail_name = StaticContent.generate_thumbnail_name(content.location.name)
+            dimensions = THUMBNAIL_SIZE
+        else:
+            thumbnail_name = StaticContent.generate_thumbnail_name(content.location.name, dimensions)
 
         thumbnail_file_location = StaticContent.compute_location(content.location.org, content.location.course,
                                                                  thumbnail_name, is_thumbnail=True)
@@ -128,23 +169,24 @@ class ContentStore(object):
                 # use PIL to do the thumbnail generation (http://www.pythonware.com/products/pil/)
                 # My understanding is that PIL will maintain aspect ratios while restricting
                 # the max-height/width to be whatever you pass in as 'size'
-                # @todo: move the thumbnail size to a configuration setting?!?
                 im = Image.open(StringIO.StringIO(content.data))
 
                 # I've seen some exceptions from the PIL library when trying to save palletted
                 # PNG files to JPEG. Per the google-universe, they suggest converting to RGB first.
                 im = im.convert('RGB')
-                size = 128, 128
-                im.thumbnail(size, Image.ANTIALIAS)
+                im.thumbnail(dimensions, Image.ANTIALIAS)
                 thumbnail_file = StringIO.StringIO()
-                im.save(thumbnail_file, 'JPEG')
+                if progressive:
+                    im.save(thumbnail_file, 'JPEG', progressive=True)
+                else:
+                    im.save(thumbnail_file, 'JPEG')
                 thumbnail_file.seek(0)
 
                 # store this thumbnail as any other piece of content
                 thumbnail_content = StaticContent(thumbnail_file_location, thumbnail_name,
                                                   'image/jpeg', thumbnail_file)
 
-                contentstore().save(thumbnail_content)
+                self.save(thumbnail_content)
 
             except Exception, e:
                 # log and continue as thumbnails are generally considered as optional
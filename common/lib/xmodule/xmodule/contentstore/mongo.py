@@ -1,4 +1,5 @@
 from pymongo import Connection
+import pymongo
 import gridfs
 from gridfs.errors import NoFile
 
@@ -7,6 +8,7 @@ from xmodule.modulestore.mongo.base import location_to_query
 from xmodule.contentstore.content import XASSET_LOCATION_TAG
 
 import logging
+from itertools import repeat
 
 from .content import StaticContent, ContentStore
 from xmodule.exceptions import NotFoundError
@@ -26,6 +28,25 @@ class MongoContentStore(ContentStore):
 
         self.fs_files = _db[bucket + ".files"]   # the underlying collection GridFS uses
 
+        # maintain an index over _id.* in the same order that is used when querying by
+        # location, plus one that serves the asset listing in upload date order
+        self.fs_files.ensure_index(zip(('_id.' + field for field in Location._fields), repeat(1)))
+        self.fs_files.ensure_index([('_id.tag', pymongo.ASCENDING), ('_id.org', pymongo.ASCENDING),
+                                    ('_id.course', pymongo.ASCENDING), ('_id.category', pymongo.ASCENDING),
+                                    ('uploadDate', pymongo.DESCENDING)])
+
+        # an optional django-style cache (get/set/delete) for per-course asset counts.
+        # Set by the runtime, like the modulestore's metadata_inheritance_cache_subsystem
+        self.count_cache = None
+
+    def _count_cache_key(self, location, get_thumbnails=False):
+        return 'asset_count.{0}.{1}.{2}'.format(location.org, location.course,
+                                                'thumbnail' if get_thumbnails else 'asset')
+
+    def _invalidate_count(self, location):
+        if self.count_cache is not None:
+            self.count_cache.delete(self._count_cache_key(location, get_thumbnails=(location.category == 'thumbnail')))
+
     def save(self, content):
         id = content.get_id()
 
@@ -38,11 +59,17 @@ class MongoContentStore(ContentStore):
 
             fp.write(content.data)
 
+        self._invalidate_count(content.location)
         return content
 
     def delete(self, id):
         if self.fs.exists({"_id": id}):
             self.fs.delete(id)
+            self._invalidate_count(Location(id))
+
+    def set_thumbnail_location(self, location, thumbnail_location):
+        self.fs_files.update({'_id': StaticContent.get_id_from_location(location)},
+                             {'$set': {'thumbnail_location': list(thumbnail_location)}})
 
     def find(self, location, throw_on_not_found=True):
         id = StaticContent.get_id_from_location(location)
@@ -72,22 +99,51 @@ class MongoContentStore(ContentStore):
         with disk_fs.open(content.name, 'wb') as asset_file:
             asset_file.write(content.data)
 
-    def export_all_for_course(self, course_location, output_directory):
+    def export_all_for_course(self, course_location, output_directory, manifest=None):
+        """
+        Export every asset for the course into output_directory. If an ExportManifest is
+        passed, assets whose md5 matches the one recorded by the previous export are skipped
+        without being read out of GridFS.
+        """
         assets = self.get_all_content_for_course(course_location)
 
         for asset in assets:
             asset_location = Location(asset['_id'])
+            if manifest is not None:
+                asset_directory = output_directory
+                if asset.get('import_path') is not None:
+                    asset_directory = output_directory + '/' + os.path.dirname(asset['import_path'])
+                asset_path = os.path.join(asset_directory, asset['displayname'])
+                if manifest.is_unchanged(asset_path, asset['md5']):
+                    continue
             self.export(asset_location, output_directory)
 
     def get_all_content_thumbnails_for_course(self, location):
         return self._get_all_content_for_course(location, get_thumbnails=True)
 
-    def get_all_content_for_course(self, location):
-        return self._get_all_content_for_course(location, get_thumbnails=False)
-
-    def _get_all_content_for_course(self, location, get_thumbnails=False):
+    def get_all_content_for_course(self, location, start=0, maxresults=-1, sort=None, fields=None):
+        return self._get_all_content_for_course(location, get_thumbnails=False, start=start,
+                                                maxresults=maxresults, sort=sort, fields=fields)
+
+    def get_content_count_for_course(self, location):
+        key = self._count_cache_key(location)
+        count = self.count_cache.get(key) if self.count_cache is not None else None
+        if count is None:
+            count = self.fs_files.find(location_to_query(self._course_filter(location))).count()
+            if self.count_cache is not None:
+                self.count_cache.set(key, count)
+        return count
+
+    def _course_filter(self, location, get_thumbnails=False):
+        return Location(XASSET_LOCATION_TAG, category="asset" if not get_thumbnails else "thumbnail",
+                        course=location.course, org=location.org)
+
+    def _get_all_content_for_course(self, location, get_thumbnails=False, start=0, maxresults=-1, sort=None,
+                                    fields=None):
         '''
-        Returns a list of all static assets for a course. The return format is a list of dictionary elements. Example:
+        Returns a list of static assets for a course, optionally just the `maxresults` starting at
+        `start` in `sort` order (a list of (key, direction) pairs) and with only `fields` of each
+        document. The return format is a list of dictionary elements. Example:
 
             [
 
@@ -105,8 +161,13 @@ class MongoContentStore(ContentStore):
 
             ]
         '''
-        course_filter = Location(XASSET_LOCATION_TAG, category="asset" if not get_thumbnails else "thumbnail",
-                                 course=location.course, org=location.org)
+        course_filter = self._course_filter(location, get_thumbnails)
         # 'borrow' the function 'location_to_query' from the Mongo modulestore implementation
-        items = self.fs_files.find(location_to_query(course_filter))
+        items = self.fs_files.find(
+            location_to_query(course_filter),
+            fields=fields,
+            skip=start,
+            limit=maxresults if maxresults > 0 else 0,
+            sort=sort,
+        )
         return list(items)
@@ -1,4 +1,5 @@
 import logging
+from collections import defaultdict
 from cStringIO import StringIO
 from math import exp
 from lxml import etree
@@ -8,7 +9,9 @@ from datetime import datetime
 
 import dateutil.parser
 
+from xmodule.error_module import ErrorDescriptor
 from xmodule.modulestore import Location
+from xmodule.modulestore.exceptions import ItemNotFoundError
 from xmodule.seq_module import SequenceDescriptor, SequenceModule
 from xmodule.util.decorators import lazyproperty
 from xmodule.graders import grader_from_conf
@@ -58,6 +61,22 @@ edx_xml_parser = etree.XMLParser(dtd_validation=False, load_dtd=False,
 _cached_toc = {}
 
 
+class LazyDescriptorDict(dict):
+    """
+    A dict some of whose values are only computed the first time they are looked up,
+    by calling the function registered for their key in `loaders`.
+    """
+    def __init__(self, loaders, *args, **kwargs):
+        super(LazyDescriptorDict, self).__init__(*args, **kwargs)
+        self._loaders = loaders
+
+    def __missing__(self, key):
+        if key not in self._loaders:
+            raise KeyError(key)
+        value = self[key] = self._loaders.pop(key)()
+        return value
+
+
 class Textbook(object):
     def __init__(self, title, book_url):
         self.title = title
@@ -580,15 +599,182 @@ class CourseDescriptor(CourseFields, SequenceDescriptor):
                 "section_descriptor" : The section descriptor
                 "xmoduledescriptors" : An array of xmoduledescriptors that
                     could possibly be in the section, for any student
+                "section_name" : The display name of the section
+                "section_location" : The location of the section
+                "xmodule_locations" : An array of (location, always_recalculate_grades)
+                    for the xmoduledescriptors
 
         all_descriptors - This contains a list of all xmodules that can
             effect grading a student. This is used to efficiently fetch
             all the xmodule state for a ModelDataCache without walking
             the descriptor tree again.
 
+        all_descriptor_locations - The locations of all_descriptors
+
+        The context is built from a compact summary of the course (see
+        grading_context_summary), which the modulestore may cache across course
+        descriptor instances until the course is next edited. The descriptors in
+        it are only loaded when they are first looked up, so that sections can be
+        skipped by name and location alone.
+        """
+        summary = self._cached_summary('grading_context', self.grading_context_summary)
+
+        def load_descriptors(locations):
+            descriptors = []
+            for location in locations:
+                try:
+                    descriptors.append(self.system.load_item(location))
+                except ItemNotFoundError:
+                    log.exception('Unable to load item {loc}, skipping'.format(loc=location))
+            return descriptors
+
+        graded_sections = {}
+        for section_format, sections in summary['graded_sections'].iteritems():
+            graded_sections[section_format] = [
+                LazyDescriptorDict(
+                    {
+                        'section_descriptor': lambda section=section: self.system.load_item(section['location']),
+                        'xmoduledescriptors': lambda section=section: load_descriptors(
+                            location for location, _ in section['xmodules']
+                        ),
+                    },
+                    section_name=section['name'],
+                    section_location=Location(section['location']),
+                    xmodule_locations=[(Location(location), always_recalculate_grades)
+                                       for location, always_recalculate_grades in section['xmodules']],
+                )
+                for section in sections
+            ]
+
+        return LazyDescriptorDict(
+            {'all_descriptors': lambda: load_descriptors(summary['all_descriptors'])},
+            graded_sections=graded_sections,
+            all_descriptor_locations=[Location(location) for location in summary['all_descriptors']],
+        )
+
+    def _cached_summary(self, name, compute):
+        """
+        Return the summary called name of this course, as cached by the modulestore
+        for the current version of the course if it can, or else as returned by compute()
+        (which is then cached).
+        """
+        store = getattr(self.system, 'modulestore', None)
+        if not hasattr(store, 'get_cached_course_summary'):
+            return compute()
+
+        summary = store.get_cached_course_summary(self.location, name)
+        if summary is None:
+            summary = compute()
+            store.set_cached_course_summary(self.location, name, summary)
+        return summary
 
+    @lazyproperty
+    def structure_summary(self):
+        """
+        A summary of the structure of the course, computed once per version of the
+        course (see _cached_summary), with keys:
+
+        counts - the number of descriptors of each class (HtmlDescriptor, CapaDescriptor, ...)
+            in the course, the course included
+        depths - the number of descriptors at each depth in the course tree (the course
+            being at depth 0)
+        graded_sections - a dictionary keyed by section-type, whose values are arrays of
+            (section name, number of scored modules) for the graded sections
         """
+        return self._cached_summary('structure', self._structure_summary)
+
+    def _structure_summary(self):
+        counts = defaultdict(int)
+        depths = defaultdict(int)
 
+        def walk(descriptor, depth):
+            counts[descriptor.__class__.__name__] += 1
+            depths[depth] += 1
+            for child in descriptor.get_children():
+                walk(child, depth + 1)
+
+        walk(self, 0)
+
+        graded_sections = dict(
+            (section_format, [(section['name'], len(section['xmodules'])) for section in sections])
+            for section_format, sections in
+            self._cached_summary('grading_context', self.grading_context_summary)['graded_sections'].iteritems()
+        )
+
+        return {'counts': dict(counts),
+                'depths': dict(depths),
+                'graded_sections': graded_sections, }
+
+    @lazyproperty
+    def table_of_contents(self):
+        """
+        The chapters and sections of the course shown in the courseware navigation,
+        computed once per version of the course (see _cached_summary), as a dict with
+        key "chapters". Its value is None if the table of contents can differ between
+        students, because the course, a chapter or a section has dynamic children.
+        Otherwise it is a list of the chapters that aren't hidden from the table of
+        contents, each a dictionary with keys
+
+            display_name, url_name, start, days_early_for_beta, is_error and
+            sections - a list of the sections of the chapter that aren't hidden, each
+                a dictionary with keys display_name, url_name, format, due, graded,
+                start, days_early_for_beta and is_error
+
+        where is_error is True for error descriptors.
+        """
+        return self._cached_summary('table_of_contents', self._table_of_contents)
+
+    def _table_of_contents(self):
+        def describe(descriptor, **extra):
+            extra.update({
+                'display_name': descriptor.display_name_with_default,
+                'url_name': descriptor.url_name,
+                'start': descriptor.lms.start,
+                'days_early_for_beta': descriptor.lms.days_early_for_beta,
+                'is_error': isinstance(descriptor, ErrorDescriptor),
+            })
+            return extra
+
+        if self.has_dynamic_children():
+            return {'chapters': None}
+
+        chapters = []
+        for chapter in self.get_children():
+            if chapter.has_dynamic_children():
+                return {'chapters': None}
+            if chapter.lms.hide_from_toc:
+                continue
+
+            sections = []
+            for section in chapter.get_children():
+                if section.has_dynamic_children():
+                    return {'chapters': None}
+                if section.lms.hide_from_toc:
+                    continue
+                sections.append(describe(
+                    section,
+                    format=section.lms.format if section.lms.format is not None else '',
+                    due=section.lms.due,
+                    graded=section.lms.graded,
+                ))
+
+            chapters.append(describe(chapter, sections=sections))
+
+        return {'chapters': chapters}
+
+    def grading_context_summary(self):
+        """
+        Walk the course and return the compact, serializable summary of its graded
+        sections which grading_context is built from:
+
+        graded_sections - a dictionary keyed by section-type, whose values are
+            arrays of dictionaries containing the "location" url and display "name"
+            of the section, and "xmodules", an array of (location url,
+            always_recalculate_grades) for the descendents of the section (and the
+            section itself) that have scores
+        all_descriptors - an array of the location urls of all the graded sections
+            and their descendents
+        """
         all_descriptors = []
         graded_sections = {}
 
@@ -605,13 +791,18 @@ class CourseDescriptor(CourseFields, SequenceDescriptor):
                     xmoduledescriptors.append(s)
 
                     # The xmoduledescriptors included here are only the ones that have scores.
-                    section_description = {'section_descriptor': s, 'xmoduledescriptors': filter(lambda child: child.has_score, xmoduledescriptors)}
+                    section_description = {
+                        'location': s.location.url(),
+                        'name': s.display_name_with_default,
+                        'xmodules': [(child.location.url(), child.always_recalculate_grades)
+                                     for child in xmoduledescriptors if child.has_score],
+                    }
 
                     section_format = s.lms.format if s.lms.format is not None else ''
                     graded_sections[section_format] = graded_sections.get(section_format, []) + [section_description]
 
-                    all_descriptors.extend(xmoduledescriptors)
-                    all_descriptors.append(s)
+                    all_descriptors.extend(child.location.url() for child in xmoduledescriptors)
+                    all_descriptors.append(s.location.url())
 
         return {'graded_sections': graded_sections,
                 'all_descriptors': all_descriptors, }
@@ -4,6 +4,8 @@ import logging
 import random
 import sys
 
+import numpy as np
+
 from collections import namedtuple
 
 log = logging.getLogger("mitx.courseware")
@@ -40,6 +42,55 @@ def aggregate_scores(scores, section_name="summary"):
     return all_total, graded_total
 
 
+def score_matrix(grade_sheets):
+    """
+    Build the score matrix graded by CourseGrader.grade_matrix from a list of
+    grade sheets, one per student.
+
+    grade_sheets: A list of grade sheets, as passed to CourseGrader.grade
+    returns: A dict mapping each section format to a tuple (section_names, percents).
+        section_names: The names of the sections of that format, in grade sheet order
+        percents: A students x sections NumPy array of the earned / possible
+            percentage of each student in each section. A student whose grade
+            sheet has fewer sections has NaN for the missing trailing ones.
+
+    Raises ValueError if the grade sheets disagree on the names of the sections.
+    """
+    section_names = {}
+    for grade_sheet in grade_sheets:
+        for section_format, scores in grade_sheet.iteritems():
+            names = [score.section for score in scores]
+            shorter, longer = sorted([section_names.get(section_format, []), names], key=len)
+            if longer[:len(shorter)] != shorter:
+                raise ValueError("Grade sheets have different {0} sections".format(section_format))
+            section_names[section_format] = longer
+
+    matrix = {}
+    for section_format, names in section_names.iteritems():
+        percents = np.empty((len(grade_sheets), len(names)))
+        percents.fill(np.nan)
+        for student, grade_sheet in enumerate(grade_sheets):
+            for section, score in enumerate(grade_sheet.get(section_format, [])):
+                percents[student, section] = score.earned / float(score.possible)
+        matrix[section_format] = (names, percents)
+    return matrix
+
+
+def letter_grades(grade_cutoffs, percents):
+    """
+    Return a NumPy object array with the letter grade (or None) of each percentage in
+    percents, as courseware.grades.grade_for_percentage would assign them one by one.
+
+    grade_cutoffs: A dict mapping each letter grade to the lowest percentage earning it
+    """
+    grades = np.empty(len(percents), dtype=object)
+    descending_grades = sorted(grade_cutoffs, key=lambda x: grade_cutoffs[x], reverse=True)
+    # assign from the lowest cutoff up, so each percentage ends up with the highest grade it earns
+    for possible_grade in reversed(descending_grades):
+        grades[percents >= grade_cutoffs[possible_grade]] = possible_grade
+    return grades
+
+
 def invalid_args(func, argdict):
     """
     Given a function and a dictionary of arguments, returns a set of arguments
@@ -154,6 +205,14 @@ class CourseGrader(object):
         '''Given a grade sheet, return a dict containing grading information'''
         raise NotImplementedError
 
+    def grade_matrix(self, matrix, nstudents):
+        '''
+        Given the score matrix of nstudents students (as built by score_matrix), return a NumPy
+        array of their final percentages: the 'percent' grade() returns for each of their grade
+        sheets, computed for all the students at once.
+        '''
+        raise NotImplementedError
+
 
 class WeightedSubsectionsGrader(CourseGrader):
     """
@@ -193,6 +252,12 @@ class WeightedSubsectionsGrader(CourseGrader):
                 'section_breakdown': section_breakdown,
                 'grade_breakdown': grade_breakdown}
 
+    def grade_matrix(self, matrix, nstudents):
+        total_percent = np.zeros(nstudents)
+        for subgrader, category, weight in self.sections:
+            total_percent += subgrader.grade_matrix(matrix, nstudents) * weight
+        return total_percent
+
 
 class SingleSectionGrader(CourseGrader):
     """
@@ -241,6 +306,12 @@ class SingleSectionGrader(CourseGrader):
                 #No grade_breakdown here
                 }
 
+    def grade_matrix(self, matrix, nstudents):
+        names, percents = matrix.get(self.type, ([], None))
+        if self.name not in names:
+            return np.zeros(nstudents)
+        return np.nan_to_num(percents[:, names.index(self.name)])
+
 
 class AssignmentFormatGrader(CourseGrader):
     """
@@ -372,3 +443,36 @@ class AssignmentFormatGrader(CourseGrader):
                 'section_breakdown': breakdown,
                 #No grade_breakdown here
                 }
+
+    def grade_matrix(self, matrix, nstudents):
+        _, percents = matrix.get(self.type, ([], np.zeros((nstudents, 0))))
+
+        # Each student gets as many sections as their grade sheet has, with placeholder
+        # scores of 0 up to min_count; the rest of their row is left out
+        present = (~np.isnan(percents)).sum(axis=1)
+        nsections = np.maximum(self.min_count, present)
+        width = max(self.min_count, percents.shape[1])
+        in_breakdown = np.arange(width)[np.newaxis, :] < nsections[:, np.newaxis]
+        breakdown = np.zeros((nstudents, width))
+        breakdown[:, :percents.shape[1]] = np.nan_to_num(percents)
+
+        # Drop the lowest drop_count scores of each student, breaking ties as grade() does
+        # (a stable sort by descending percentage, dropping the last ones)
+        kept = in_breakdown.copy()
+        if self.drop_count > 0 and width > 0:
+            sort_key = np.where(in_breakdown, -breakdown, -np.inf)
+            by_percent = np.argsort(sort_key, axis=1, kind='mergesort')
+            dropped = by_percent[:, -min(self.drop_count, width):]
+            kept[np.arange(nstudents)[:, np.newaxis], dropped] = False
+
+        # Add up the kept scores section by section, in the same order as grade()
+        total_percent = np.zeros(nstudents)
+        for index in range(width):
+            total_percent += np.where(kept[:, index], breakdown[:, index], 0)
+
+        counted = nsections - self.drop_count
+        total_percent[counted > 0] /= counted[counted > 0]
+        # grade() drops everything when there are no more sections than drop_count
+        total_percent[counted <= 0] = 0
+
+        return total_percent
@@ -1,4 +1,5 @@
 import copy
+import hashlib
 from fs.errors import ResourceNotFoundError
 import logging
 import os
@@ -36,6 +37,12 @@ class HtmlModule(HtmlFields, XModule):
             return self.data.replace("%%USER_ID%%", self.system.anonymous_student_id)
         return self.data
 
+    def html_cache_key(self):
+        # the student id substitution makes the html differ between students
+        if "%%USER_ID%%" in self.data:
+            return None
+        return hashlib.md5(u'{0}|{1}'.format(self.display_name, self.data).encode('utf-8')).hexdigest()
+
 
 class HtmlDescriptor(HtmlFields, XmlDescriptor, EditingDescriptor):
     """
@@ -8,7 +8,7 @@ import re
 
 from collections import namedtuple
 
-from .exceptions import InvalidLocationError, InsufficientSpecificationError
+from .exceptions import InvalidLocationError, InsufficientSpecificationError, ItemNotFoundError
 from xmodule.errortracker import make_error_tracker
 from bson.son import SON
 
@@ -283,6 +283,17 @@ class ModuleStore(object):
         """
         raise NotImplementedError
 
+    def get_instances(self, course_id, locations, depth=0):
+        """
+        Get instances of all of locations at once, with policy for course_id applied.
+
+        Returns a dict mapping the Location (without revision) of each of locations
+        which exists to its instance. Locations which aren't found are left out.
+
+        depth: as for get_instance
+        """
+        raise NotImplementedError
+
     def get_item_errors(self, location):
         """
         Return a list of (msg, exception-or-None) errors that the modulestore
@@ -431,6 +442,17 @@ class ModuleStoreBase(ModuleStore):
         errorlog = self._get_errorlog(location)
         return errorlog.errors
 
+    def get_instances(self, course_id, locations, depth=0):
+        """Default impl--one get_instance per location"""
+        instances = {}
+        for location in locations:
+            try:
+                instance = self.get_instance(course_id, location, depth=depth)
+            except ItemNotFoundError:
+                continue
+            instances[instance.location.replace(revision=None)] = instance
+        return instances
+
     def get_course(self, course_id):
         """Default impl--linear search through course list"""
         for c in self.get_courses():
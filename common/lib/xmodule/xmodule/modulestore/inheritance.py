@@ -1,3 +1,5 @@
+from collections import Mapping
+
 from xblock.core import Scope
 
 # A list of metadata that this module can inherit from its parent module
@@ -49,6 +51,41 @@ def inherit_metadata(descriptor, model_data):
                 descriptor._model_data[attr] = model_data[attr]
 
 
+class InheritedMetadata(Mapping):
+    """
+    The metadata a descriptor inherits, for use as its _inherited_metadata in
+    place of the dict inherit_metadata builds: the entries of inheritable (the
+    inheritable metadata of its parent) whose keys aren't in metadata (the
+    metadata the descriptor was loaded with), or which have been deleted from
+    it since (current_metadata, if given, returns the descriptor's metadata as
+    it is now). Neither dict is copied, so that they can be shared between
+    descriptors.
+    """
+    def __init__(self, metadata, inheritable, current_metadata=None):
+        self._metadata = metadata
+        self._inheritable = inheritable
+        self._current_metadata = current_metadata
+
+    def __getitem__(self, key):
+        if key not in self:
+            raise KeyError(key)
+        return self._inheritable[key]
+
+    def __iter__(self):
+        return (key for key in self._inheritable if key in self)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __contains__(self, key):
+        if key not in INHERITABLE_METADATA or key not in self._inheritable:
+            return False
+        if key not in self._metadata:
+            return True
+        # an override the descriptor was loaded with, which may have been deleted since
+        return self._current_metadata is not None and key not in self._current_metadata()
+
+
 def own_metadata(module):
     """
     Return a dictionary that contains only non-inherited field keys,
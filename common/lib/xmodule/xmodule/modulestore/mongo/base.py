@@ -1,9 +1,8 @@
 import pymongo
 import sys
 import logging
-import copy
 
-from collections import namedtuple
+from collections import namedtuple, OrderedDict
 from fs.osfs import OSFS
 from itertools import repeat
 from path import path
@@ -21,7 +20,7 @@ from xblock.core import Scope
 from xmodule.modulestore import ModuleStoreBase, Location, namedtuple_to_son
 from xmodule.modulestore.exceptions import (ItemNotFoundError,
                          DuplicateItemError)
-from xmodule.modulestore.inheritance import own_metadata, INHERITABLE_METADATA, inherit_metadata
+from xmodule.modulestore.inheritance import own_metadata, INHERITABLE_METADATA, InheritedMetadata
 
 log = logging.getLogger(__name__)
 
@@ -47,12 +46,33 @@ class MongoKeyValueStore(KeyValueStore):
     """
     A KeyValueStore that maps keyed data access to one of the 3 data areas
     known to the MongoModuleStore (data, children, and metadata)
+
+    data and metadata are shared with the module data they were loaded from, so
+    they are copied the first time they are written to rather than modified.
+    Settings which aren't in metadata are looked up in inherited, the
+    inheritable metadata of the parent, which is shared between all the
+    descriptors inheriting from it and is never modified.
     """
-    def __init__(self, data, children, metadata, location):
+    __slots__ = ('_data', '_children', '_metadata', '_inherited', '_location', '_copied')
+
+    def __init__(self, data, children, metadata, location, inherited=None):
         self._data = data
         self._children = children
         self._metadata = metadata
+        self._inherited = inherited if inherited is not None else {}
         self._location = location
+        # the names of the shared dicts (_data, _metadata) which have been copied
+        self._copied = ()
+
+    def _writable(self, name):
+        """
+        Return the dict in attribute name, after replacing it with a copy of itself
+        if it is still shared
+        """
+        if name not in self._copied:
+            setattr(self, name, dict(getattr(self, name)))
+            self._copied += (name,)
+        return getattr(self, name)
 
     def get(self, key):
         if key.scope == Scope.children:
@@ -60,7 +80,9 @@ class MongoKeyValueStore(KeyValueStore):
         elif key.scope == Scope.parent:
             return None
         elif key.scope == Scope.settings:
-            return self._metadata[key.field_name]
+            if key.field_name in self._metadata:
+                return self._metadata[key.field_name]
+            return self._inherited[key.field_name]
         elif key.scope == Scope.content:
             if key.field_name == 'location':
                 return self._location
@@ -75,14 +97,14 @@ class MongoKeyValueStore(KeyValueStore):
         if key.scope == Scope.children:
             self._children = value
         elif key.scope == Scope.settings:
-            self._metadata[key.field_name] = value
+            self._writable('_metadata')[key.field_name] = value
         elif key.scope == Scope.content:
             if key.field_name == 'location':
                 self._location = value
             elif key.field_name == 'data' and not isinstance(self._data, dict):
                 self._data = value
             else:
-                self._data[key.field_name] = value
+                self._writable('_data')[key.field_name] = value
         else:
             raise InvalidScopeError(key.scope)
 
@@ -91,22 +113,29 @@ class MongoKeyValueStore(KeyValueStore):
             self._children = []
         elif key.scope == Scope.settings:
             if key.field_name in self._metadata:
-                del self._metadata[key.field_name]
+                del self._writable('_metadata')[key.field_name]
         elif key.scope == Scope.content:
             if key.field_name == 'location':
                 self._location = Location(None)
             elif key.field_name == 'data' and not isinstance(self._data, dict):
                 self._data = None
             else:
-                del self._data[key.field_name]
+                del self._writable('_data')[key.field_name]
         else:
             raise InvalidScopeError(key.scope)
 
+    def current_metadata(self):
+        """
+        The metadata set on the module, which is a copy of the metadata it was
+        loaded with once that has been written to
+        """
+        return self._metadata
+
     def has(self, key):
         if key.scope in (Scope.children, Scope.parent):
             return True
         elif key.scope == Scope.settings:
-            return key.field_name in self._metadata
+            return key.field_name in self._metadata or key.field_name in self._inherited
         elif key.scope == Scope.content:
             if key.field_name == 'location':
                 return True
@@ -182,21 +211,27 @@ class CachingDescriptorSystem(MakoDescriptorSystem):
                         metadata[new_name] = metadata[old_name]
                         del metadata[old_name]
 
+                metadata_to_inherit = {}
+                if self.cached_metadata is not None:
+                    # parent container pointers don't differentiate between draft and non-draft
+                    # so when we do the lookup, we should do so with a non-draft location
+                    non_draft_loc = location.replace(revision=None)
+                    metadata_to_inherit = self.cached_metadata.get(non_draft_loc.url(), {})
+
+                # the inherited metadata is shared with the siblings of the module rather than
+                # copied into it (see MongoKeyValueStore)
                 kvs = MongoKeyValueStore(
                     definition.get('data', {}),
                     definition.get('children', []),
                     metadata,
                     location,
+                    metadata_to_inherit,
                 )
 
                 model_data = DbModel(kvs, class_, None, MongoUsage(self.course_id, location))
                 module = class_(self, model_data)
-                if self.cached_metadata is not None:
-                    # parent container pointers don't differentiate between draft and non-draft
-                    # so when we do the lookup, we should do so with a non-draft location
-                    non_draft_loc = location.replace(revision=None)
-                    metadata_to_inherit = self.cached_metadata.get(non_draft_loc.url(), {})
-                    inherit_metadata(module, metadata_to_inherit)
+                module._inheritable_metadata = metadata_to_inherit
+                module._inherited_metadata = InheritedMetadata(metadata, metadata_to_inherit, kvs.current_metadata)
                 return module
             except:
                 log.warning("Failed to load descriptor", exc_info=True)
@@ -337,7 +372,8 @@ class MongoModuleStore(ModuleStoreBase):
             # in the result set. Remember results will not contain leaf nodes
             for child in results_by_url[url].get('definition', {}).get('children', []):
                 if child in results_by_url:
-                    new_child_metadata = copy.deepcopy(my_metadata)
+                    # the metadata values are only ever read, so they can be shared
+                    new_child_metadata = dict(my_metadata)
                     new_child_metadata.update(results_by_url[child].get('metadata', {}))
                     results_by_url[child]['metadata'] = new_child_metadata
                     metadata_to_inherit[child] = new_child_metadata
@@ -394,10 +430,49 @@ class MongoModuleStore(ModuleStoreBase):
         Refresh the cached metadata inheritance tree for the org/course combination
         for location
         """
+        # the course has been edited, so its cached summaries are stale
+        if self.metadata_inheritance_cache_subsystem is not None:
+            self._course_edit_version(location, reset=True)
+
         pseudo_course_id = '/'.join([location.org, location.course])
         if pseudo_course_id not in self.ignore_write_events_on_courses:
             self.get_cached_metadata_inheritance_tree(location, force_refresh=True)
 
+    def _course_edit_version(self, location, reset=False):
+        """
+        Return the current edit version of the org/course combination for location,
+        which the cached summaries of its courses are keyed by. With reset, start a
+        new version.
+        """
+        key = u'course_edit_version/{0}/{1}'.format(location.org, location.course)
+        version = None if reset else self.metadata_inheritance_cache_subsystem.get(key)
+        if version is None:
+            version = uuid4().hex
+            self.metadata_inheritance_cache_subsystem.set(key, version)
+        return version
+
+    def _course_summary_key(self, course_location, name):
+        return u'course_summary/{0}/{1}/{2}/{3}/{4}'.format(
+            name, course_location.org, course_location.course, course_location.name,
+            self._course_edit_version(course_location)
+        )
+
+    def get_cached_course_summary(self, course_location, name):
+        """
+        Return the summary called name (eg CourseDescriptor.grading_context_summary)
+        cached for the course at course_location since it was last edited, or None
+        """
+        if self.metadata_inheritance_cache_subsystem is None:
+            return None
+        return self.metadata_inheritance_cache_subsystem.get(self._course_summary_key(course_location, name))
+
+    def set_cached_course_summary(self, course_location, name, summary):
+        """
+        Cache the summary called name of the course at course_location, until it is next edited
+        """
+        if self.metadata_inheritance_cache_subsystem is not None:
+            self.metadata_inheritance_cache_subsystem.set(self._course_summary_key(course_location, name), summary)
+
     def _clean_item_data(self, item):
         """
         Renames the '_id' field in item to 'location'
@@ -559,6 +634,17 @@ class MongoModuleStore(ModuleStoreBase):
         """
         return self.get_item(location, depth=depth)
 
+    def get_instances(self, course_id, locations, depth=0):
+        """
+        Get instances of all of locations, fetched in a single query (see
+        ModuleStore.get_instances).
+        """
+        locations = [Location.ensure_fully_specified(location) for location in locations]
+        if not locations:
+            return {}
+        items = self._query_children_for_cache_children(locations)
+        return dict((module.location, module) for module in self._load_items(items, depth))
+
     def get_items(self, location, course_id=None, depth=0):
         items = self.collection.find(
             location_to_query(location),
@@ -719,6 +805,56 @@ class MongoModuleStore(ModuleStoreBase):
         self.refresh_cached_metadata_inheritance_tree(loc)
         self.fire_updated_modulestore_signal(get_course_id_no_run(Location(location)), Location(location))
 
+    def bulk_write_items(self, items):
+        """
+        Write a batch of items in two round-trips, rather than the three updates per
+        item that update_item/update_children/update_metadata would issue. Any existing
+        documents at the given locations are replaced.
+
+        items: a list of (location, data, children, metadata) tuples
+        """
+        if not items:
+            return
+
+        # a location written twice in a batch is written once, with its latest values
+        latest = OrderedDict()
+        for location, data, children, metadata in items:
+            latest[Location(location)] = (data, children, metadata)
+
+        documents = []
+        course_locations = {}
+        static_tabs = {}
+        for location, (data, children, metadata) in latest.iteritems():
+            documents.append({
+                '_id': namedtuple_to_son(location),
+                'definition': {'data': data, 'children': children or []},
+                'metadata': metadata,
+            })
+            course_locations[get_course_id_no_run(location)] = location
+            if location.category == 'static_tab':
+                static_tabs.setdefault(get_course_id_no_run(location), {})[location.name] = (location, metadata)
+
+        # Must include this to avoid the django debug toolbar (which defines the deprecated "safe=False")
+        # from overriding our default value set in the init method.
+        self.collection.remove({'_id': {'$in': [doc['_id'] for doc in documents]}}, safe=self.collection.safe)
+        self.collection.insert(documents, safe=self.collection.safe)
+
+        # VS[compat] the names of static tabs are also kept in the course's tabs, as update_metadata does
+        for tabs in static_tabs.itervalues():
+            location, _ = tabs.itervalues().next()
+            course = self.get_course_for_item(location)
+            existing_tabs = course.tabs or []
+            for tab in existing_tabs:
+                if tab.get('url_slug') in tabs:
+                    tab['name'] = tabs[tab['url_slug']][1].get('display_name')
+            course.tabs = existing_tabs
+            self.update_metadata(course.location, own_metadata(course))
+
+        # recompute (and update) the metadata inheritance tree once per course rather than once per item
+        for course_id, location in course_locations.iteritems():
+            self.refresh_cached_metadata_inheritance_tree(location)
+            self.fire_updated_modulestore_signal(course_id, location)
+
     def delete_item(self, location, delete_all_versions=False):
         """
         Delete an item from this modulestore
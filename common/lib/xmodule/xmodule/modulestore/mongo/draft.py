@@ -84,6 +84,31 @@ class DraftModuleStore(MongoModuleStore):
         except ItemNotFoundError:
             return wrap_draft(super(DraftModuleStore, self).get_instance(course_id, location, depth=depth))
 
+    def get_instances(self, course_id, locations, depth=0):
+        """
+        Get instances of all of locations, with their drafts in place of the
+        published versions when there are drafts (see ModuleStore.get_instances).
+        The drafts and published versions are fetched in a single query.
+        """
+        locations = [Location.ensure_fully_specified(location) for location in locations]
+        if not locations:
+            return {}
+
+        query = {'_id': {'$in': [
+            namedtuple_to_son(version)
+            for location in locations
+            for version in (as_draft(location), as_published(location))
+        ]}}
+        items = {}
+        for item in self.collection.find(query):
+            location = Location(item['_id'])
+            published = as_published(location)
+            if location.revision == DRAFT or published not in items:
+                items[published] = item
+
+        modules = self._load_items(items.values(), depth)
+        return dict((module.location, module) for module in (wrap_draft(item) for item in modules))
+
     def get_items(self, location, course_id=None, depth=0):
         """
         Returns a list of XModuleDescriptor instances for the items
@@ -173,6 +198,18 @@ class DraftModuleStore(MongoModuleStore):
 
         return super(DraftModuleStore, self).update_metadata(draft_loc, metadata)
 
+    def bulk_write_items(self, items):
+        """
+        Write a batch of (location, data, children, metadata) tuples. Each item goes
+        through the per-item update methods so that the draft cloning semantics above
+        still apply.
+        """
+        for location, data, children, metadata in items:
+            self.update_item(location, data, allow_not_found=True)
+            if children:
+                self.update_children(location, children)
+            self.update_metadata(location, metadata)
+
     def delete_item(self, location, delete_all_versions=False):
         """
         Delete an item from this modulestore
@@ -8,6 +8,9 @@ from xblock.runtime import KeyValueStore, InvalidScopeError
 
 from xmodule.modulestore import Location
 from xmodule.modulestore.mongo import MongoModuleStore, MongoKeyValueStore
+from xmodule.modulestore.inheritance import InheritedMetadata, own_metadata
+from xmodule.modulestore.mongo.base import location_to_query
+from xmodule.modulestore.mongo.draft import DraftModuleStore
 from xmodule.modulestore.xml_importer import import_from_xml
 from xmodule.templates import update_templates
 
@@ -107,6 +110,39 @@ class TestMongoModuleStore(object):
             self.store._find_one(Location("i4x://edX/toy/video/Welcome")),
             None)
 
+    def test_get_instances(self):
+        welcome = Location("i4x://edX/toy/video/Welcome")
+        course = Location("i4x://edX/toy/course/2012_Fall")
+        instances = self.store.get_instances(
+            'edX/toy/2012_Fall', [welcome, course.url(), "i4x://edX/toy/video/Missing"])
+        assert_equals(set(instances), set([welcome, course]))
+        assert_equals(instances[welcome].location, welcome)
+        assert_equals(self.store.get_instances('edX/toy/2012_Fall', []), {})
+
+    def test_draft_get_instances(self):
+        '''Make sure get_instances on a draft store returns drafts in place of the published versions'''
+        draft_store = DraftModuleStore(HOST, DB, COLLECTION, FS_ROOT, RENDER_TEMPLATE,
+            default_class=DEFAULT_CLASS)
+        welcome = Location("i4x://edX/toy/video/Welcome")
+        resources = Location("i4x://edX/toy/video/Video_Resources")
+        unpublished = Location("i4x://edX/toy/video/Unpublished")
+        display_name = draft_store.get_item(welcome).display_name
+
+        draft_store.update_metadata(welcome, {'display_name': 'Draft welcome'})
+        draft_store.clone_item(resources, unpublished)
+        try:
+            instances = draft_store.get_instances('edX/toy/2012_Fall', [welcome, resources, unpublished])
+            assert_equals(set(instances), set([welcome, resources, unpublished]))
+            assert_equals(instances[welcome].display_name, 'Draft welcome')
+            assert_equals(instances[welcome].location, welcome)
+            assert_equals(instances[welcome].is_draft, True)
+            assert_equals(instances[resources].is_draft, False)
+            assert_equals(instances[unpublished].is_draft, True)
+        finally:
+            draft_store.delete_item(welcome)
+            draft_store.delete_item(unpublished)
+        assert_equals(draft_store.get_item(welcome).display_name, display_name)
+
     def test_path_to_location(self):
         '''Make sure that path_to_location works'''
         check_path_to_location(self.store)
@@ -119,6 +155,53 @@ class TestMongoModuleStore(object):
                 '{0} is a template course'.format(course)
             )
 
+    def test_bulk_write_items(self):
+        '''Make sure a batch written with bulk_write_items reads back like per-item updates'''
+        locations = [Location('i4x://edX/bulk/html/item_{0}'.format(i)) for i in range(3)]
+        self.store.bulk_write_items([
+            (location, '<p>{0}</p>'.format(location.name), [], {'display_name': location.name})
+            for location in locations
+        ])
+        # writing the same locations again replaces rather than duplicates them
+        self.store.bulk_write_items([(locations[0], '<p>replaced</p>', [], {})])
+
+        for location in locations:
+            assert_equals(self.connection[DB][COLLECTION].find(location_to_query(location, wildcard=False)).count(), 1)
+        assert_equals(self.store.get_item(locations[0]).data, '<p>replaced</p>')
+        assert_equals(self.store.get_item(locations[1]).display_name, 'item_1')
+
+    def test_bulk_write_items_repeated_location(self):
+        '''Make sure a location written twice in one batch is written once, with its latest values'''
+        location = Location('i4x://edX/bulk/html/repeated')
+        self.store.bulk_write_items([(location, '<p>first</p>', [], {}), (location, '<p>second</p>', [], {})])
+        assert_equals(self.connection[DB][COLLECTION].find(location_to_query(location, wildcard=False)).count(), 1)
+        assert_equals(self.store.get_item(location).data, '<p>second</p>')
+
+    def test_bulk_write_items_static_tab(self):
+        '''Make sure bulk written static tabs keep their names in the course's tabs'''
+        course = Location('i4x://edX/bulktabs/course/2013')
+        tab = Location('i4x://edX/bulktabs/static_tab/syllabus')
+        self.store.bulk_write_items([
+            (course, {}, [], {'tabs': [{'type': 'static_tab', 'name': 'Old', 'url_slug': 'syllabus'}]}),
+        ])
+        self.store.bulk_write_items([(tab, '<p>syllabus</p>', [], {'display_name': 'Syllabus'})])
+        assert_equals(self.store.get_item(course).tabs,
+                      [{'type': 'static_tab', 'name': 'Syllabus', 'url_slug': 'syllabus'}])
+
+    def test_own_metadata_after_deleting_inherited_override(self):
+        '''Make sure deleting the override of an inherited setting makes it inherited again'''
+        location = Location('i4x://edX/toy/video/Welcome')
+        metadata = own_metadata(self.store.get_item(location))
+        self.store.update_metadata(location, dict(metadata, graded=False))
+
+        item = self.store.get_item(location)
+        assert_equals(own_metadata(item)['graded'], False)
+        del item._model_data['graded']
+        assert_false('graded' in own_metadata(item))
+
+        self.store.update_metadata(location, metadata)
+
+
 class TestMongoKeyValueStore(object):
 
     def setUp(self):
@@ -139,6 +222,25 @@ class TestMongoKeyValueStore(object):
         assert_equals(self.metadata['meta'], self.kvs.get(KeyValueStore.Key(Scope.settings, None, None, 'meta')))
         assert_equals(None, self.kvs.get(KeyValueStore.Key(Scope.parent, None, None, 'parent')))
 
+    def test_read_inherited(self):
+        kvs = MongoKeyValueStore(self.data, self.children, self.metadata, self.location,
+                                 {'graded': True, 'meta': 'inherited_val'})
+        key = KeyValueStore.Key(Scope.settings, None, None, 'graded')
+        assert_equals(True, kvs.get(key))
+        assert kvs.has(key)
+        assert_equals('meta_val', kvs.get(KeyValueStore.Key(Scope.settings, None, None, 'meta')))
+
+    def test_inherited_metadata(self):
+        inherited = InheritedMetadata(self.metadata, {'graded': True, 'meta': 'inherited_val'})
+        assert_equals({'graded': True}, dict(inherited))
+
+    def test_inherited_metadata_after_deleting_override(self):
+        kvs = MongoKeyValueStore(self.data, self.children, {'graded': False}, self.location, {'graded': True})
+        inherited = InheritedMetadata(kvs.current_metadata(), {'graded': True}, kvs.current_metadata)
+        assert_equals({}, dict(inherited))
+        kvs.delete(KeyValueStore.Key(Scope.settings, None, None, 'graded'))
+        assert_equals({'graded': True}, dict(inherited))
+
     def test_read_invalid_scope(self):
         for scope in (Scope.preferences, Scope.user_info, Scope.user_state):
             key = KeyValueStore.Key(scope, None, None, 'foo')
@@ -160,6 +262,13 @@ class TestMongoKeyValueStore(object):
         yield (self._check_write, KeyValueStore.Key(Scope.children, None, None, 'children'), [])
         yield (self._check_write, KeyValueStore.Key(Scope.settings, None, None, 'meta'), 'new_settings')
 
+    def test_write_copies_shared_data(self):
+        self.kvs.set(KeyValueStore.Key(Scope.content, None, None, 'foo'), 'new_data')
+        self.kvs.set(KeyValueStore.Key(Scope.settings, None, None, 'meta'), 'new_settings')
+        self.kvs.delete(KeyValueStore.Key(Scope.settings, None, None, 'meta'))
+        assert_equals({'foo': 'foo_value'}, self.data)
+        assert_equals({'meta': 'meta_val'}, self.metadata)
+
     def test_write_non_dict_data(self):
         self.kvs._data = 'xml_data'
         self._check_write(KeyValueStore.Key(Scope.content, None, None, 'data'), 'new_data')
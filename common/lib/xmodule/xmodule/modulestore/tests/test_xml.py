@@ -1,4 +1,5 @@
 import os.path
+import threading
 
 from xmodule.course_module import CourseDescriptor
 from xmodule.modulestore.xml import XMLModuleStore
@@ -37,3 +38,55 @@ class TestXMLModuleStore(object):
         location = CourseDescriptor.id_to_location("edX/full/6.002_Spring_2012")
         errors = modulestore.get_item_errors(location)
         assert errors == []
+
+    def test_lazy_course_loading(self):
+        """Make sure a lazy store only loads a course when it is asked for"""
+        modulestore = XMLModuleStore(DATA_DIR, course_dirs=['toy', 'simple'], lazy=True)
+        assert modulestore.courses == {}
+
+        course = modulestore.get_instance('edX/toy/2012_Fall', CourseDescriptor.id_to_location('edX/toy/2012_Fall'))
+        assert course.id == 'edX/toy/2012_Fall'
+        assert modulestore.courses.keys() == ['toy']
+        assert 'toy' in modulestore.course_load_times
+
+        assert len(modulestore.get_courses()) == 2
+        check_path_to_location(modulestore)
+
+    def test_lazy_course_loading_across_threads(self):
+        """Make sure a course being loaded is waited for by other threads, and only by them"""
+        modulestore = XMLModuleStore(DATA_DIR, course_dirs=['toy', 'simple'], lazy=True)
+        loading = threading.Event()
+        release = threading.Event()
+        load_course = modulestore.load_course
+        loads = []
+
+        def slow_load_course(course_dir, tracker):
+            loads.append(course_dir)
+            if course_dir == 'toy':
+                loading.set()
+                release.wait()
+            return load_course(course_dir, tracker)
+        modulestore.load_course = slow_load_course
+
+        courses = {}
+
+        def get_toy(name):
+            courses[name] = modulestore.get_instance('edX/toy/2012_Fall',
+                                                     CourseDescriptor.id_to_location('edX/toy/2012_Fall'))
+
+        threads = [threading.Thread(target=get_toy, args=(name,)) for name in ('first', 'second')]
+        threads[0].start()
+        loading.wait()
+        threads[1].start()
+        threads[1].join(0.2)
+        assert threads[1].is_alive()
+
+        # another course isn't held up by the load
+        simple = modulestore.get_instance('edX/simple/2012_Fall', CourseDescriptor.id_to_location('edX/simple/2012_Fall'))
+        assert simple.id == 'edX/simple/2012_Fall'
+
+        release.set()
+        for thread in threads:
+            thread.join()
+        assert courses['first'].id == courses['second'].id == 'edX/toy/2012_Fall'
+        assert loads.count('toy') == 1
@@ -5,6 +5,8 @@ import os
 import re
 import sys
 import glob
+import threading
+import time
 
 from collections import defaultdict
 from cStringIO import StringIO
@@ -253,7 +255,7 @@ class XMLModuleStore(ModuleStoreBase):
     """
     An XML backed ModuleStore
     """
-    def __init__(self, data_dir, default_class=None, course_dirs=None, load_error_modules=True):
+    def __init__(self, data_dir, default_class=None, course_dirs=None, load_error_modules=True, lazy=False):
         """
         Initialize an XMLModuleStore from data_dir
 
@@ -264,6 +266,10 @@ class XMLModuleStore(ModuleStoreBase):
 
         course_dirs: If specified, the list of course_dirs to load. Otherwise,
             load all course dirs
+
+        lazy: If True, only the root of each course.xml is read here, and each course
+            is loaded the first time it is asked for through the modulestore API. Code
+            that reads self.modules or self.courses directly should not use a lazy store.
         """
         ModuleStoreBase.__init__(self)
 
@@ -271,6 +277,12 @@ class XMLModuleStore(ModuleStoreBase):
         self.modules = defaultdict(dict)  # course_id -> dict(location -> XModuleDescriptor)
         self.courses = {}  # course_dir -> XModuleDescriptor for the course
         self.errored_courses = {}  # course_dir -> errorlog, for dirs that failed to load
+        self.course_load_times = {}  # course_dir -> seconds it took to load
+
+        # course_id -> course_dir, for courses which haven't finished loading yet
+        self._lazy_course_dirs = {}
+        self._load_locks = {}  # course_id -> lock held while the course loads
+        self._loading = set()  # course_ids being loaded, for loads which ask for their own course
 
         self.load_error_modules = load_error_modules
 
@@ -292,12 +304,70 @@ class XMLModuleStore(ModuleStoreBase):
             course_dirs = sorted([d for d in os.listdir(self.data_dir) if
                                   os.path.exists(self.data_dir / d / "course.xml")])
         for course_dir in course_dirs:
+            if lazy:
+                self._register_lazy_course(course_dir)
+            else:
+                self.try_load_course(course_dir)
+
+    def _register_lazy_course(self, course_dir):
+        """
+        Work out the course id for course_dir from the root of its course.xml, and
+        remember to load it when that course is first asked for. Courses whose id
+        can't be worked out cheaply are loaded right away, so errors get reported.
+        """
+        try:
+            course_data = self._read_course_xml(course_dir)
+            url_name = course_data.get('url_name', course_data.get('slug'))
+        except Exception:
+            url_name = None
+
+        if not url_name:
             self.try_load_course(course_dir)
+            return
+
+        course_id = CourseDescriptor.make_id(
+            course_data.get('org', 'edx'),
+            course_data.get('course', course_dir),
+            url_name
+        )
+        self._load_locks[course_id] = threading.RLock()
+        self._lazy_course_dirs[course_id] = course_dir
+
+    def _ensure_loaded(self, course_id=None):
+        """
+        Load the lazily registered course with id course_id, or all of the
+        remaining lazily registered courses if course_id is None. Returns once
+        they are loaded, whichever thread loads them.
+        """
+        # courses are only dropped from _lazy_course_dirs once they have loaded
+        if not self._lazy_course_dirs:
+            return
+
+        if course_id is None:
+            course_ids = sorted(self._lazy_course_dirs.keys(), key=self._lazy_course_dirs.get)
+        else:
+            course_ids = [course_id]
+
+        for course_id in course_ids:
+            lock = self._load_locks.get(course_id)
+            if lock is None:
+                continue
+            with lock:
+                course_dir = self._lazy_course_dirs.get(course_id)
+                if course_dir is None or course_id in self._loading:
+                    continue
+                self._loading.add(course_id)
+                try:
+                    self.try_load_course(course_dir)
+                finally:
+                    del self._lazy_course_dirs[course_id]
+                    self._loading.discard(course_id)
 
     def try_load_course(self, course_dir):
         '''
         Load a course, keeping track of errors as we go along.
         '''
+        start = time.time()
         # Special-case code here, since we don't have a location for the
         # course before it loads.
         # So, make a tracker to track load-time errors, then put in the right
@@ -319,6 +389,9 @@ class XMLModuleStore(ModuleStoreBase):
             # Didn't load course.  Instead, save the errors elsewhere.
             self.errored_courses[course_dir] = errorlog
 
+        self.course_load_times[course_dir] = time.time() - start
+        log.info('Loaded course {0} in {1:.2f}s'.format(course_dir, self.course_load_times[course_dir]))
+
     def __unicode__(self):
         '''
         String representation - for debugging
@@ -344,15 +417,10 @@ class XMLModuleStore(ModuleStoreBase):
             log.warning(msg + " " + str(err))
         return {}
 
-    def load_course(self, course_dir, tracker):
+    def _read_course_xml(self, course_dir):
         """
-        Load a course into this module store
-        course_path: Course directory name
-
-        returns a CourseDescriptor for the course
+        Parse course_dir/course.xml and return its root element
         """
-        log.debug('========> Starting course import from {0}'.format(course_dir))
-
         with open(self.data_dir / course_dir / "course.xml") as course_file:
 
             # VS[compat]
@@ -360,90 +428,101 @@ class XMLModuleStore(ModuleStoreBase):
             # been imported into the cms from xml
             course_file = StringIO(clean_out_mako_templating(course_file.read()))
 
-            course_data = etree.parse(course_file, parser=edx_xml_parser).getroot()
+            return etree.parse(course_file, parser=edx_xml_parser).getroot()
 
-            org = course_data.get('org')
+    def load_course(self, course_dir, tracker):
+        """
+        Load a course into this module store
+        course_path: Course directory name
 
-            if org is None:
-                msg = ("No 'org' attribute set for course in {dir}. "
-                       "Using default 'edx'".format(dir=course_dir))
-                log.warning(msg)
-                tracker(msg)
-                org = 'edx'
+        returns a CourseDescriptor for the course
+        """
+        log.debug('========> Starting course import from {0}'.format(course_dir))
 
-            course = course_data.get('course')
+        course_data = self._read_course_xml(course_dir)
 
-            if course is None:
-                msg = ("No 'course' attribute set for course in {dir}."
-                       " Using default '{default}'".format(dir=course_dir,
-                                                           default=course_dir
-                                                           )
-                       )
-                log.warning(msg)
-                tracker(msg)
-                course = course_dir
+        org = course_data.get('org')
 
-            url_name = course_data.get('url_name', course_data.get('slug'))
-            policy_dir = None
-            if url_name:
-                policy_dir = self.data_dir / course_dir / 'policies' / url_name
-                policy_path = policy_dir / 'policy.json'
+        if org is None:
+            msg = ("No 'org' attribute set for course in {dir}. "
+                   "Using default 'edx'".format(dir=course_dir))
+            log.warning(msg)
+            tracker(msg)
+            org = 'edx'
+
+        course = course_data.get('course')
 
-                policy = self.load_policy(policy_path, tracker)
+        if course is None:
+            msg = ("No 'course' attribute set for course in {dir}."
+                   " Using default '{default}'".format(dir=course_dir,
+                                                       default=course_dir
+                                                       )
+                   )
+            log.warning(msg)
+            tracker(msg)
+            course = course_dir
+
+        url_name = course_data.get('url_name', course_data.get('slug'))
+        policy_dir = None
+        if url_name:
+            policy_dir = self.data_dir / course_dir / 'policies' / url_name
+            policy_path = policy_dir / 'policy.json'
 
-                # VS[compat]: remove once courses use the policy dirs.
-                if policy == {}:
-                    old_policy_path = self.data_dir / course_dir / 'policies' / '{0}.json'.format(url_name)
-                    policy = self.load_policy(old_policy_path, tracker)
+            policy = self.load_policy(policy_path, tracker)
+
+            # VS[compat]: remove once courses use the policy dirs.
+            if policy == {}:
+                old_policy_path = self.data_dir / course_dir / 'policies' / '{0}.json'.format(url_name)
+                policy = self.load_policy(old_policy_path, tracker)
+        else:
+            policy = {}
+            # VS[compat] : 'name' is deprecated, but support it for now...
+            if course_data.get('name'):
+                url_name = Location.clean(course_data.get('name'))
+                tracker("'name' is deprecated for module xml.  Please use "
+                        "display_name and url_name.")
             else:
-                policy = {}
-                # VS[compat] : 'name' is deprecated, but support it for now...
-                if course_data.get('name'):
-                    url_name = Location.clean(course_data.get('name'))
-                    tracker("'name' is deprecated for module xml.  Please use "
-                            "display_name and url_name.")
-                else:
-                    raise ValueError("Can't load a course without a 'url_name' "
-                                     "(or 'name') set.  Set url_name.")
-
-            course_id = CourseDescriptor.make_id(org, course, url_name)
-            system = ImportSystem(
-                self,
-                course_id,
-                course_dir,
-                policy,
-                tracker,
-                self.parent_trackers[course_id],
-                self.load_error_modules,
-            )
-
-            course_descriptor = system.process_xml(etree.tostring(course_data, encoding='unicode'))
-
-            # If we fail to load the course, then skip the rest of the loading steps
-            if isinstance(course_descriptor, ErrorDescriptor):
-                return course_descriptor
-
-            # NOTE: The descriptors end up loading somewhat bottom up, which
-            # breaks metadata inheritance via get_children().  Instead
-            # (actually, in addition to, for now), we do a final inheritance pass
-            # after we have the course descriptor.
-            compute_inherited_metadata(course_descriptor)
-
-            # now import all pieces of course_info which is expected to be stored
-            # in <content_dir>/info or <content_dir>/info/<url_name>
-            self.load_extra_content(system, course_descriptor, 'course_info', self.data_dir / course_dir / 'info', course_dir, url_name)
-
-            # now import all static tabs which are expected to be stored in
-            # in <content_dir>/tabs or <content_dir>/tabs/<url_name>
-            self.load_extra_content(system, course_descriptor, 'static_tab', self.data_dir / course_dir / 'tabs', course_dir, url_name)
-
-            self.load_extra_content(system, course_descriptor, 'custom_tag_template', self.data_dir / course_dir / 'custom_tags', course_dir, url_name)
-
-            self.load_extra_content(system, course_descriptor, 'about', self.data_dir / course_dir / 'about', course_dir, url_name)
-
-            log.debug('========> Done with course import from {0}'.format(course_dir))
+                raise ValueError("Can't load a course without a 'url_name' "
+                                 "(or 'name') set.  Set url_name.")
+
+        course_id = CourseDescriptor.make_id(org, course, url_name)
+        system = ImportSystem(
+            self,
+            course_id,
+            course_dir,
+            policy,
+            tracker,
+            self.parent_trackers[course_id],
+            self.load_error_modules,
+        )
+
+        course_descriptor = system.process_xml(etree.tostring(course_data, encoding='unicode'))
+
+        # If we fail to load the course, then skip the rest of the loading steps
+        if isinstance(course_descriptor, ErrorDescriptor):
             return course_descriptor
 
+        # NOTE: The descriptors end up loading somewhat bottom up, which
+        # breaks metadata inheritance via get_children().  Instead
+        # (actually, in addition to, for now), we do a final inheritance pass
+        # after we have the course descriptor.
+        compute_inherited_metadata(course_descriptor)
+
+        # now import all pieces of course_info which is expected to be stored
+        # in <content_dir>/info or <content_dir>/info/<url_name>
+        self.load_extra_content(system, course_descriptor, 'course_info', self.data_dir / course_dir / 'info', course_dir, url_name)
+
+        # now import all static tabs which are expected to be stored in
+        # in <content_dir>/tabs or <content_dir>/tabs/<url_name>
+        self.load_extra_content(system, course_descriptor, 'static_tab', self.data_dir / course_dir / 'tabs', course_dir, url_name)
+
+        self.load_extra_content(system, course_descriptor, 'custom_tag_template', self.data_dir / course_dir / 'custom_tags', course_dir, url_name)
+
+        self.load_extra_content(system, course_descriptor, 'about', self.data_dir / course_dir / 'about', course_dir, url_name)
+
+        log.debug('========> Done with course import from {0}'.format(course_dir))
+        return course_descriptor
+
     def load_extra_content(self, system, course_descriptor, category, base_dir, course_dir, url_name):
         self._load_extra_content(system, course_descriptor, category, base_dir, course_dir)
 
@@ -492,6 +571,7 @@ class XMLModuleStore(ModuleStoreBase):
 
         location: Something that can be passed to Location
         """
+        self._ensure_loaded(course_id)
         location = Location(location)
         try:
             return self.modules[course_id][location]
@@ -502,6 +582,7 @@ class XMLModuleStore(ModuleStoreBase):
         """
         Returns True if location exists in this ModuleStore.
         """
+        self._ensure_loaded()
         location = Location(location)
         return any(location in course_modules for course_modules in self.modules.values())
 
@@ -521,6 +602,7 @@ class XMLModuleStore(ModuleStoreBase):
                                   " are unique. Use get_instance.")
 
     def get_items(self, location, course_id=None, depth=0):
+        self._ensure_loaded(course_id)
         items = []
 
         def _add_get_items(self, location, modules):
@@ -543,13 +625,23 @@ class XMLModuleStore(ModuleStoreBase):
         Returns a list of course descriptors.  If there were errors on loading,
         some of these may be ErrorDescriptors instead.
         """
+        self._ensure_loaded()
         return self.courses.values()
 
+    def get_item_errors(self, location):
+        """
+        Return list of errors for this location, if any, loading any lazily
+        registered courses first so that their load errors are included.
+        """
+        self._ensure_loaded()
+        return super(XMLModuleStore, self).get_item_errors(location)
+
     def get_errored_courses(self):
         """
         Return a dictionary of course_dir -> [(msg, exception_str)], for each
         course_dir where course loading failed.
         """
+        self._ensure_loaded()
         return dict((k, self.errored_courses[k].errors) for k in self.errored_courses)
 
     def update_item(self, location, data):
@@ -589,6 +681,7 @@ class XMLModuleStore(ModuleStoreBase):
         returns an iterable of things that can be passed to Location.  This may
         be empty if there are no parents.
         '''
+        self._ensure_loaded(course_id)
         location = Location.ensure_fully_specified(location)
         if not self.parent_trackers[course_id].is_known(location):
             raise ItemNotFoundError("{0} not in {1}".format(location, course_id))
@@ -1,12 +1,17 @@
 import logging
+import hashlib
+import os
 from xmodule.modulestore import Location
 from xmodule.modulestore.inheritance import own_metadata
 from fs.osfs import OSFS
+from fs.memoryfs import MemoryFS
 from json import dumps
 import json
 from json.encoder import JSONEncoder
 import datetime
 
+EXPORT_MANIFEST_FILENAME = '.export_manifest.json'
+
 class EdxJSONEncoder(json.JSONEncoder):
     def default(self, obj):
         if isinstance(obj, Location):
@@ -22,19 +27,100 @@ class EdxJSONEncoder(json.JSONEncoder):
         else:
             return super(EdxJSONEncoder, self).default(obj)
 
-def export_to_xml(modulestore, contentstore, course_location, root_dir, course_dir, draft_modulestore=None):
 
+class ExportManifest(object):
+    """
+    A record of the content hash of every file written by an incremental export, kept
+    in the export directory so that the next export into that directory only has to
+    write the files whose contents have changed (and remove the ones that are gone).
+    """
+    def __init__(self, export_dir):
+        self.export_dir = os.path.abspath(export_dir)
+        self.manifest_path = os.path.join(self.export_dir, EXPORT_MANIFEST_FILENAME)
+        self.previous = {}
+        self.current = {}
+
+        if os.path.exists(self.manifest_path):
+            try:
+                with open(self.manifest_path) as manifest_file:
+                    self.previous = json.load(manifest_file)
+            except ValueError:
+                logging.warning('Ignoring unreadable export manifest {0}'.format(self.manifest_path))
+
+    def _relpath(self, file_path):
+        return os.path.relpath(os.path.abspath(file_path), self.export_dir)
+
+    def is_unchanged(self, file_path, digest):
+        """
+        Record that file_path (inside the export directory) should hold content with
+        the given digest, and return True if it already does from a previous export
+        """
+        relpath = self._relpath(file_path)
+        self.current[relpath] = digest
+        return self.previous.get(relpath) == digest and os.path.exists(file_path)
+
+    def finish(self):
+        """
+        Remove files written by the previous export that this one did not produce,
+        then save the manifest for the next export
+        """
+        for relpath in set(self.previous) - set(self.current):
+            stale_path = os.path.join(self.export_dir, relpath)
+            if os.path.exists(stale_path):
+                os.remove(stale_path)
+
+        with open(self.manifest_path, 'w') as manifest_file:
+            json.dump(self.current, manifest_file)
+        self.previous = self.current
+        self.current = {}
+
+
+def _sync_to_disk(memory_fs, export_dir, manifest):
+    """
+    Write every file in memory_fs out under export_dir, skipping those whose
+    contents match what manifest recorded for the previous export
+    """
+    for file_path in memory_fs.walkfiles():
+        contents = memory_fs.getcontents(file_path)
+        target_path = os.path.join(export_dir, file_path.lstrip('/'))
+        if manifest.is_unchanged(target_path, hashlib.md5(contents).hexdigest()):
+            continue
+
+        target_dir = os.path.dirname(target_path)
+        if not os.path.exists(target_dir):
+            os.makedirs(target_dir)
+        with open(target_path, 'wb') as target_file:
+            target_file.write(contents)
+
+
+def export_to_xml(modulestore, contentstore, course_location, root_dir, course_dir, draft_modulestore=None,
+                  incremental=False):
+    """
+    Export the course at course_location, with its static assets, to root_dir/course_dir.
+
+    If incremental is True, root_dir/course_dir is expected to be reused between exports
+    of the same course: modules are serialized in memory and only files whose content
+    hash differs from the last export's manifest are written, and assets whose md5 is
+    unchanged are not fetched from the contentstore at all.
+    """
     course = modulestore.get_item(course_location)
 
     fs = OSFS(root_dir)
-    export_fs = fs.makeopendir(course_dir)
+    export_dir = os.path.join(root_dir, course_dir)
+    manifest = None
+    if incremental:
+        fs.makedir(course_dir, allow_recreate=True)
+        manifest = ExportManifest(export_dir)
+        export_fs = MemoryFS()
+    else:
+        export_fs = fs.makeopendir(course_dir)
 
     xml = course.export_to_xml(export_fs)
     with export_fs.open('course.xml', 'w') as course_xml:
         course_xml.write(xml)
 
     # export the static assets
-    contentstore.export_all_for_course(course_location, root_dir + '/' + course_dir + '/static/')
+    contentstore.export_all_for_course(course_location, root_dir + '/' + course_dir + '/static/', manifest=manifest)
 
     # export the static tabs
     export_extra_content(export_fs, modulestore, course_location, 'static_tab', 'tabs', '.html')
@@ -79,6 +165,10 @@ def export_to_xml(modulestore, contentstore, course_location, root_dir, course_d
                     draft_vertical.xml_attributes['index_in_children_list'] = str(index)
                     draft_vertical.export_to_xml(draft_course_dir)
 
+    if incremental:
+        _sync_to_disk(export_fs, export_dir, manifest)
+        manifest.finish()
+
 
 def export_extra_content(export_fs, modulestore, course_location, category_type, dirname, file_suffix=''):
     query_loc = Location('i4x', course_location.org, course_location.course, category_type, None)
@@ -1,6 +1,9 @@
 import logging
 import os
 import mimetypes
+import time
+from contextlib import contextmanager
+from multiprocessing.pool import ThreadPool
 from lxml.html import rewrite_links as lxml_rewrite_links
 from path import path
 
@@ -14,51 +17,88 @@ from xmodule.errortracker import make_error_tracker
 
 log = logging.getLogger(__name__)
 
+# the number of modules written to the store per round-trip when importing a course
+IMPORT_WRITE_BATCH_SIZE = 500
 
-def import_static_content(modules, course_loc, course_data_path, static_content_store, target_location_namespace,
-                          subpath='static', verbose=False):
+# the number of concurrent uploads to the contentstore when importing a course's static content
+IMPORT_STATIC_CONTENT_WORKERS = 8
 
-    remap_dict = {}
 
-    # now import all static assets
-    static_dir = course_data_path / subpath
+@contextmanager
+def _timed_stage(timings, stage):
+    """
+    Accumulate the wall clock time spent in the with block into timings[stage]
+    """
+    start = time.time()
+    try:
+        yield
+    finally:
+        timings[stage] = timings.get(stage, 0) + time.time() - start
 
-    verbose = True
 
-    for dirname, dirnames, filenames in os.walk(static_dir):
-        for filename in filenames:
+def _import_static_file(content_path, static_dir, static_content_store, target_location_namespace, verbose=False):
+    """
+    Save a single file from the course's static directory (and its thumbnail) into
+    static_content_store. Returns a (fullname_with_subpath, asset name) pair for the remap dict.
+    """
+    if verbose:
+        log.debug('importing static content {0}...'.format(content_path))
 
-            try:
-                content_path = os.path.join(dirname, filename)
-                if verbose:
-                    log.debug('importing static content {0}...'.format(content_path))
-
-                fullname_with_subpath = content_path.replace(static_dir, '')  # strip away leading path from the name
-                if fullname_with_subpath.startswith('/'):
-                    fullname_with_subpath = fullname_with_subpath[1:]
-                content_loc = StaticContent.compute_location(target_location_namespace.org, target_location_namespace.course, fullname_with_subpath)
-                mime_type = mimetypes.guess_type(filename)[0]
+    filename = os.path.basename(content_path)
+    fullname_with_subpath = content_path.replace(static_dir, '')  # strip away leading path from the name
+    if fullname_with_subpath.startswith('/'):
+        fullname_with_subpath = fullname_with_subpath[1:]
+    content_loc = StaticContent.compute_location(target_location_namespace.org, target_location_namespace.course, fullname_with_subpath)
+    mime_type = mimetypes.guess_type(filename)[0]
 
-                with open(content_path, 'rb') as f:
-                    data = f.read()
+    with open(content_path, 'rb') as f:
+        data = f.read()
 
-                content = StaticContent(content_loc, filename, mime_type, data, import_path=fullname_with_subpath)
+    content = StaticContent(content_loc, filename, mime_type, data, import_path=fullname_with_subpath)
 
-                # first let's save a thumbnail so we can get back a thumbnail location
-                (thumbnail_content, thumbnail_location) = static_content_store.generate_thumbnail(content)
+    # first let's save a thumbnail so we can get back a thumbnail location
+    (thumbnail_content, thumbnail_location) = static_content_store.generate_thumbnail(content)
 
-                if thumbnail_content is not None:
-                    content.thumbnail_location = thumbnail_location
+    if thumbnail_content is not None:
+        content.thumbnail_location = thumbnail_location
 
-                #then commit the content
-                static_content_store.save(content)
+    #then commit the content
+    static_content_store.save(content)
 
-                #store the remapping information which will be needed to subsitute in the module data
-                remap_dict[fullname_with_subpath] = content_loc.name
-            except:
-                raise
+    return fullname_with_subpath, content_loc.name
 
-    return remap_dict
+
+def import_static_content(modules, course_loc, course_data_path, static_content_store, target_location_namespace,
+                          subpath='static', verbose=False, workers=IMPORT_STATIC_CONTENT_WORKERS):
+    """
+    Import every file under course_data_path/subpath into static_content_store. Uploads
+    are spread across `workers` threads since each one is dominated by contentstore I/O.
+    """
+    # now import all static assets
+    static_dir = course_data_path / subpath
+
+    verbose = True
+
+    content_paths = []
+    for dirname, dirnames, filenames in os.walk(static_dir):
+        for filename in filenames:
+            content_paths.append(os.path.join(dirname, filename))
+
+    def _import(content_path):
+        return _import_static_file(content_path, static_dir, static_content_store, target_location_namespace, verbose)
+
+    if workers > 1 and len(content_paths) > 1:
+        pool = ThreadPool(min(workers, len(content_paths)))
+        try:
+            results = pool.map(_import, content_paths)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        results = [_import(content_path) for content_path in content_paths]
+
+    #store the remapping information which will be needed to subsitute in the module data
+    return dict(results)
 
 
 def verify_content_links(module, base_dir, static_content_store, link, remap_dict=None):
@@ -175,7 +215,7 @@ def import_course_from_xml(modulestore, static_content_store, course_data_path,
 def import_from_xml(store, data_dir, course_dirs=None,
                     default_class='xmodule.raw_module.RawDescriptor',
                     load_error_modules=True, static_content_store=None, target_location_namespace=None,
-                    verbose=False, draft_store=None):
+                    verbose=False, draft_store=None, timings=None):
     """
     Import the specified xml data_dir into the "store" modulestore,
     using org and course as the location org and course.
@@ -183,19 +223,25 @@ def import_from_xml(store, data_dir, course_dirs=None,
     course_dirs: If specified, the list of course_dirs to load. Otherwise, load
     all course dirs
 
+    timings: If specified, a dict which is filled in with the seconds spent in each
+    stage of the import ('parse', 'course', 'static', 'modules' and 'drafts')
+
     target_location_namespace is the namespace [passed as Location] (i.e. {tag},{org},{course}) that all modules in the should be remapped to
     after import off disk. We do this remapping as a post-processing step because there's logic in the importing which
     expects a 'url_name' as an identifier to where things are on disk e.g. ../policies/<url_name>/policy.json as well as metadata keys in
     the policy.json. so we need to keep the original url_name during import
 
     """
+    if timings is None:
+        timings = {}
 
-    xml_module_store = XMLModuleStore(
-        data_dir,
-        default_class=default_class,
-        course_dirs=course_dirs,
-        load_error_modules=load_error_modules
-    )
+    with _timed_stage(timings, 'parse'):
+        xml_module_store = XMLModuleStore(
+            data_dir,
+            default_class=default_class,
+            course_dirs=course_dirs,
+            load_error_modules=load_error_modules
+        )
 
     # NOTE: the XmlModuleStore does not implement get_items() which would be a preferable means
     # to enumerate the entire collection of course modules. It will be left as a TBD to implement that
@@ -223,7 +269,10 @@ def import_from_xml(store, data_dir, course_dirs=None,
             # Quick scan to get course module as we need some info from there. Also we need to make sure that the
             # course module is committed first into the store
             for module in xml_module_store.modules[course_id].itervalues():
-                if module.category == 'course':
+                if module.category != 'course':
+                    continue
+
+                with _timed_stage(timings, 'course'):
                     course_data_path = path(data_dir) / module.data_dir
                     course_location = module.location
 
@@ -252,31 +301,36 @@ def import_from_xml(store, data_dir, course_dirs=None,
                 _namespace_rename = target_location_namespace if target_location_namespace is not None else course_location
 
                 # first pass to find everything in /static/
-                import_static_content(xml_module_store.modules[course_id], course_location, course_data_path, static_content_store,
-                                      _namespace_rename, subpath='static', verbose=verbose)
+                with _timed_stage(timings, 'static'):
+                    import_static_content(xml_module_store.modules[course_id], course_location, course_data_path, static_content_store,
+                                          _namespace_rename, subpath='static', verbose=verbose)
 
-            # finally loop through all the modules
-            for module in xml_module_store.modules[course_id].itervalues():
+            # finally loop through all the modules, writing them out in batches
+            with _timed_stage(timings, 'modules'):
+                batch = ModuleImportBatch(store, course_data_path, static_content_store)
+                for module in xml_module_store.modules[course_id].itervalues():
 
-                if module.category == 'course':
-                    # we've already saved the course module up at the top of the loop
-                    # so just skip over it in the inner loop
-                    continue
+                    if module.category == 'course':
+                        # we've already saved the course module up at the top of the loop
+                        # so just skip over it in the inner loop
+                        continue
 
-                # remap module to the new namespace
-                if target_location_namespace is not None:
-                    module = remap_namespace(module, target_location_namespace)
+                    # remap module to the new namespace
+                    if target_location_namespace is not None:
+                        module = remap_namespace(module, target_location_namespace)
 
-                if verbose:
-                    log.debug('importing module location {0}'.format(module.location))
+                    if verbose:
+                        log.debug('importing module location {0}'.format(module.location))
 
-                import_module(module, store, course_data_path, static_content_store)
+                    batch.add(module)
+                batch.flush()
 
             # now import any 'draft' items
             if draft_store is not None:
-                import_course_draft(xml_module_store, store, draft_store, course_data_path,
-                                    static_content_store, target_location_namespace if target_location_namespace is not None
-                                    else course_location)
+                with _timed_stage(timings, 'drafts'):
+                    import_course_draft(xml_module_store, store, draft_store, course_data_path,
+                                        static_content_store, target_location_namespace if target_location_namespace is not None
+                                        else course_location)
 
         finally:
             # turn back on all write signalling
@@ -285,10 +339,19 @@ def import_from_xml(store, data_dir, course_dirs=None,
                 store.refresh_cached_metadata_inheritance_tree(target_location_namespace if
                                                                target_location_namespace is not None else course_location)
 
+    log.info('Imported {0} in {1}'.format(
+        ', '.join(xml_module_store.modules.keys()),
+        ', '.join('{0}={1:.2f}s'.format(stage, seconds) for stage, seconds in sorted(timings.items()))
+    ))
+
     return xml_module_store, course_items
 
 
-def import_module(module, store, course_data_path, static_content_store, allow_not_found=False):
+def _module_content(module, course_data_path, static_content_store):
+    """
+    Returns the content-scoped data to write for module, with any '/static/' links
+    imported into static_content_store and rewritten to point at the imported assets
+    """
     content = {}
     for field in module.fields:
         if field.scope != Scope.content:
@@ -326,6 +389,12 @@ def import_module(module, store, course_data_path, static_content_store, allow_n
     else:
         module_data = content
 
+    return module_data
+
+
+def import_module(module, store, course_data_path, static_content_store, allow_not_found=False):
+    module_data = _module_content(module, course_data_path, static_content_store)
+
     if allow_not_found:
         store.update_item(module.location, module_data, allow_not_found=allow_not_found)
     else:
@@ -339,6 +408,52 @@ def import_module(module, store, course_data_path, static_content_store, allow_n
     store.update_metadata(module.location, dict(own_metadata(module)))
 
 
+class ModuleImportBatch(object):
+    """
+    Collects imported modules and writes them to a store `batch_size` at a time. Stores
+    that implement bulk_write_items get one write per batch; any other store falls
+    back to the same per-item updates that import_module does.
+    """
+    def __init__(self, store, course_data_path, static_content_store, batch_size=IMPORT_WRITE_BATCH_SIZE):
+        self.store = store
+        self.course_data_path = course_data_path
+        self.static_content_store = static_content_store
+        self.batch_size = batch_size
+        self.pending = []
+
+    def add(self, module):
+        """
+        Queue module for writing, flushing the batch if it is full
+        """
+        module_data = _module_content(module, self.course_data_path, self.static_content_store)
+        children = module.children if hasattr(module, 'children') else []
+
+        # NOTE: It's important to use own_metadata here to avoid writing
+        # inherited metadata everywhere.
+        self.pending.append((module.location, module_data, children, dict(own_metadata(module))))
+
+        if len(self.pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """
+        Write all queued modules to the store
+        """
+        if not self.pending:
+            return
+
+        if hasattr(self.store, 'bulk_write_items'):
+            self.store.bulk_write_items(self.pending)
+        else:
+            for location, module_data, children, metadata in self.pending:
+                self.store.update_item(location, module_data)
+                if children:
+                    self.store.update_children(location, children)
+                self.store.update_metadata(location, metadata)
+
+        self.pending = []
+
+
 def import_course_draft(xml_module_store, store, draft_store, course_data_path, static_content_store, target_location_namespace):
     '''
     This will import all the content inside of the 'drafts' folder, if it exists
@@ -45,7 +45,7 @@ class ControllerQueryService(GradingService):
             'last_time_viewed': last_time_viewed,
         }
         log.debug(self.combined_notifications_url)
-        response = self.get(self.combined_notifications_url, params)
+        response = self.cached_get(self.combined_notifications_url, params)
         return response
 
     def get_grading_status_list(self, course_id, student_id):
@@ -1,14 +1,45 @@
 # This class gives a common interface for logging into the grading controller
+import hashlib
 import json
 import logging
+import threading
+import time
 import requests
 from requests.exceptions import RequestException, ConnectionError, HTTPError
+from statsd import statsd
 
 from .combined_open_ended_rubric import CombinedOpenEndedRubric
 from lxml import etree
 
 log = logging.getLogger(__name__)
 
+# keep-alive connections kept open to the grading controller by each shared session
+POOL_SIZE = 10
+
+# seconds the responses of read endpoints are cached for (see GradingService.cached_get)
+RESPONSE_CACHE_TIME = 30
+
+# (url, username) -> the requests session shared by the grading services of the process
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def shared_session(url, username):
+    """
+    The session shared by all the grading services of this process which log into
+    the grading controller at url as username, so that they share its login and its
+    pool of keep-alive connections.
+    """
+    key = (url, username)
+    with _sessions_lock:
+        if key not in _sessions:
+            _sessions[key] = requests.session(config={
+                'keep_alive': True,
+                'pool_connections': POOL_SIZE,
+                'pool_maxsize': POOL_SIZE,
+            })
+        return _sessions[key]
+
 
 class GradingServiceError(Exception):
     pass
@@ -22,7 +53,7 @@ class GradingService(object):
     def __init__(self, config):
         self.username = config['username']
         self.password = config['password']
-        self.session = requests.session()
+        self.session = shared_session(config['url'], self.username)
         self.system = config['system']
 
     def _login(self):
@@ -48,7 +79,7 @@ class GradingService(object):
         try:
             op = lambda: self.session.post(url, data=data,
                                            allow_redirects=allow_redirects)
-            r = self._try_with_login(op)
+            r = self._timed(url, op)
         except (RequestException, ConnectionError, HTTPError) as err:
             # reraise as promised GradingServiceError, but preserve stacktrace.
             #This is a dev_facing_error
@@ -67,7 +98,7 @@ class GradingService(object):
                                       allow_redirects=allow_redirects,
                                       params=params)
         try:
-            r = self._try_with_login(op)
+            r = self._timed(url, op)
         except (RequestException, ConnectionError, HTTPError) as err:
             # reraise as promised GradingServiceError, but preserve stacktrace.
             #This is a dev_facing_error
@@ -77,6 +108,47 @@ class GradingService(object):
 
         return r.text
 
+    def cached_get(self, url, params, cache_timeout=RESPONSE_CACHE_TIME):
+        """
+        Make a get request to the grading controller, reusing its response for
+        cache_timeout seconds (through self.system.cache). Only successful responses
+        are reused. For read endpoints whose responses may be a little out of date.
+        """
+        key = 'grading_service_{0}'.format(
+            hashlib.md5(json.dumps([url, sorted(params.items())], default=unicode)).hexdigest())
+        text = self.system.cache.get(key)
+        if text is not None:
+            statsd.increment('grading_service.cache.hit', tags=[self._endpoint_tag(url)])
+            return text
+
+        statsd.increment('grading_service.cache.miss', tags=[self._endpoint_tag(url)])
+        text = self.get(url, params)
+        # don't hold on to errors
+        try:
+            success = json.loads(text).get('success', False)
+        except (ValueError, AttributeError):
+            success = False
+        if success:
+            self.system.cache.set(key, text, cache_timeout)
+        return text
+
+    @staticmethod
+    def _endpoint_tag(url):
+        """The statsd tag of requests to url: its last path segment, eg get_problem_list"""
+        return 'endpoint:{0}'.format(url.rstrip('/').rsplit('/', 1)[-1])
+
+    def _timed(self, url, operation):
+        """
+        Call operation() through _try_with_login, recording how long it took
+        (including any login) in statsd.
+        """
+        start = time.time()
+        try:
+            return self._try_with_login(operation)
+        finally:
+            statsd.timing('grading_service.request.time', time.time() - start,
+                          tags=[self._endpoint_tag(url)])
+
     def _try_with_login(self, operation):
         """
         Call operation(), which should return a requests response object.  If
@@ -76,12 +76,12 @@ class PeerGradingService(GradingService):
 
     def get_problem_list(self, course_id, grader_id):
         params = {'course_id': course_id, 'student_id': grader_id}
-        response = self.get(self.get_problem_list_url, params)
+        response = self.cached_get(self.get_problem_list_url, params)
         return self.try_to_decode(response)
 
     def get_notifications(self, course_id, grader_id):
         params = {'course_id': course_id, 'student_id': grader_id}
-        response = self.get(self.get_notifications_url, params)
+        response = self.cached_get(self.get_notifications_url, params)
         return self.try_to_decode(response)
 
     def try_to_decode(self, text):
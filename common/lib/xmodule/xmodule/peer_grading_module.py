@@ -8,6 +8,7 @@ from pkg_resources import resource_string
 from .capa_module import ComplexEncoder
 from .x_module import XModule
 from xmodule.raw_module import RawDescriptor
+from xmodule.modulestore import Location
 from xmodule.modulestore.django import modulestore
 from .timeinfo import TimeInfo
 from xblock.core import Dict, String, Scope, Boolean, Integer, Float
@@ -506,20 +507,13 @@ class PeerGradingModule(PeerGradingFields, XModule):
             success = False
 
 
-        def _find_corresponding_module_for_location(location):
-            '''
-            find the peer grading module that links to the given location
-            '''
-            try:
-                return modulestore().get_instance(self.system.course_id, location)
-            except:
-                # the linked problem doesn't exist
-                log.error("Problem {0} does not exist in this course".format(location))
-                raise
+        # fetch the linked problems all at once
+        descriptors = modulestore().get_instances(
+            self.system.course_id, [problem['location'] for problem in problem_list])
 
         for problem in problem_list:
             problem_location = problem['location']
-            descriptor = _find_corresponding_module_for_location(problem_location)
+            descriptor = descriptors.get(Location(problem_location).replace(revision=None))
             if descriptor:
                 problem['due'] = descriptor._model_data.get('peer_grading_due', None)
                 grace_period_string = descriptor._model_data.get('graceperiod', None)
@@ -533,6 +527,8 @@ class PeerGradingModule(PeerGradingFields, XModule):
                 else:
                     problem['closed'] = False
             else:
+                # the linked problem doesn't exist
+                log.error("Problem {0} does not exist in this course".format(problem_location))
                 # if we can't find the due date, assume that it doesn't have one
                 problem['due'] = None
                 problem['closed'] = False
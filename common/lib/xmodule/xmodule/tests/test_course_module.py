@@ -9,6 +9,8 @@ from xmodule.modulestore.xml import ImportSystem, XMLModuleStore
 import xmodule.course_module
 from django.utils.timezone import UTC
 
+from .test_export import DATA_DIR
+
 
 ORG = 'test_org'
 COURSE = 'test_course'
@@ -176,3 +178,68 @@ class DiscussionTopicsTestCase(unittest.TestCase):
     def test_default_discussion_topics(self):
         d = get_dummy_course('2012-12-02T12:00')
         self.assertEqual({'General': {'id': 'i4x-test_org-test_course-course-test'}}, d.discussion_topics)
+
+
+class GradingContextTestCase(unittest.TestCase):
+    """Make sure grading_context is built from its summary, and uses the modulestore's cache"""
+
+    def get_graded_course(self):
+        modulestore = XMLModuleStore(DATA_DIR, course_dirs=['graded'])
+        return modulestore.get_courses()[0]
+
+    def test_grading_context(self):
+        course = self.get_graded_course()
+        summary = course.grading_context_summary()
+        grading_context = course.grading_context
+
+        self.assertEqual(set(grading_context['graded_sections']), set(summary['graded_sections']))
+        for section_format, sections in summary['graded_sections'].items():
+            for section, context_section in zip(sections, grading_context['graded_sections'][section_format]):
+                self.assertEqual(context_section['section_name'], section['name'])
+                self.assertEqual(context_section['section_descriptor'].location.url(), section['location'])
+                self.assertEqual(context_section['section_location'].url(), section['location'])
+                self.assertEqual(
+                    [descriptor.location.url() for descriptor in context_section['xmoduledescriptors']],
+                    [location for location, _ in section['xmodules']]
+                )
+        self.assertEqual(
+            [descriptor.location.url() for descriptor in grading_context['all_descriptors']],
+            summary['all_descriptors']
+        )
+
+    def test_cached_grading_context(self):
+        course = self.get_graded_course()
+        summary = course.grading_context_summary()
+        course.system.modulestore = Mock(get_cached_course_summary=Mock(return_value=summary))
+
+        with patch.object(xmodule.course_module.CourseDescriptor, 'grading_context_summary') as compute_summary:
+            grading_context = course.grading_context
+            self.assertFalse(compute_summary.called)
+
+        course.system.modulestore.get_cached_course_summary.assert_called_once_with(course.location, 'grading_context')
+        self.assertEqual(
+            [location.url() for location in grading_context['all_descriptor_locations']],
+            summary['all_descriptors']
+        )
+
+    def test_structure_summary(self):
+        course = self.get_graded_course()
+        grading_summary = course.grading_context_summary()
+        structure = course.structure_summary
+
+        self.assertEqual(structure['counts']['CourseDescriptor'], 1)
+        self.assertEqual(structure['depths'][0], 1)
+        self.assertEqual(sum(structure['counts'].values()), sum(structure['depths'].values()))
+        self.assertEqual(
+            structure['graded_sections'],
+            dict((section_format, [(section['name'], len(section['xmodules'])) for section in sections])
+                 for section_format, sections in grading_summary['graded_sections'].items())
+        )
+
+    def test_structure_summary_is_cached(self):
+        course = self.get_graded_course()
+        course.system.modulestore = Mock(get_cached_course_summary=Mock(return_value=None))
+
+        structure = course.structure_summary
+
+        course.system.modulestore.set_cached_course_summary.assert_any_call(course.location, 'structure', structure)
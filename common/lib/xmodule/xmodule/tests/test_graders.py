@@ -1,4 +1,5 @@
 """Grading tests"""
+import random
 import unittest
 
 from xmodule import graders
@@ -236,3 +237,63 @@ class GraderTest(unittest.TestCase):
 
         # TODO: How do we test failure cases? The parser only logs an error when
         # it can't parse something. Maybe it should throw exceptions?
+
+
+class GradeMatrixTest(unittest.TestCase):
+    '''Tests that grading a matrix of students gives exactly the per student grades'''
+
+    def random_grade_sheet(self, rng, section_counts):
+        grade_sheet = {}
+        for section_format, count in section_counts.items():
+            # some students are missing their last sections
+            count = rng.randint(0, count) if rng.random() < 0.2 else count
+            scores = []
+            for index in range(count):
+                possible = rng.choice([1, 2.0, 3, 7.5, 10])
+                # plenty of ties, to check the lowest scores are dropped the same way
+                earned = rng.choice([0, possible, possible / 2, rng.uniform(0, possible)])
+                scores.append(Score(earned=earned, possible=possible, graded=True,
+                                    section='{0} {1}'.format(section_format, index)))
+            grade_sheet[section_format] = scores
+        return grade_sheet
+
+    def random_grader(self, rng, section_counts):
+        conf = []
+        for section_format, count in section_counts.items():
+            if rng.random() < 0.2:
+                conf.append({'type': section_format, 'name': '{0} 0'.format(section_format),
+                             'weight': rng.random()})
+            else:
+                conf.append({'type': section_format, 'min_count': rng.randint(0, count + 2),
+                             'drop_count': rng.randint(0, count + 1), 'weight': rng.random()})
+        # a format without any sections in the grade sheets
+        conf.append({'type': 'Unreleased', 'min_count': 3, 'drop_count': 1, 'weight': 0.1})
+        return graders.grader_from_conf(conf)
+
+    @staticmethod
+    def grade_for_percentage(grade_cutoffs, percentage):
+        '''The per student letter grade, as in courseware.grades'''
+        for possible_grade in sorted(grade_cutoffs, key=lambda x: grade_cutoffs[x], reverse=True):
+            if percentage >= grade_cutoffs[possible_grade]:
+                return possible_grade
+        return None
+
+    def test_grade_matrix_matches_grade(self):
+        rng = random.Random(0)
+        cutoffs = {'A': 0.87, 'B': 0.7, 'C': 0.5, 'Pass': 0.5}
+        for _ in range(200):
+            section_counts = dict((section_format, rng.randint(0, 12)) for section_format in ['Homework', 'Lab', 'Exam'])
+            grader = self.random_grader(rng, section_counts)
+            grade_sheets = [self.random_grade_sheet(rng, section_counts) for _ in range(rng.randint(1, 20))]
+
+            percents = grader.grade_matrix(graders.score_matrix(grade_sheets), len(grade_sheets))
+
+            expected = [grader.grade(grade_sheet)['percent'] for grade_sheet in grade_sheets]
+            self.assertEqual(percents.tolist(), expected)
+            self.assertEqual(graders.letter_grades(cutoffs, percents).tolist(),
+                             [self.grade_for_percentage(cutoffs, percent) for percent in expected])
+
+    def test_score_matrix_rejects_mismatched_sections(self):
+        grade_sheets = [{'Lab': [Score(1, 1, True, 'lab1')]}, {'Lab': [Score(1, 1, True, 'lab2')]}]
+        with self.assertRaises(ValueError):
+            graders.score_matrix(grade_sheets)
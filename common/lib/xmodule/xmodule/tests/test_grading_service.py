@@ -0,0 +1,50 @@
+import json
+import unittest
+from mock import Mock, patch
+
+from xmodule.open_ended_grading_classes.grading_service_module import GradingService
+
+from . import get_test_system
+
+
+class DictCache(object):
+    """A ModuleSystem cache which holds its values in a dict, ignoring timeouts"""
+    def __init__(self):
+        self.values = {}
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value, timeout=None):
+        self.values[key] = value
+
+
+class GradingServiceTest(unittest.TestCase):
+    def make_service(self, username='lms'):
+        system = get_test_system()
+        system.cache = DictCache()
+        return GradingService({'url': 'http://grading', 'username': username, 'password': 'password',
+                               'system': system})
+
+    def test_session_is_shared(self):
+        self.assertIs(self.make_service().session, self.make_service().session)
+        self.assertIsNot(self.make_service().session, self.make_service('other').session)
+
+    def test_cached_get(self):
+        service = self.make_service()
+        response = json.dumps({'success': True, 'problem_list': []})
+        with patch.object(service, 'get', Mock(return_value=response)) as get:
+            self.assertEqual(service.cached_get('http://grading/get_problem_list/', {'course_id': 'a'}), response)
+            self.assertEqual(service.cached_get('http://grading/get_problem_list/', {'course_id': 'a'}), response)
+            self.assertEqual(get.call_count, 1)
+
+            service.cached_get('http://grading/get_problem_list/', {'course_id': 'b'})
+            self.assertEqual(get.call_count, 2)
+
+    def test_errors_are_not_cached(self):
+        service = self.make_service()
+        response = json.dumps({'success': False, 'error': 'login_required'})
+        with patch.object(service, 'get', Mock(return_value=response)) as get:
+            service.cached_get('http://grading/get_problem_list/', {'course_id': 'a'})
+            service.cached_get('http://grading/get_problem_list/', {'course_id': 'a'})
+            self.assertEqual(get.call_count, 2)
@@ -36,3 +36,16 @@ class HtmlModuleSubstitutionTestCase(unittest.TestCase):
         module = HtmlModule(module_system, self.descriptor, module_data)
         self.assertEqual(module.get_html(), sample_xml)
 
+
+class HtmlModuleCacheKeyTestCase(unittest.TestCase):
+    descriptor = Mock()
+
+    def test_cache_key_follows_data(self):
+        module = HtmlModule(get_test_system(), self.descriptor, {'data': '<p>Hi</p>'})
+        other = HtmlModule(get_test_system(), self.descriptor, {'data': '<p>Bye</p>'})
+        self.assertIsNotNone(module.html_cache_key())
+        self.assertNotEqual(module.html_cache_key(), other.html_cache_key())
+
+    def test_no_cache_key_with_substitution(self):
+        module = HtmlModule(get_test_system(), self.descriptor, {'data': '<p>%%USER_ID%%</p>'})
+        self.assertIsNone(module.html_cache_key())
@@ -272,6 +272,16 @@ class XModule(XModuleFields, HTMLSnippet, XBlock):
         '''
         return None
 
+    def html_cache_key(self):
+        ''' Opt-in for caching the rendered html of this module across students.
+
+        Modules whose get_html doesn't depend on the student return a string which
+        changes whenever their html does (eg a digest of the fields it is rendered
+        from), so that the LMS can reuse their rendered and wrapped html for all
+        students. The default, None, means the html can't be cached.
+        '''
+        return None
+
     def handle_ajax(self, _dispatch, _data):
         ''' dispatch is last part of the URL.
             data is a dictionary-like object with the content of the request'''
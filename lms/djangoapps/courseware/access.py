@@ -107,6 +107,49 @@ def get_access_group_name(obj, action):
 
 
 # ================ Implementation helpers ================================
+def toc_visibility_class(user, course):
+    """
+    Return which chapters and sections of course user can load, as far as the
+    table of contents goes, so that a table of contents computed once per course
+    can be filtered for user by toc_item_visible without checking access to each
+    item:
+
+    'staff' -- every item
+    'started' -- start dates are disabled: every item but errors
+    'beta' -- a beta tester: items from days_early_for_beta days before they start
+    'student' -- items once they start
+    """
+    if has_access(user, course, 'staff', course.id):
+        return 'staff'
+    if settings.MITX_FEATURES['DISABLE_START_DATES'] and not is_masquerading_as_student(user):
+        return 'started'
+    if course_beta_test_group_name(course.location) in [g.name for g in user.groups.all()]:
+        return 'beta'
+    return 'student'
+
+
+def toc_item_visible(visibility_class, item, now):
+    """
+    Return whether a user of visibility_class (see toc_visibility_class) can load a
+    table of contents item at time now, as _has_access_descriptor and
+    _has_access_error_desc would decide for its descriptor.
+
+    item is a dict with the 'start' and 'days_early_for_beta' of the descriptor,
+    and 'is_error', which is True for error descriptors.
+    """
+    if visibility_class == 'staff':
+        return True
+    if item['is_error']:
+        return False
+    if visibility_class == 'started' or item['start'] is None:
+        return True
+
+    effective_start = item['start']
+    if visibility_class == 'beta' and item['days_early_for_beta'] is not None:
+        effective_start = effective_start - timedelta(item['days_early_for_beta'])
+    return now > effective_start
+
+
 def _has_access_course_desc(user, course, action):
     """
     Check if user has access to a course descriptor.
@@ -0,0 +1,126 @@
+"""
+Precomputed answer distributions.
+
+AnswerDistributionCount rows hold, for each input of each capa problem in a course,
+how many students currently have each answer saved. modx_dispatch calls
+update_answer_counts whenever a request changes a problem's saved student_answers,
+moving the count of every changed input from its old answer to its new one, so the
+instructor dashboard can report answer distributions from a handful of rows.
+
+Counts only follow answers saved while MITX_FEATURES['ENABLE_ANSWER_DISTRIBUTION_COUNTS']
+is on; the compute_answer_counts management command (re)builds them for a course
+from its StudentModule state.
+"""
+from collections import defaultdict
+
+from django.db.models import F
+
+from courseware.models import AnswerDistributionCount
+
+# the answer reported for the bucket which holds the answers past MAX_ANSWERS_PER_INPUT
+OTHER_ANSWERS = '(other answers)'
+
+
+def answer_text(answer):
+    """
+    The text an answer is counted under. Answers can be lists or other unhashable
+    elements, so they are converted to strings, and cut to fit the answer column.
+    """
+    return unicode(answer)[:AnswerDistributionCount._meta.get_field('answer').max_length]
+
+
+def update_answer_counts(course_id, module_state_key, old_answers, new_answers):
+    """
+    Move the counts of every input whose answer changed from `old_answers` to
+    `new_answers` (both student_answers dicts of answer id -> answer, either may be
+    empty) for the problem at `module_state_key`.
+    """
+    old_answers = old_answers or {}
+    new_answers = new_answers or {}
+    for answer_id in set(old_answers) | set(new_answers):
+        if old_answers.get(answer_id) == new_answers.get(answer_id):
+            continue
+        if answer_id in old_answers:
+            _decrement(course_id, module_state_key, answer_id, answer_text(old_answers[answer_id]))
+        if answer_id in new_answers:
+            _increment(course_id, module_state_key, answer_id, answer_text(new_answers[answer_id]))
+
+
+def _increment(course_id, module_state_key, answer_id, answer):
+    input_counts = AnswerDistributionCount.objects.filter(
+        course_id=course_id, module_state_key=module_state_key, answer_id=answer_id
+    )
+    if input_counts.filter(answer=answer, is_other=False).update(count=F('count') + 1):
+        return
+
+    if input_counts.filter(is_other=False).count() < AnswerDistributionCount.MAX_ANSWERS_PER_INPUT:
+        answer_count, _ = AnswerDistributionCount.objects.get_or_create(
+            course_id=course_id, module_state_key=module_state_key, answer_id=answer_id,
+            answer=answer, is_other=False
+        )
+    else:
+        answer_count, _ = AnswerDistributionCount.objects.get_or_create(
+            course_id=course_id, module_state_key=module_state_key, answer_id=answer_id,
+            answer='', is_other=True
+        )
+    AnswerDistributionCount.objects.filter(pk=answer_count.pk).update(count=F('count') + 1)
+
+
+def _decrement(course_id, module_state_key, answer_id, answer):
+    # Answers saved before the counts were built aren't counted anywhere; never go below 0 for them.
+    input_counts = AnswerDistributionCount.objects.filter(
+        course_id=course_id, module_state_key=module_state_key, answer_id=answer_id
+    )
+    answer_counts = input_counts.filter(answer=answer, is_other=False)
+    if answer_counts.exists():
+        answer_counts.filter(count__gt=0).update(count=F('count') - 1)
+    elif input_counts.filter(is_other=False).count() >= AnswerDistributionCount.MAX_ANSWERS_PER_INPUT:
+        # an answer without a row of its own was only counted under other if the input's rows were full
+        input_counts.filter(is_other=True, count__gt=0).update(count=F('count') - 1)
+
+
+def replace_answer_counts(course_id, module_state_key, counts):
+    """
+    Replace the counts of the problem at `module_state_key` with `counts`, a dict of
+    answer id -> (dict: answer text -> count). The MAX_ANSWERS_PER_INPUT most common
+    answers of each input are kept, the rest are added up in its other bucket.
+    """
+    rows = []
+    for answer_id, answers in counts.iteritems():
+        by_count = sorted(answers.iteritems(), key=lambda (answer, count): count, reverse=True)
+        kept = by_count[:AnswerDistributionCount.MAX_ANSWERS_PER_INPUT]
+        rows.extend(
+            AnswerDistributionCount(course_id=course_id, module_state_key=module_state_key,
+                                    answer_id=answer_id, answer=answer, count=count)
+            for answer, count in kept
+        )
+        other = sum(count for _, count in by_count[len(kept):])
+        if other:
+            rows.append(AnswerDistributionCount(course_id=course_id, module_state_key=module_state_key,
+                                                answer_id=answer_id, answer='', is_other=True, count=other))
+
+    AnswerDistributionCount.objects.filter(course_id=course_id, module_state_key=module_state_key).delete()
+    AnswerDistributionCount.objects.bulk_create(rows)
+
+
+def answer_distributions(course_id, problems):
+    """
+    Read the answer distributions of `problems` (as returned by
+    courseware.grades.graded_problems) back from the counts, in the format of
+    courseware.grades.answer_distributions:
+
+    dict: (problem url_name, problem display_name, problem_id) -> (dict : answer ->  count)
+    """
+    counts = defaultdict(lambda: defaultdict(int))
+    if not problems:
+        return counts
+
+    answer_counts = AnswerDistributionCount.objects.filter(
+        course_id=course_id, module_state_key__in=problems.keys(), count__gt=0
+    ).values_list('module_state_key', 'answer_id', 'answer', 'is_other', 'count')
+
+    for module_state_key, answer_id, answer, is_other, count in answer_counts:
+        url_name, display_name = problems[module_state_key]
+        counts[(url_name, display_name, answer_id)][OTHER_ANSWERS if is_other else answer] += count
+
+    return counts
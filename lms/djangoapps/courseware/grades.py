@@ -1,20 +1,21 @@
 # Compute grades using real division, with no integer truncation
 from __future__ import division
 
+import json
 import random
 import logging
 
 from collections import defaultdict
 from django.conf import settings
-from django.contrib.auth.models import User
 
 from .model_data import ModelDataCache, LmsKeyValueStore
 from xblock.core import Scope
+from .access import has_access
 from .module_render import get_module, get_module_for_descriptor
 from xmodule import graders
 from xmodule.capa_module import CapaModule
 from xmodule.graders import Score
-from .models import StudentModule
+from .models import StudentModule, decompress_state
 
 log = logging.getLogger("mitx.courseware")
 
@@ -58,7 +59,7 @@ def yield_problems(request, course, student):
     """
     grading_context = course.grading_context
 
-    descriptor_locations = (descriptor.location.url() for descriptor in grading_context['all_descriptors'])
+    descriptor_locations = (location.url() for location in grading_context['all_descriptor_locations'])
     existing_student_modules = set(StudentModule.objects.filter(
         module_state_key__in=descriptor_locations
     ).values_list('module_state_key', flat=True))
@@ -67,12 +68,10 @@ def yield_problems(request, course, student):
     for _, sections in grading_context['graded_sections'].iteritems():
         for section in sections:
 
-            section_descriptor = section['section_descriptor']
-
             # If the student hasn't seen a single problem in the section, skip it.
-            for moduledescriptor in section['xmoduledescriptors']:
-                if moduledescriptor.location.url() in existing_student_modules:
-                    sections_to_list.append(section_descriptor)
+            for location, _ in section['xmodule_locations']:
+                if location.url() in existing_student_modules:
+                    sections_to_list.append(section['section_descriptor'])
                     break
 
     model_data_cache = ModelDataCache(sections_to_list, course.id, student)
@@ -100,26 +99,161 @@ def answer_distributions(request, course):
 
     dict: (problem url_name, problem display_name, problem_id) -> (dict : answer ->  count)
 
-    TODO (vshnayder): this is currently doing a full linear pass through all
-    students and all problems.  This will be just a little slow.
+    The answers are read straight out of the saved StudentModule state of every
+    enrolled student, streaming the rows from the database, so that no capa
+    module (or LoncapaProblem) has to be constructed along the way.
     """
+    problems = graded_problems(course)
 
     counts = defaultdict(lambda: defaultdict(int))
+    for module_state_key, student_answers in iter_student_answers(course.id, problems.keys()):
+        url_name, display_name = problems[module_state_key]
+        for problem_id, answer in student_answers.iteritems():
+            # Answer can be a list or some other unhashable element.  Convert to string.
+            counts[(url_name, display_name, problem_id)][str(answer)] += 1
 
-    enrolled_students = User.objects.filter(courseenrollment__course_id=course.id)
+    return counts
 
-    for student in enrolled_students:
-        for capa_module in yield_problems(request, course, student):
-            for problem_id in capa_module.lcp.student_answers:
-                # Answer can be a list or some other unhashable element.  Convert to string.
-                answer = str(capa_module.lcp.student_answers[problem_id])
-                key = (capa_module.url_name, capa_module.display_name_with_default, problem_id)
-                counts[key][answer] += 1
 
-    return counts
+def graded_problems(course):
+    """
+    Return the capa problems in the graded sections of `course`, as a dict of
+    location url (the module_state_key of their StudentModules) -> (url_name, display_name).
+    """
+    problems = {}
+    for sections in course.grading_context['graded_sections'].itervalues():
+        for section in sections:
+            for descriptor in section['xmoduledescriptors']:
+                if descriptor.location.category == 'problem':
+                    problems[descriptor.location.url()] = (descriptor.url_name, descriptor.display_name_with_default)
+    return problems
+
+
+def iter_student_answers(course_id, module_state_keys):
+    """
+    Yield (module_state_key, student_answers) for every enrolled student's saved
+    answers to the problems in `module_state_keys`, streaming the StudentModule rows.
+    """
+    if not module_state_keys:
+        return
+
+    student_module_states = StudentModule.objects.filter(
+        course_id=course_id,
+        module_type='problem',
+        module_state_key__in=module_state_keys,
+        student__courseenrollment__course_id=course_id,
+    ).values_list('module_state_key', 'state')
+
+    for module_state_key, state in student_module_states.iterator():
+        student_answers = _student_answers_from_state(decompress_state(state))
+        if student_answers:
+            yield module_state_key, student_answers
+
+
+def _student_answers_from_state(state):
+    """
+    Return the 'student_answers' dict saved in a capa StudentModule's JSON state,
+    or None if there isn't one (or the state can't be parsed).
+    """
+    if not state:
+        return None
+    try:
+        student_answers = json.loads(state).get('student_answers')
+    except (ValueError, AttributeError):
+        log.warning("Could not parse StudentModule state {0!r}".format(state[:100]))
+        return None
+    return student_answers if isinstance(student_answers, dict) else None
+
+
+def score_section(student, course, section_descriptor, module_creator, model_data_cache):
+    """
+    Return the scores of section_descriptor and its descendents, as a list of
+    (descriptor, correct, total) in traversal order, leaving out those which
+    don't have a score.
+    """
+    scores = []
+    for module_descriptor in yield_dynamic_descriptor_descendents(section_descriptor, module_creator):
+        (correct, total) = get_score(course.id, student, module_descriptor, module_creator, model_data_cache)
+        if correct is None and total is None:
+            continue
+        scores.append((module_descriptor, correct, total))
+    return scores
+
+
+def section_touched(student, section_descriptor, model_data_cache):
+    """
+    Return whether the student has state for section_descriptor or any of its
+    descendents, or it has descendents which are scored (or which choose their
+    children) independently of that state, so that it can't be scored from its
+    descriptors alone.
+    """
+    stack = [section_descriptor]
+    while stack:
+        descriptor = stack.pop()
+        if descriptor.always_recalculate_grades or descriptor.has_dynamic_children():
+            return True
+        key = LmsKeyValueStore.Key(Scope.user_state, student.id, descriptor.location, None)
+        if model_data_cache.find(key):
+            return True
+        stack.extend(descriptor.get_children())
+    return False
+
+
+def score_untouched_section(student, course, section_descriptor, module_creator, model_data_cache):
+    """
+    score_section for a section which the student hasn't touched (see
+    section_touched), from its descriptors: every problem in it is unanswered, so
+    only the problems without a weight are instantiated, for their max score.
+    Problems the student can't load are left to get_score, which leaves them out
+    as score_section does.
+    """
+    scores = []
+    for module_descriptor in yield_dynamic_descriptor_descendents(section_descriptor, module_creator):
+        if (module_descriptor.has_score and module_descriptor.weight is not None and
+                has_access(student, module_descriptor, 'load', course.id)):
+            scores.append((module_descriptor, 0, module_descriptor.weight))
+            continue
+        (correct, total) = get_score(course.id, student, module_descriptor, module_creator, model_data_cache)
+        if correct is None and total is None:
+            continue
+        scores.append((module_descriptor, correct, total))
+    return scores
+
+
+def display_descriptors(student, request, descriptor, model_data_cache, course_id):
+    """
+    Return the descriptors of the modules which the module of descriptor would
+    return from get_display_items, without instantiating the children which the
+    student may load, unless they have dynamic children.
+    """
+    items = []
+    for child in descriptor.get_children():
+        if child.has_dynamic_children():
+            child_module = get_module_for_descriptor(student, request, child, model_data_cache, course_id)
+            if child_module is not None:
+                items.extend(item.descriptor for item in child_module.displayable_items())
+        elif has_access(student, child, 'load', course_id):
+            items.append(child)
+    return items
+
+
+def progress_and_grade(student, request, course, model_data_cache):
+    """
+    Return (courseware_summary, grade_summary), the results of progress_summary
+    and grade, from a single pass over the course: the sections scored for the
+    progress summary aren't scored again for the grade.
+
+    If the student does not have access to load the course module, returns (None, None).
+    """
+    section_scores = {}
+    courseware_summary = progress_summary(student, request, course, model_data_cache, section_scores)
+    if courseware_summary is None:
+        return (None, None)
+    grade_summary = grade(student, request, course, model_data_cache, section_scores=section_scores)
+    return (courseware_summary, grade_summary)
 
 
-def grade(student, request, course, model_data_cache=None, keep_raw_scores=False):
+def grade(student, request, course, model_data_cache=None, keep_raw_scores=False, section_scores=None):
     """
     This grades a student as quickly as possible. It returns the
     output from the course grader, augmented with the final letter
@@ -135,6 +269,10 @@ def grade(student, request, course, model_data_cache=None, keep_raw_scores=False
         make up the final grade. (For display)
     - keep_raw_scores : if True, then value for key 'raw_scores' contains scores for every graded module
 
+    section_scores: optionally, a dict of section location url -> the result of
+        score_section for that section, as filled in by progress_summary.
+        Sections found in it aren't scored again.
+
     More information on the format is in the docstring for CourseGrader.
     """
 
@@ -150,15 +288,14 @@ def grade(student, request, course, model_data_cache=None, keep_raw_scores=False
     for section_format, sections in grading_context['graded_sections'].iteritems():
         format_scores = []
         for section in sections:
-            section_descriptor = section['section_descriptor']
-            section_name = section_descriptor.display_name_with_default
+            section_name = section['section_name']
 
             should_grade_section = False
             # If we haven't seen a single problem in the section, we don't have to grade it at all! We can assume 0%
-            for moduledescriptor in section['xmoduledescriptors']:
+            for location, always_recalculate_grades in section['xmodule_locations']:
                 # some problems have state that is updated independently of interaction
                 # with the LMS, so they need to always be scored. (E.g. foldit.)
-                if moduledescriptor.always_recalculate_grades:
+                if always_recalculate_grades:
                     should_grade_section = True
                     break
 
@@ -167,7 +304,7 @@ def grade(student, request, course, model_data_cache=None, keep_raw_scores=False
                 key = LmsKeyValueStore.Key(
                     Scope.user_state,
                     student.id,
-                    moduledescriptor.location,
+                    location,
                     None
                 )
                 if model_data_cache.find(key):
@@ -183,11 +320,14 @@ def grade(student, request, course, model_data_cache=None, keep_raw_scores=False
                     # would be simpler
                     return get_module_for_descriptor(student, request, descriptor, model_data_cache, course.id)
 
-                for module_descriptor in yield_dynamic_descriptor_descendents(section_descriptor, create_module):
+                section_url = section['section_location'].url()
+                if section_scores is not None and section_url in section_scores:
+                    module_scores = section_scores[section_url]
+                else:
+                    module_scores = score_section(student, course, section['section_descriptor'],
+                                                  create_module, model_data_cache)
 
-                    (correct, total) = get_score(course.id, student, module_descriptor, create_module, model_data_cache)
-                    if correct is None and total is None:
-                        continue
+                for module_descriptor, correct, total in module_scores:
 
                     if settings.GENERATE_PROFILE_SCORES:  	# for debugging!
                         if total > 1:
@@ -213,7 +353,7 @@ def grade(student, request, course, model_data_cache=None, keep_raw_scores=False
                 format_scores.append(graded_total)
             else:
                 log.exception("Unable to grade a section with a total possible score of zero. " +
-                              str(section_descriptor.location))
+                              str(section['section_location']))
 
         totaled_scores[section_format] = format_scores
 
@@ -257,7 +397,7 @@ def grade_for_percentage(grade_cutoffs, percentage):
 # TODO: This method is not very good. It was written in the old course style and
 # then converted over and performance is not good. Once the progress page is redesigned
 # to not have the progress summary this method should be deleted (so it won't be copied).
-def progress_summary(student, request, course, model_data_cache):
+def progress_summary(student, request, course, model_data_cache, section_scores=None):
     """
     This pulls a summary of all problems in the course.
 
@@ -273,6 +413,8 @@ def progress_summary(student, request, course, model_data_cache):
         course: A Descriptor containing the course to grade
         model_data_cache: A ModelDataCache initialized with all
              instance_modules for the student
+        section_scores: optionally, a dict which is filled in with section location
+             url -> the result of score_section for that section, for grade to reuse
 
     If the student does not have access to load the course module, this function
     will return None.
@@ -286,52 +428,60 @@ def progress_summary(student, request, course, model_data_cache):
         # This student must not have access to the course.
         return None
 
+    def create_module(descriptor):
+        '''creates an XModule instance given a descriptor'''
+        return get_module_for_descriptor(student, request, descriptor, model_data_cache, course.id)
+
     chapters = []
-    # Don't include chapters that aren't displayable (e.g. due to error)
-    for chapter_module in course_module.get_display_items():
+    # Chapters and sections are walked as descriptors, and only the sections the
+    # student has touched are instantiated to be scored
+    for chapter in display_descriptors(student, request, course_module.descriptor, model_data_cache, course.id):
         # Skip if the chapter is hidden
-        if chapter_module.lms.hide_from_toc:
+        if chapter.lms.hide_from_toc:
             continue
 
         sections = []
-        for section_module in chapter_module.get_display_items():
+        for section in display_descriptors(student, request, chapter, model_data_cache, course.id):
             # Skip if the section is hidden
-            if section_module.lms.hide_from_toc:
+            if section.lms.hide_from_toc:
                 continue
 
             # Same for sections
-            graded = section_module.lms.graded
+            graded = section.lms.graded
             scores = []
 
-            module_creator = section_module.system.get_module
-
-            for module_descriptor in yield_dynamic_descriptor_descendents(section_module.descriptor, module_creator):
-
-                course_id = course.id
-                (correct, total) = get_score(course_id, student, module_descriptor, module_creator, model_data_cache)
-                if correct is None and total is None:
+            if section_touched(student, section, model_data_cache):
+                section_module = create_module(section)
+                if section_module is None:
                     continue
+                module_scores = score_section(student, course, section, section_module.system.get_module,
+                                              model_data_cache)
+            else:
+                module_scores = score_untouched_section(student, course, section, create_module, model_data_cache)
+            if section_scores is not None:
+                section_scores[section.location.url()] = module_scores
 
+            for module_descriptor, correct, total in module_scores:
                 scores.append(Score(correct, total, graded, module_descriptor.display_name_with_default))
 
             scores.reverse()
             section_total, _ = graders.aggregate_scores(
-                scores, section_module.display_name_with_default)
+                scores, section.display_name_with_default)
 
-            module_format = section_module.lms.format if section_module.lms.format is not None else ''
+            module_format = section.lms.format if section.lms.format is not None else ''
             sections.append({
-                'display_name': section_module.display_name_with_default,
-                'url_name': section_module.url_name,
+                'display_name': section.display_name_with_default,
+                'url_name': section.url_name,
                 'scores': scores,
                 'section_total': section_total,
                 'format': module_format,
-                'due': section_module.lms.due,
+                'due': section.lms.due,
                 'graded': graded,
             })
 
         chapters.append({'course': course.display_name_with_default,
-                         'display_name': chapter_module.display_name_with_default,
-                         'url_name': chapter_module.url_name,
+                         'display_name': chapter.display_name_with_default,
+                         'url_name': chapter.url_name,
                          'sections': sections})
 
     return chapters
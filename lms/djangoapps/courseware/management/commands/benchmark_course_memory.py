@@ -0,0 +1,65 @@
+"""
+Measure the memory taken by the descriptors of a course.
+
+The course is loaded --copies times from the modulestore, walking every copy
+down to its leaves so that all its descriptors are instantiated, and all the
+copies are kept alive. The growth of the peak resident set size of the process
+is then reported per copy, along with the number of descriptors in a copy.
+Run it before and after a change to the modulestore to compare. This is only
+meaningful for courses in a Mongo modulestore: the XML modulestore keeps a single
+copy of each course.
+"""
+import gc
+import resource
+import time
+from optparse import make_option
+
+from django.core.management.base import BaseCommand, CommandError
+
+from courseware.courses import get_course_by_id
+from xmodule.modulestore.django import modulestore
+
+
+def walk(descriptor):
+    """
+    Instantiate every descendent of descriptor, and return how many descriptors there are
+    """
+    return 1 + sum(walk(child) for child in descriptor.get_children())
+
+
+class Command(BaseCommand):
+    args = "<course_id>"
+    help = "Measure the memory taken by the descriptors of a course, as loaded from the modulestore."
+
+    option_list = BaseCommand.option_list + (
+        make_option('--copies', type='int', default=5, help='Number of copies of the course to load'),
+    )
+
+    def handle(self, *args, **options):
+        if len(args) != 1:
+            raise CommandError("benchmark_course_memory requires one argument: <course_id>")
+        course_id = args[0]
+
+        # load the course once first, so that caches and imported modules aren't counted
+        ndescriptors = walk(get_course_by_id(course_id, depth=None))
+        gc.collect()
+        start_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        start = time.time()
+
+        copies = []
+        for _ in xrange(options['copies']):
+            store = modulestore()
+            if getattr(store, 'request_cache', None) is not None:
+                store.request_cache.data = {}
+            course = get_course_by_id(course_id, depth=None)
+            walk(course)
+            copies.append(course)
+
+        seconds = time.time() - start
+        gc.collect()
+        # ru_maxrss is in kilobytes on linux
+        growth = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - start_rss
+
+        self.stdout.write("{0}: {1} descriptors\n".format(course_id, ndescriptors))
+        self.stdout.write("{0:.1f} MB and {1:.2f} s per copy of the course\n".format(
+            growth / 1024.0 / len(copies), seconds / len(copies)))
@@ -0,0 +1,119 @@
+"""
+Time the work behind the progress page on a synthetic course.
+
+A course of --chapters chapters of --sections graded sections of --problems
+problems is created in the modulestore, along with a student who has answered
+the problems of the first --touched sections. The progress and grade summaries of
+the student are then built --repeat times each way: with separate calls to
+grades.progress_summary and grades.grade (as the progress page used to), and with
+grades.progress_and_grade. The course and the student are removed afterwards.
+
+This writes to the configured modulestore and database: run it against a
+development environment.
+"""
+import time
+from optparse import make_option
+from uuid import uuid4
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.test.client import RequestFactory
+
+from capa.tests.response_xml_factory import StringResponseXMLFactory
+from courseware import grades
+from courseware.model_data import ModelDataCache
+from courseware.models import StudentModule
+from student.models import CourseEnrollment
+from xmodule.modulestore.django import modulestore
+from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
+
+
+class Command(BaseCommand):
+    help = "Time building the progress page summaries of a student on a synthetic course."
+
+    option_list = BaseCommand.option_list + (
+        make_option('--chapters', type='int', default=5, help='Number of chapters in the course'),
+        make_option('--sections', type='int', default=4, help='Number of sections in each chapter'),
+        make_option('--problems', type='int', default=5, help='Number of problems in each section'),
+        make_option('--touched', type='int', default=5,
+                    help='Number of sections whose problems the student has answered'),
+        make_option('--repeat', type='int', default=5, help='Number of timed runs of each way'),
+    )
+
+    def handle(self, *args, **options):
+        course, locations = self.create_course(options['chapters'], options['sections'], options['problems'])
+        student = User.objects.create(username='benchmark_{0}'.format(uuid4().hex[:20]))
+        try:
+            CourseEnrollment.objects.create(user=student, course_id=course.id)
+            answered = [location for section in locations['sections'][:options['touched']]
+                        for location in locations['problems'][section]]
+            for location in answered:
+                StudentModule.objects.create(student=student, course_id=course.id, module_state_key=location,
+                                             module_type='problem', grade=1, max_grade=1)
+
+            request = RequestFactory().get('/')
+            request.user = student
+
+            def separate():
+                model_data_cache = ModelDataCache.cache_for_descriptor_descendents(
+                    course.id, student, course, depth=None)
+                grades.progress_summary(student, request, course, model_data_cache)
+                grades.grade(student, request, course, model_data_cache)
+
+            def combined():
+                model_data_cache = ModelDataCache.cache_for_descriptor_descendents(
+                    course.id, student, course, depth=None)
+                grades.progress_and_grade(student, request, course, model_data_cache)
+
+            self.stdout.write("{0} sections of {1} problems, {2} answered\n".format(
+                len(locations['sections']), options['problems'], len(answered)))
+            for name, build in (('progress_summary + grade', separate), ('progress_and_grade', combined)):
+                timings = self.time(build, options['repeat'])
+                self.stdout.write("{0}: min {1:.1f} ms, mean {2:.1f} ms\n".format(
+                    name, min(timings) * 1000, sum(timings) / len(timings) * 1000))
+        finally:
+            student.delete()
+            store = modulestore('direct')
+            for location in reversed(locations['all']):
+                store.delete_item(location)
+
+    @staticmethod
+    def time(build, repeat):
+        timings = []
+        for _ in xrange(repeat):
+            start = time.time()
+            build()
+            timings.append(time.time() - start)
+        return timings
+
+    @staticmethod
+    def create_course(nchapters, nsections, nproblems):
+        """
+        Create the synthetic course. Returns the course (loaded to full depth) and
+        a dict of the locations created: 'all' (in creation order), 'sections', and
+        'problems' (section location -> problem locations).
+        """
+        course = CourseFactory.create(org='Benchmark', number=uuid4().hex[:8], display_name='Progress')
+        locations = {'all': [course.location], 'sections': [], 'problems': {}}
+        problem_xml = StringResponseXMLFactory().build_xml(answer='foo')
+
+        for _ in xrange(nchapters):
+            chapter = ItemFactory.create(parent_location=course.location,
+                                         template="i4x://edx/templates/chapter/Empty")
+            locations['all'].append(chapter.location)
+            for _ in xrange(nsections):
+                section = ItemFactory.create(parent_location=chapter.location,
+                                             template="i4x://edx/templates/sequential/Empty",
+                                             metadata={'graded': True, 'format': 'Homework'})
+                section_url = section.location.url()
+                locations['all'].append(section.location)
+                locations['sections'].append(section_url)
+                locations['problems'][section_url] = []
+                for _ in xrange(nproblems):
+                    problem = ItemFactory.create(parent_location=section.location,
+                                                 template="i4x://edx/templates/problem/Blank_Common_Problem",
+                                                 data=problem_xml)
+                    locations['all'].append(problem.location)
+                    locations['problems'][section_url].append(problem.location.url())
+
+        return modulestore().get_instance(course.id, course.location, depth=None), locations
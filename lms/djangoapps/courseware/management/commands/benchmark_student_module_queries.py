@@ -0,0 +1,159 @@
+"""
+Record the query plans and timings of the hot StudentModule queries.
+
+--students students are given a StudentModule for each of --problems problems in
+each of --courses synthetic courses. The queries below are then explained and
+timed --repeat times against the first course:
+
+    model_data       the modules of a student among a list of locations
+                     (ModelDataCache._retrieve_fields)
+    instructor_task  every student's module of a problem (instructor tasks,
+                     answer reports)
+    notifications    the latest module a student modified in a course since a
+                     time (open_ended_notifications)
+
+The results are written to --output as JSON. Given a --baseline written by an
+earlier run, the command fails if any plan changed or any query got more than
+--tolerance slower, so that it can guard against index regressions. The
+synthetic students and modules are removed afterwards.
+
+This writes to the configured database: run it against a development
+environment.
+"""
+import json
+import time
+from datetime import timedelta
+from optparse import make_option
+from uuid import uuid4
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from courseware.models import StudentModule
+
+BATCH_SIZE = 1000
+
+EXPLAIN = {
+    'sqlite': 'EXPLAIN QUERY PLAN ',
+}
+
+
+class Command(BaseCommand):
+    help = "Record the query plans and timings of the hot StudentModule queries on a synthetic dataset."
+
+    option_list = BaseCommand.option_list + (
+        make_option('--students', type='int', default=1000, help='Number of students'),
+        make_option('--problems', type='int', default=50, help='Number of problems in each course'),
+        make_option('--courses', type='int', default=4, help='Number of courses'),
+        make_option('--repeat', type='int', default=20, help='Number of timed runs of each query'),
+        make_option('--output', help='File to write the plans and timings to, as JSON'),
+        make_option('--baseline', help='Plans and timings of an earlier run to compare against'),
+        make_option('--tolerance', type='float', default=0.5,
+                    help='Fraction by which a query may be slower than its baseline'),
+    )
+
+    def handle(self, *args, **options):
+        run = uuid4().hex[:8]
+        course_ids = ['Benchmark/{0}/{1}'.format(run, i) for i in xrange(options['courses'])]
+        problems = ['i4x://Benchmark/{0}/problem/{1}'.format(run, i) for i in xrange(options['problems'])]
+        students = [User.objects.create(username='benchmark_{0}_{1}'.format(run, i))
+                    for i in xrange(options['students'])]
+        try:
+            self.create_modules(course_ids, problems, students)
+            results = self.run_queries(course_ids[0], problems, students[len(students) // 2], options['repeat'])
+        finally:
+            for i in xrange(0, len(students), BATCH_SIZE):
+                batch = [student.id for student in students[i:i + BATCH_SIZE]]
+                StudentModule.objects.filter(student__in=batch).delete()
+                User.objects.filter(id__in=batch).delete()
+
+        for name, result in sorted(results.items()):
+            self.stdout.write("{0}: min {1:.2f} ms, mean {2:.2f} ms\n".format(name, result['min_ms'], result['mean_ms']))
+            for row in result['plan']:
+                self.stdout.write("    {0}\n".format(' | '.join(unicode(column) for column in row)))
+
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(results, output, indent=2, sort_keys=True)
+
+        if options['baseline']:
+            with open(options['baseline']) as baseline:
+                regressions = self.regressions(json.load(baseline), results, options['tolerance'])
+            if regressions:
+                raise CommandError("StudentModule query regressions:\n" + "\n".join(regressions))
+            self.stdout.write("No regressions against {0}\n".format(options['baseline']))
+
+    @staticmethod
+    def create_modules(course_ids, problems, students):
+        batch = []
+        for course_id in course_ids:
+            for problem in problems:
+                for student in students:
+                    batch.append(StudentModule(student=student, course_id=course_id, module_state_key=problem,
+                                               module_type='problem', state='{}', grade=1, max_grade=1))
+                    if len(batch) == BATCH_SIZE:
+                        StudentModule.objects.bulk_create(batch)
+                        batch = []
+        StudentModule.objects.bulk_create(batch)
+
+    def run_queries(self, course_id, problems, student, repeat):
+        since = timezone.now() - timedelta(hours=1)
+        queries = {
+            'model_data': StudentModule.objects.filter(
+                student=student, course_id=course_id, module_state_key__in=problems),
+            'instructor_task': StudentModule.objects.filter(
+                course_id=course_id, module_state_key=problems[0]),
+            'notifications': StudentModule.objects.filter(
+                student=student, course_id=course_id, modified__gt=since).values('modified').order_by('-modified')[:1],
+        }
+
+        results = {}
+        for name, queryset in queries.items():
+            timings = []
+            for _ in xrange(repeat):
+                start = time.time()
+                list(queryset.all())
+                timings.append(time.time() - start)
+            results[name] = {
+                'plan': self.explain(queryset),
+                'min_ms': min(timings) * 1000,
+                'mean_ms': sum(timings) / len(timings) * 1000,
+            }
+        return results
+
+    @staticmethod
+    def explain(queryset):
+        """
+        The rows of the database's plan for `queryset`
+        """
+        sql, params = queryset.query.get_compiler(using=queryset.db).as_sql()
+        cursor = connection.cursor()
+        cursor.execute(EXPLAIN.get(connection.vendor, 'EXPLAIN ') + sql, params)
+        return [[column if column is None or isinstance(column, (basestring, int, long, float)) else unicode(column)
+                 for column in row] for row in cursor.fetchall()]
+
+    @staticmethod
+    def regressions(baseline, results, tolerance):
+        """
+        Descriptions of how `results` regressed from `baseline`
+        """
+        regressions = []
+        for name, result in sorted(results.items()):
+            if name not in baseline:
+                continue
+            if Command.plan_shape(result['plan']) != Command.plan_shape(baseline[name]['plan']):
+                regressions.append("{0}: plan changed from {1} to {2}".format(
+                    name, baseline[name]['plan'], result['plan']))
+            if result['min_ms'] > baseline[name]['min_ms'] * (1 + tolerance):
+                regressions.append("{0}: {1:.2f} ms, was {2:.2f} ms".format(
+                    name, result['min_ms'], baseline[name]['min_ms']))
+        return regressions
+
+    @staticmethod
+    def plan_shape(plan):
+        """
+        The parts of a plan which don't vary with the data: row estimates are left out
+        """
+        return [[column for column in row if not isinstance(column, (int, long, float))] for row in plan]
@@ -0,0 +1,124 @@
+"""
+Measure the size and read latency of StudentModule state, plain and compressed.
+
+--rows StudentModules of synthetic capa state are saved for --students students,
+once with MITX_FEATURES['COMPRESS_STUDENT_MODULE_STATE'] off and once with it on,
+each in a course of its own. For each encoding the bytes of state stored are
+reported, along with the time to read --reads rows back --repeat times: their
+grades only, and their decoded state. The students and their modules are
+removed afterwards.
+
+This writes to the configured database: run it against a development
+environment.
+"""
+import json
+import random
+import time
+from optparse import make_option
+from uuid import uuid4
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+
+from courseware.models import StudentModule
+
+BATCH_SIZE = 1000
+
+
+class Command(BaseCommand):
+    help = "Measure the size and read latency of plain and compressed StudentModule state."
+
+    option_list = BaseCommand.option_list + (
+        make_option('--rows', type='int', default=1000000, help='Number of StudentModules of each encoding'),
+        make_option('--students', type='int', default=1000, help='Number of students to spread them over'),
+        make_option('--reads', type='int', default=10000, help='Number of rows read in each timed run'),
+        make_option('--repeat', type='int', default=5, help='Number of timed runs of each read'),
+    )
+
+    def handle(self, *args, **options):
+        run = uuid4().hex[:8]
+        students = [User.objects.create(username='benchmark_{0}_{1}'.format(run, i))
+                    for i in xrange(options['students'])]
+        compress = settings.MITX_FEATURES.get('COMPRESS_STUDENT_MODULE_STATE', False)
+        try:
+            for name, compressed in (('plain', False), ('compressed', True)):
+                course_id = 'Benchmark/{0}/{1}'.format(run, name)
+                settings.MITX_FEATURES['COMPRESS_STUDENT_MODULE_STATE'] = compressed
+                raw_bytes = self.create_modules(course_id, students, options['rows'])
+                modules = StudentModule.objects.filter(course_id=course_id)
+                stored_bytes = sum(len(state) for state in modules.values_list('state', flat=True).iterator())
+                self.stdout.write("{0}: {1} rows, {2:.1f} MB of state stored for {3:.1f} MB of JSON\n".format(
+                    name, options['rows'], stored_bytes / 1e6, raw_bytes / 1e6))
+
+                sample = modules.order_by('?')[:options['reads']]
+                ids = list(sample.values_list('id', flat=True))
+
+                def read_grades():
+                    list(StudentModule.objects.filter(id__in=ids).values_list('grade', 'max_grade'))
+
+                def read_state():
+                    for module in StudentModule.objects.filter(id__in=ids):
+                        json.loads(module.state)
+
+                for read_name, read in (('grades', read_grades), ('state', read_state)):
+                    timings = self.time(read, options['repeat'])
+                    self.stdout.write("  read {0} of {1} rows: min {2:.1f} ms, mean {3:.1f} ms\n".format(
+                        read_name, len(ids), min(timings) * 1000, sum(timings) / len(timings) * 1000))
+        finally:
+            settings.MITX_FEATURES['COMPRESS_STUDENT_MODULE_STATE'] = compress
+            for i in xrange(0, len(students), BATCH_SIZE):
+                batch = [student.id for student in students[i:i + BATCH_SIZE]]
+                StudentModule.objects.filter(student__in=batch).delete()
+                User.objects.filter(id__in=batch).delete()
+
+    @staticmethod
+    def create_modules(course_id, students, nrows):
+        """
+        Save `nrows` StudentModules in `course_id`, round robin over `students`.
+        Returns the length of their JSON state.
+        """
+        raw_bytes = 0
+        batch = []
+        for i in xrange(nrows):
+            state = json.dumps(Command.capa_state(i))
+            raw_bytes += len(state)
+            batch.append(StudentModule(
+                student=students[i % len(students)], course_id=course_id, module_type='problem',
+                module_state_key='i4x://Benchmark/State/problem/{0}'.format(i // len(students)),
+                state=state, grade=1, max_grade=1,
+            ))
+            if len(batch) == BATCH_SIZE:
+                StudentModule.objects.bulk_create(batch)
+                batch = []
+        StudentModule.objects.bulk_create(batch)
+        return raw_bytes
+
+    @staticmethod
+    def capa_state(seed):
+        """
+        State shaped like that of an answered capa problem of a few inputs
+        """
+        rand = random.Random(seed)
+        answer_ids = ['i4x-Benchmark-State-problem-{0:032x}_{1}_1'.format(seed, i)
+                      for i in xrange(rand.randint(1, 4))]
+        return {
+            'correct_map': dict((answer_id, {
+                'hint': '', 'hintmode': None, 'correctness': rand.choice(['correct', 'incorrect']),
+                'npoints': None, 'msg': '', 'queuestate': None,
+            }) for answer_id in answer_ids),
+            'student_answers': dict((answer_id, str(rand.random())) for answer_id in answer_ids),
+            'input_state': dict((answer_id, {}) for answer_id in answer_ids),
+            'seed': rand.randint(1, 1000),
+            'attempts': rand.randint(1, 3),
+            'done': True,
+        }
+
+    @staticmethod
+    def time(read, repeat):
+        timings = []
+        for _ in xrange(repeat):
+            start = time.time()
+            read()
+            timings.append(time.time() - start)
+        return timings
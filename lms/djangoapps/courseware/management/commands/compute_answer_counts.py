@@ -0,0 +1,37 @@
+"""
+Rebuild the answer distribution counts of a course from its StudentModule state.
+
+Run this once for every course when turning on
+MITX_FEATURES['ENABLE_ANSWER_DISTRIBUTION_COUNTS'], after which modx_dispatch
+keeps the counts up to date as answers are submitted.
+"""
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand, CommandError
+
+from courseware.answer_counts import answer_text, replace_answer_counts
+from courseware.courses import get_course_by_id
+from courseware.grades import graded_problems, iter_student_answers
+
+
+class Command(BaseCommand):
+    args = "<course_id>"
+    help = "Rebuild the answer distribution counts of a course from its StudentModule state."
+
+    def handle(self, *args, **options):
+        if len(args) != 1:
+            raise CommandError("compute_answer_counts requires one argument: <course_id>")
+
+        course = get_course_by_id(args[0])
+        problems = graded_problems(course)
+
+        # module_state_key -> answer id -> answer text -> count
+        counts = defaultdict(lambda: defaultdict(lambda: defaultdict(int)))
+        for module_state_key, student_answers in iter_student_answers(course.id, problems.keys()):
+            for answer_id, answer in student_answers.iteritems():
+                counts[module_state_key][answer_id][answer_text(answer)] += 1
+
+        for module_state_key in problems:
+            replace_answer_counts(course.id, module_state_key, counts.get(module_state_key, {}))
+
+        self.stdout.write("Counted answers to {0} problems in {1}\n".format(len(problems), course.id))
@@ -0,0 +1,19 @@
+"""
+Delete the StudentModuleHistory entries past the retention limits of
+settings.STUDENT_MODULE_HISTORY: those older than MAX_AGE_DAYS, and those beyond
+the latest MAX_ENTRIES_PER_MODULE of their student module.
+
+Run this periodically (eg from cron) when either limit is set.
+"""
+from django.core.management.base import NoArgsCommand
+
+from courseware import module_history
+
+
+class Command(NoArgsCommand):
+    help = "Delete the StudentModuleHistory entries past the configured retention limits."
+
+    def handle_noargs(self, **options):
+        pruned = module_history.prune()
+        self.stdout.write("Pruned old entries, and the history of {0} student modules with too many entries\n".format(
+            pruned))
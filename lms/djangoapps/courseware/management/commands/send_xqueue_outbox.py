@@ -0,0 +1,21 @@
+"""
+Deliver the submissions of the xqueue outbox whose celery task was lost.
+
+Run this periodically (eg from cron) when MITX_FEATURES['ENABLE_XQUEUE_OUTBOX']
+is on. Only submissions which have been pending untouched for
+courseware.xqueue_outbox.STALE_AFTER are delivered, so that it doesn't race the
+tasks which are still retrying theirs.
+"""
+from django.core.management.base import NoArgsCommand
+
+from courseware import xqueue_outbox
+
+
+class Command(NoArgsCommand):
+    help = "Deliver the stale pending submissions of the xqueue outbox."
+
+    def handle_noargs(self, **options):
+        submission_ids = list(xqueue_outbox.stale_submissions())
+        done = sum(1 for submission_id in submission_ids if xqueue_outbox.deliver(submission_id))
+        self.stdout.write("Delivered or gave up on {0} of {1} stale xqueue submissions\n".format(
+            done, len(submission_ids)))
@@ -12,10 +12,81 @@ file and check it in at the same time as your model changes. To do that,
 ASSUMPTIONS: modules have unique IDs, even across different module_types
 
 """
+import base64
+import zlib
+
+from django.conf import settings
 from django.contrib.auth.models import User
 from django.db import models
 from django.db.models.signals import post_save
 from django.dispatch import receiver
+from south.modelsinspector import add_introspection_rules
+
+# Marks compressed state. The digit is the version of the encoding, which is
+# zlib compressed utf-8 JSON, base64 encoded so that it fits a text column.
+# JSON state can't start with it, so rows saved before compression are read as they are.
+COMPRESSED_STATE_PREFIX = u'zlib1:'
+
+
+def compress_state(state):
+    """
+    Return state (JSON text) compressed, unless that wouldn't make it any
+    shorter. State which is already compressed is returned as it is.
+    """
+    if not state or state.startswith(COMPRESSED_STATE_PREFIX):
+        return state
+    compressed = COMPRESSED_STATE_PREFIX + base64.b64encode(zlib.compress(state.encode('utf-8')))
+    return compressed if len(compressed) < len(state) else state
+
+
+def decompress_state(state):
+    """
+    Return the JSON text of state, which may or may not be compressed
+    """
+    if not state or not state.startswith(COMPRESSED_STATE_PREFIX):
+        return state
+    return zlib.decompress(base64.b64decode(state[len(COMPRESSED_STATE_PREFIX):])).decode('utf-8')
+
+
+class LazyStateDescriptor(object):
+    """
+    Holds the value of a StateField as it was loaded, and only decompresses
+    it when it is first read.
+    """
+    def __init__(self, attname):
+        self.attname = attname
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        state = instance.__dict__[self.attname]
+        if state and state.startswith(COMPRESSED_STATE_PREFIX):
+            state = instance.__dict__[self.attname] = decompress_state(state)
+        return state
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.attname] = value
+
+
+class StateField(models.TextField):
+    """
+    A TextField for JSON module state, which is stored compressed when
+    MITX_FEATURES['COMPRESS_STUDENT_MODULE_STATE'] is on. Reading the
+    attribute always gives the JSON text; lookups (eg state__contains)
+    only see the state of the rows which aren't compressed.
+    """
+    def contribute_to_class(self, cls, name):
+        super(StateField, self).contribute_to_class(cls, name)
+        setattr(cls, self.attname, LazyStateDescriptor(self.attname))
+
+    def pre_save(self, model_instance, add):
+        # the state as loaded, so that state which wasn't read isn't decompressed
+        state = model_instance.__dict__.get(self.attname)
+        if settings.MITX_FEATURES.get('COMPRESS_STUDENT_MODULE_STATE'):
+            return compress_state(state)
+        return decompress_state(state)
+
+add_introspection_rules([], [r"^courseware\.models\.StateField"])
 
 
 class StudentModule(models.Model):
@@ -42,9 +113,11 @@ class StudentModule(models.Model):
 
     class Meta:
         unique_together = (('student', 'module_state_key', 'course_id'),)
+        # Migration 0012 also indexes (course_id, module_id) and
+        # (student_id, course_id, modified); see benchmark_student_module_queries
 
     ## Internal state of the object
-    state = models.TextField(null=True, blank=True)
+    state = StateField(null=True, blank=True)
 
     ## Grade, and are we done?
     grade = models.FloatField(null=True, blank=True, db_index=True)
@@ -86,20 +159,78 @@ class StudentModuleHistory(models.Model):
 
     # This should be populated from the modified field in StudentModule
     created = models.DateTimeField(db_index=True)
-    state = models.TextField(null=True, blank=True)
+    # Orders the entries of a student module within a second, as `created` may
+    # only be stored to the second (see courseware.module_history)
+    sequence = models.BigIntegerField(null=True, blank=True)
+    state = StateField(null=True, blank=True)
     grade = models.FloatField(null=True, blank=True)
     max_grade = models.FloatField(null=True, blank=True)
 
     @receiver(post_save, sender=StudentModule)
     def save_history(sender, instance, **kwargs):
         if instance.module_type in StudentModuleHistory.HISTORY_SAVING_TYPES:
-            history_entry = StudentModuleHistory(student_module=instance,
-                                                 version=None,
-                                                 created=instance.modified,
-                                                 state=instance.state,
-                                                 grade=instance.grade,
-                                                 max_grade=instance.max_grade)
-            history_entry.save()
+            # courseware.module_history imports this module
+            from courseware import module_history
+            module_history.record(instance)
+
+
+class AnswerDistributionCount(models.Model):
+    """
+    Running count of how many students currently have a given answer saved for
+    one input (answer id) of a capa problem. Kept up to date as answers are
+    submitted (see courseware.answer_counts), so that answer distributions can
+    be reported without reading every StudentModule of the course.
+
+    Only the first MAX_ANSWERS_PER_INPUT distinct answers to an input get a row
+    of their own; any further answers are counted in a single row per input
+    with is_other set (and an empty answer).
+    """
+    MAX_ANSWERS_PER_INPUT = 50
+
+    class Meta:
+        unique_together = (('course_id', 'module_state_key', 'answer_id', 'answer', 'is_other'),)
+
+    course_id = models.CharField(max_length=255, db_index=True)
+    module_state_key = models.CharField(max_length=255, db_index=True)
+    answer_id = models.CharField(max_length=255)
+    answer = models.CharField(max_length=255, blank=True)
+    is_other = models.BooleanField(default=False)
+    count = models.IntegerField(default=0)
+
+    def __unicode__(self):
+        return u"[AnswerDistributionCount] %s %s = %s: %s" % (self.module_state_key, self.answer_id,
+                                                             self.answer, self.count)
+
+
+class XQueueSubmission(models.Model):
+    """
+    A submission to xqueue in the outbox (see courseware.xqueue_outbox). Submissions
+    are saved here inside the student's request and delivered to xqueue in the
+    background. Delivered and failed submissions are kept, so that deliveries can
+    be audited.
+    """
+    PENDING = 'pending'
+    DELIVERED = 'delivered'
+    FAILED = 'failed'
+    STATES = ((PENDING, PENDING),
+              (DELIVERED, DELIVERED),
+              (FAILED, FAILED))
+
+    # delivery is given up after this many failed attempts
+    MAX_ATTEMPTS = 5
+
+    header = models.TextField()
+    body = models.TextField()
+    state = models.CharField(max_length=16, choices=STATES, default=PENDING, db_index=True)
+    attempts = models.IntegerField(default=0)
+    # the reason the last attempt failed
+    error = models.TextField(blank=True)
+
+    created = models.DateTimeField(auto_now_add=True, db_index=True)
+    modified = models.DateTimeField(auto_now=True, db_index=True)
+
+    def __unicode__(self):
+        return u"[XQueueSubmission] %s: %s after %s attempts" % (self.id, self.state, self.attempts)
 
 
 class XModuleContentField(models.Model):
@@ -0,0 +1,158 @@
+"""
+Capture of StudentModuleHistory.
+
+Every save of a StudentModule whose type is in
+StudentModuleHistory.HISTORY_SAVING_TYPES is recorded, or a sample of them when
+settings.STUDENT_MODULE_HISTORY['SAMPLE_RATE'] is below 1.
+
+With MITX_FEATURES['ENABLE_ASYNC_STUDENT_MODULE_HISTORY'] off, each entry is
+written by the save. With it on, entries are queued in the process instead, and
+written in bulk by the save_student_module_history celery task. The queue is
+handed to the task once the request (or celery task) which made the saves has
+finished, and so has committed them, or as soon as it holds
+STUDENT_MODULE_HISTORY['BATCH_SIZE'] entries.
+
+Each entry's `created` is the `modified` time of the save it records, and its
+`sequence` the time it was recorded in microseconds, kept increasing within the
+thread. `created` may only be stored to the second, and entries needn't be
+inserted in the order of their saves, so the history of a student module is
+read in the order of LATEST_FIRST whichever batches its entries were written in.
+
+Old entries are pruned by the prune_student_module_history management command,
+according to STUDENT_MODULE_HISTORY['MAX_AGE_DAYS'] and
+STUDENT_MODULE_HISTORY['MAX_ENTRIES_PER_MODULE'].
+"""
+import logging
+import random
+import threading
+import time
+from datetime import timedelta
+
+from celery.signals import task_postrun
+from dateutil.parser import parse as parse_date
+from django.conf import settings
+from django.core.signals import request_finished
+from django.db.models import Count
+from django.utils import timezone
+from dogapi import dog_stats_api
+
+from courseware.models import StudentModuleHistory
+
+log = logging.getLogger(__name__)
+
+_queue = threading.local()
+
+# the order of the entries of a student module, latest first (entries written
+# before `sequence` was added have none)
+LATEST_FIRST = ('-created', '-sequence', '-id')
+
+
+def _setting(name):
+    return settings.STUDENT_MODULE_HISTORY.get(name)
+
+
+def record(student_module):
+    """
+    Record the save of `student_module` in its history, subject to sampling
+    """
+    sample_rate = _setting('SAMPLE_RATE')
+    if sample_rate is not None and random.random() >= sample_rate:
+        return
+
+    if not settings.MITX_FEATURES.get('ENABLE_ASYNC_STUDENT_MODULE_HISTORY'):
+        write(student_module)
+        return
+
+    entry = _entry(student_module)
+    entry['created'] = entry['created'].isoformat()
+    entries = _pending()
+    entries.append(entry)
+    if len(entries) >= _setting('BATCH_SIZE'):
+        flush()
+
+
+def write(student_module):
+    """
+    Write an entry for the current state of `student_module` straight away,
+    whatever the sampling and queueing of recorded saves
+    """
+    StudentModuleHistory(**_entry(student_module)).save()
+
+
+def _entry(student_module):
+    return {
+        'student_module_id': student_module.id,
+        'created': student_module.modified,
+        'sequence': _next_sequence(),
+        # as stored, so that saving a grade doesn't decompress the state
+        'state': student_module.__dict__['state'],
+        'grade': student_module.grade,
+        'max_grade': student_module.max_grade,
+    }
+
+
+def _next_sequence():
+    sequence = max(int(time.time() * 1000000), getattr(_queue, 'sequence', 0) + 1)
+    _queue.sequence = sequence
+    return sequence
+
+
+def _pending():
+    if not hasattr(_queue, 'entries'):
+        _queue.entries = []
+    return _queue.entries
+
+
+def flush(**kwargs):
+    """
+    Hand the queued entries of this thread to save_student_module_history.
+    Connected to the end of requests and celery tasks.
+    """
+    entries = _pending()
+    if not entries:
+        return
+    _queue.entries = []
+
+    # the task module imports this one
+    from courseware.tasks import save_student_module_history
+    save_student_module_history.delay(entries)
+    dog_stats_api.histogram('student_module_history.batch_size', len(entries))
+
+request_finished.connect(flush, dispatch_uid='courseware.module_history.flush')
+task_postrun.connect(flush, dispatch_uid='courseware.module_history.flush')
+
+
+def save(entries):
+    """
+    Write queued history `entries`, in order, in one insert
+    """
+    history = []
+    for entry in entries:
+        entry = dict(entry, created=parse_date(entry['created']))
+        history.append(StudentModuleHistory(**entry))
+    StudentModuleHistory.objects.bulk_create(history)
+
+
+def prune():
+    """
+    Delete the history entries which are older than MAX_AGE_DAYS, or beyond the
+    latest MAX_ENTRIES_PER_MODULE of their student module. Returns the number of
+    student modules whose history was pruned for having too many entries.
+    """
+    max_age_days = _setting('MAX_AGE_DAYS')
+    if max_age_days is not None:
+        StudentModuleHistory.objects.filter(created__lt=timezone.now() - timedelta(days=max_age_days)).delete()
+
+    max_entries = _setting('MAX_ENTRIES_PER_MODULE')
+    if max_entries is None:
+        return 0
+
+    student_module_ids = StudentModuleHistory.objects.values('student_module').annotate(
+        entries=Count('id')).filter(entries__gt=max_entries).values_list('student_module', flat=True)
+    pruned = 0
+    for student_module_id in student_module_ids.iterator():
+        history = StudentModuleHistory.objects.filter(student_module_id=student_module_id)
+        keep = list(history.order_by(*LATEST_FIRST).values_list('id', flat=True)[:max_entries])
+        history.exclude(id__in=keep).delete()
+        pruned += 1
+    return pruned
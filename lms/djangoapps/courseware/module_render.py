@@ -1,7 +1,9 @@
+import hashlib
 import json
 import logging
 import re
 import sys
+from datetime import datetime
 from functools import partial
 
 from django.conf import settings
@@ -11,15 +13,15 @@ from django.core.exceptions import PermissionDenied
 from django.core.urlresolvers import reverse
 from django.http import Http404
 from django.http import HttpResponse, HttpResponseBadRequest
+from django.utils.timezone import UTC
 from django.views.decorators.csrf import csrf_exempt
 
 import pyparsing
-from requests.auth import HTTPBasicAuth
 from statsd import statsd
 
-from capa.xqueue_interface import XQueueInterface
 from mitxmako.shortcuts import render_to_string
 from xblock.runtime import DbModel
+from xmodule.capa_module import CapaModule
 from xmodule.error_module import ErrorDescriptor, NonStaffErrorDescriptor
 from xmodule.errortracker import exc_info_to_str
 from xmodule.exceptions import NotFoundError, ProcessingError
@@ -27,33 +29,23 @@ from xmodule.modulestore import Location
 from xmodule.modulestore.django import modulestore
 from xmodule.modulestore.exceptions import ItemNotFoundError
 from xmodule.x_module import ModuleSystem
-from xmodule_modifiers import replace_course_urls, replace_static_urls, add_histogram, wrap_xmodule
+from xmodule_modifiers import replace_course_urls, replace_static_urls, add_histogram, wrap_xmodule, cache_html
 
 import static_replace
 from psychometrics.psychoanalyze import make_psychometrics_data_update_handler
 from student.models import unique_id_for_user
 
-from courseware.access import has_access
+from courseware.access import has_access, toc_item_visible, toc_visibility_class
+from courseware.answer_counts import update_answer_counts
 from courseware.masquerade import setup_masquerade
 from courseware.model_data import LmsKeyValueStore, LmsUsage, ModelDataCache
 from courseware.models import StudentModule
+from courseware.xqueue_outbox import OutboxXQueueInterface, xqueue_interface
 
 
 log = logging.getLogger(__name__)
 
 
-if settings.XQUEUE_INTERFACE.get('basic_auth') is not None:
-    requests_auth = HTTPBasicAuth(*settings.XQUEUE_INTERFACE['basic_auth'])
-else:
-    requests_auth = None
-
-xqueue_interface = XQueueInterface(
-    settings.XQUEUE_INTERFACE['url'],
-    settings.XQUEUE_INTERFACE['django_auth'],
-    requests_auth,
-)
-
-
 def make_track_function(request):
     '''
     Make a tracking function that logs what happened.
@@ -88,7 +80,14 @@ def toc_for_course(user, request, course, active_chapter, active_section, model_
     None if this is not the case.
 
     model_data_cache must include data from the course module and 2 levels of its descendents
+
+    Unless the table of contents can differ between students, it is filtered from
+    the course's cached table_of_contents, without instantiating any modules.
     '''
+    if course.table_of_contents['chapters'] is not None:
+        if not has_access(user, course, 'load', course.id):
+            return None
+        return _toc_from_outline(user, course, active_chapter, active_section)
 
     course_module = get_module_for_descriptor(user, request, course, model_data_cache, course.id)
     if course_module is None:
@@ -121,6 +120,40 @@ def toc_for_course(user, request, course, active_chapter, active_section, model_
     return chapters
 
 
+def _toc_from_outline(user, course, active_chapter, active_section):
+    '''
+    Build the toc_for_course table of contents from course.table_of_contents,
+    keeping the items user can load and setting the active flags.
+    '''
+    visibility_class = toc_visibility_class(user, course)
+    now = datetime.now(UTC())
+
+    chapters = list()
+    for chapter in course.table_of_contents['chapters']:
+        if not toc_item_visible(visibility_class, chapter, now):
+            continue
+
+        sections = list()
+        for section in chapter['sections']:
+            if not toc_item_visible(visibility_class, section, now):
+                continue
+
+            sections.append({'display_name': section['display_name'],
+                             'url_name': section['url_name'],
+                             'format': section['format'],
+                             'due': section['due'],
+                             'active': (chapter['url_name'] == active_chapter and
+                                        section['url_name'] == active_section),
+                             'graded': section['graded'],
+                             })
+
+        chapters.append({'display_name': chapter['display_name'],
+                         'url_name': chapter['url_name'],
+                         'sections': sections,
+                         'active': chapter['url_name'] == active_chapter})
+    return chapters
+
+
 def get_module(user, request, location, model_data_cache, course_id,
                position=None, not_found_ok=False, wrap_xmodule_display=True,
                grade_bucket_type=None, depth=0):
@@ -233,7 +266,12 @@ def get_module_for_descriptor_internal(user, descriptor, model_data_cache, cours
     # TODO: Queuename should be derived from 'course_settings.json' of each course
     xqueue_default_queuename = descriptor.location.org + '-' + descriptor.location.course
 
-    xqueue = {'interface': xqueue_interface,
+    if settings.MITX_FEATURES.get('ENABLE_XQUEUE_OUTBOX'):
+        interface = OutboxXQueueInterface(xqueue_interface)
+    else:
+        interface = xqueue_interface
+
+    xqueue = {'interface': interface,
               'construct_callback': make_xqueue_callback,
               'default_queuename': xqueue_default_queuename.replace(' ', '_'),
               'waittime': settings.XQUEUE_WAITTIME_BETWEEN_REQUESTS
@@ -391,6 +429,13 @@ def get_module_for_descriptor_internal(user, descriptor, model_data_cache, cours
     #   hierarchy of this course
     module.get_html = replace_course_urls(module.get_html, course_id)
 
+    if settings.MITX_FEATURES.get('ENABLE_XMODULE_HTML_CACHE'):
+        html_cache_key = module.html_cache_key()
+        if html_cache_key is not None:
+            module.get_html = cache_html(
+                module.get_html, cache,
+                xmodule_html_cache_key(module, course_id, wrap_xmodule_display, html_cache_key))
+
     if settings.MITX_FEATURES.get('DISPLAY_HISTOGRAMS_TO_STAFF'):
         if has_access(user, module, 'staff', course_id):
             module.get_html = add_histogram(module.get_html, module, user)
@@ -398,6 +443,24 @@ def get_module_for_descriptor_internal(user, descriptor, model_data_cache, cours
     return module
 
 
+def xmodule_html_cache_key(module, course_id, wrap_xmodule_display, html_cache_key):
+    """
+    The cache key of the wrapped html of module, as rendered in course_id.
+
+    html_cache_key is the module's own key (see XModule.html_cache_key), which
+    changes with the content it renders; the rest of the key covers what the
+    wrappers add to it.
+    """
+    key = u'|'.join([
+        module.location.url(),
+        course_id,
+        unicode(wrap_xmodule_display),
+        unicode(getattr(module.descriptor, 'data_dir', None)),
+        html_cache_key,
+    ])
+    return 'xmodule_html/' + hashlib.md5(key.encode('utf-8')).hexdigest()
+
+
 @csrf_exempt
 def xqueue_callback(request, course_id, userid, mod_id, dispatch):
     '''
@@ -507,6 +570,11 @@ def modx_dispatch(request, dispatch, location, course_id):
         log.debug("No module {0} for user {1}--access denied?".format(location, request.user))
         raise Http404
 
+    count_answers = (settings.MITX_FEATURES.get('ENABLE_ANSWER_DISTRIBUTION_COUNTS') and
+                     isinstance(instance, CapaModule))
+    if count_answers:
+        old_answers = dict(instance.student_answers)
+
     # Let the module handle the AJAX
     try:
         ajax_return = instance.handle_ajax(dispatch, data)
@@ -527,6 +595,13 @@ def modx_dispatch(request, dispatch, location, course_id):
         log.exception("error processing ajax call")
         raise
 
+    if count_answers and instance.student_answers != old_answers:
+        try:
+            update_answer_counts(course_id, instance.location.url(), old_answers, instance.student_answers)
+        except Exception:
+            # the counts are only used for reporting; never fail the student's request over them
+            log.exception("Could not update answer counts for {0}".format(location))
+
     # Return whatever the module wanted to return to the client/caller
     return HttpResponse(ajax_return)
 
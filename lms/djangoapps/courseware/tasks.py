@@ -0,0 +1,27 @@
+"""
+Background tasks of the courseware.
+"""
+from celery import task
+
+from courseware import module_history, xqueue_outbox
+from courseware.models import XQueueSubmission
+
+
+@task(max_retries=XQueueSubmission.MAX_ATTEMPTS)
+def deliver_xqueue_submission(submission_id):
+    """
+    Deliver the submission with id `submission_id` from the xqueue outbox to
+    xqueue, retrying with an exponential backoff while delivery fails.
+    """
+    if not xqueue_outbox.deliver(submission_id):
+        retries = deliver_xqueue_submission.request.retries
+        deliver_xqueue_submission.retry(countdown=xqueue_outbox.RETRY_DELAY * 2 ** retries)
+
+
+@task
+def save_student_module_history(entries):
+    """
+    Write a batch of StudentModuleHistory `entries` queued by
+    courseware.module_history.record
+    """
+    module_history.save(entries)
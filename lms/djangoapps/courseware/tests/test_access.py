@@ -106,3 +106,16 @@ class AccessTestCase(TestCase):
 
         # TODO:
         # Non-staff cannot enroll outside the open enrollment period if not specifically allowed
+
+    def test_toc_item_visible(self):
+        now = datetime.datetime.now(UTC())
+        started = {'start': now - datetime.timedelta(days=1), 'days_early_for_beta': None, 'is_error': False}
+        for_beta = {'start': now + datetime.timedelta(days=1), 'days_early_for_beta': 2, 'is_error': False}
+        error = {'start': None, 'days_early_for_beta': None, 'is_error': True}
+
+        self.assertTrue(access.toc_item_visible('student', started, now))
+        self.assertFalse(access.toc_item_visible('student', for_beta, now))
+        self.assertTrue(access.toc_item_visible('beta', for_beta, now))
+        self.assertTrue(access.toc_item_visible('started', for_beta, now))
+        self.assertFalse(access.toc_item_visible('started', error, now))
+        self.assertTrue(access.toc_item_visible('staff', error, now))
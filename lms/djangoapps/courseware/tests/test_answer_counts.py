@@ -0,0 +1,68 @@
+from django.test import TestCase
+
+from courseware import answer_counts
+from courseware.models import AnswerDistributionCount
+from courseware.tests.factories import location
+
+COURSE_ID = 'edX/test_course/test'
+PROBLEM = location('p1').url()
+PROBLEMS = {PROBLEM: ('p1', 'Problem p1')}
+KEY = ('p1', 'Problem p1', 'p1_2_1')
+
+
+class TestAnswerCounts(TestCase):
+    """
+    Tests for the running answer distribution counts
+    """
+    def distribution(self):
+        return dict(answer_counts.answer_distributions(COURSE_ID, PROBLEMS).get(KEY, {}))
+
+    def test_changed_answers_move_counts(self):
+        answer_counts.update_answer_counts(COURSE_ID, PROBLEM, {}, {'p1_2_1': 'a'})
+        answer_counts.update_answer_counts(COURSE_ID, PROBLEM, {}, {'p1_2_1': 'a'})
+        answer_counts.update_answer_counts(COURSE_ID, PROBLEM, {'p1_2_1': 'a'}, {'p1_2_1': 'b'})
+        # an unchanged answer is not counted again
+        answer_counts.update_answer_counts(COURSE_ID, PROBLEM, {'p1_2_1': 'b'}, {'p1_2_1': 'b'})
+
+        self.assertEqual(self.distribution(), {'a': 1, 'b': 1})
+
+    def test_answers_past_the_limit_go_to_other(self):
+        limit = AnswerDistributionCount.MAX_ANSWERS_PER_INPUT
+        for i in range(limit + 2):
+            answer_counts.update_answer_counts(COURSE_ID, PROBLEM, {}, {'p1_2_1': str(i)})
+        answer_counts.update_answer_counts(COURSE_ID, PROBLEM, {'p1_2_1': str(limit)}, {})
+
+        distribution = self.distribution()
+        self.assertEqual(len(distribution), limit + 1)
+        self.assertEqual(distribution[answer_counts.OTHER_ANSWERS], 1)
+
+    def test_unknown_old_answer_does_not_go_negative(self):
+        answer_counts.update_answer_counts(COURSE_ID, PROBLEM, {'p1_2_1': 'a'}, {'p1_2_1': 'b'})
+
+        self.assertEqual(self.distribution(), {'b': 1})
+
+    def test_uncounted_old_answer_is_not_taken_from_other(self):
+        limit = AnswerDistributionCount.MAX_ANSWERS_PER_INPUT
+        answer_counts.replace_answer_counts(COURSE_ID, PROBLEM, {'p1_2_1': dict(
+            (str(i), 1) for i in range(limit + 1))})
+        counted = AnswerDistributionCount.objects.filter(is_other=False)[0]
+        counted.count = 0
+        counted.save()
+
+        # the answer has a row of its own, so it was never counted under other
+        answer_counts.update_answer_counts(COURSE_ID, PROBLEM, {'p1_2_1': counted.answer}, {})
+        self.assertEqual(self.distribution()[answer_counts.OTHER_ANSWERS], 1)
+
+    def test_old_answer_is_not_taken_from_other_of_unfilled_input(self):
+        answer_counts.replace_answer_counts(COURSE_ID, PROBLEM, {'p1_2_1': {'a': 1}})
+        AnswerDistributionCount.objects.create(course_id=COURSE_ID, module_state_key=PROBLEM, answer_id='p1_2_1',
+                                               answer='', is_other=True, count=1)
+        answer_counts.update_answer_counts(COURSE_ID, PROBLEM, {'p1_2_1': 'never counted'}, {})
+
+        self.assertEqual(self.distribution(), {'a': 1, answer_counts.OTHER_ANSWERS: 1})
+
+    def test_replace_answer_counts(self):
+        answer_counts.update_answer_counts(COURSE_ID, PROBLEM, {}, {'p1_2_1': 'stale'})
+        answer_counts.replace_answer_counts(COURSE_ID, PROBLEM, {'p1_2_1': {'a': 3, 'b': 1}})
+
+        self.assertEqual(self.distribution(), {'a': 3, 'b': 1})
@@ -0,0 +1,179 @@
+import json
+from itertools import count
+from mock import Mock, patch
+
+from django.test import TestCase
+from django.test.client import RequestFactory
+from django.test.utils import override_settings
+
+from capa.tests.response_xml_factory import StringResponseXMLFactory
+from courseware import grades
+from courseware.grades import answer_distributions
+from courseware.model_data import ModelDataCache
+from courseware.tests.factories import StudentModuleFactory, UserFactory, location
+from courseware.tests.tests import TEST_DATA_MONGO_MODULESTORE
+from student.models import CourseEnrollment
+from xmodule.modulestore.django import modulestore
+from xmodule.modulestore.tests.django_utils import ModuleStoreTestCase
+from xmodule.modulestore.tests.factories import CourseFactory, ItemFactory
+
+COURSE_ID = 'edX/test_course/test'
+
+
+def mock_problem(name):
+    descriptor = Mock()
+    descriptor.location = location(name)
+    descriptor.url_name = name
+    descriptor.display_name_with_default = 'Problem ' + name
+    return descriptor
+
+
+class TestAnswerDistributions(TestCase):
+    """
+    Tests for answer_distributions, which reads answers straight out of StudentModule state
+    """
+    def setUp(self):
+        self.usernames = ('student{0}'.format(i) for i in count())
+        self.problem = mock_problem('p1')
+        self.course = Mock()
+        self.course.id = COURSE_ID
+        self.course.grading_context = {
+            'graded_sections': {'Homework': [{'section_descriptor': Mock(), 'xmoduledescriptors': [self.problem]}]},
+            'all_descriptors': [self.problem],
+        }
+
+    def _answer(self, answers, enrolled=True):
+        user = UserFactory.create(username=next(self.usernames))
+        if enrolled:
+            CourseEnrollment.objects.create(user=user, course_id=COURSE_ID)
+        StudentModuleFactory.create(
+            student=user,
+            course_id=COURSE_ID,
+            module_state_key=self.problem.location.url(),
+            state=json.dumps({'student_answers': answers, 'attempts': 1}),
+        )
+
+    def test_counts_answers_of_enrolled_students(self):
+        self._answer({'p1_2_1': 'choice_a'})
+        self._answer({'p1_2_1': 'choice_a'})
+        self._answer({'p1_2_1': 'choice_b'})
+        self._answer({'p1_2_1': 'choice_b'}, enrolled=False)
+
+        counts = answer_distributions(None, self.course)
+
+        self.assertEqual(
+            dict(counts[('p1', 'Problem p1', 'p1_2_1')]),
+            {'choice_a': 2, 'choice_b': 1}
+        )
+
+    def test_unparseable_state_is_skipped(self):
+        user = UserFactory.create(username=next(self.usernames))
+        CourseEnrollment.objects.create(user=user, course_id=COURSE_ID)
+        StudentModuleFactory.create(student=user, course_id=COURSE_ID,
+                                    module_state_key=self.problem.location.url(), state='not json')
+
+        self.assertEqual(answer_distributions(None, self.course), {})
+
+
+@override_settings(MODULESTORE=TEST_DATA_MONGO_MODULESTORE)
+class TestProgressAndGrade(ModuleStoreTestCase):
+    """
+    Tests for progress_and_grade, which builds the progress page summaries in one pass
+    """
+    def setUp(self):
+        course = CourseFactory.create()
+        chapter = ItemFactory.create(parent_location=course.location,
+                                     template="i4x://edx/templates/chapter/Empty")
+        section = ItemFactory.create(parent_location=chapter.location,
+                                     template="i4x://edx/templates/sequential/Empty",
+                                     metadata={'graded': True, 'format': 'Homework'})
+        self.problems = [
+            ItemFactory.create(parent_location=section.location,
+                               template="i4x://edx/templates/problem/Blank_Common_Problem",
+                               data=StringResponseXMLFactory().build_xml(answer='foo'))
+            for _ in xrange(3)
+        ]
+        # a section the student hasn't touched, whose problem has a weight
+        self.untouched_section = ItemFactory.create(parent_location=chapter.location,
+                                                    template="i4x://edx/templates/sequential/Empty",
+                                                    metadata={'graded': True, 'format': 'Homework'})
+        self.weighted_problem = ItemFactory.create(parent_location=self.untouched_section.location,
+                                                   template="i4x://edx/templates/problem/Blank_Common_Problem",
+                                                   data=StringResponseXMLFactory().build_xml(answer='foo'),
+                                                   metadata={'weight': 2})
+        self.course = modulestore().get_instance(course.id, course.location, depth=None)
+
+        self.student = UserFactory.create()
+        CourseEnrollment.objects.create(user=self.student, course_id=self.course.id)
+        StudentModuleFactory.create(student=self.student, course_id=self.course.id,
+                                    module_state_key=self.problems[0].location.url(),
+                                    grade=1, max_grade=1)
+
+        self.request = RequestFactory().get('/')
+        self.request.user = self.student
+
+    def _model_data_cache(self):
+        return ModelDataCache.cache_for_descriptor_descendents(
+            self.course.id, self.student, self.course, depth=None)
+
+    def test_matches_separate_summaries(self):
+        courseware_summary, grade_summary = grades.progress_and_grade(
+            self.student, self.request, self.course, self._model_data_cache())
+
+        model_data_cache = self._model_data_cache()
+        self.assertEqual(
+            courseware_summary,
+            grades.progress_summary(self.student, self.request, self.course, model_data_cache)
+        )
+        separate_grade_summary = grades.grade(self.student, self.request, self.course, model_data_cache)
+        self.assertEqual(grade_summary['percent'], separate_grade_summary['percent'])
+        self.assertEqual(grade_summary['totaled_scores'], separate_grade_summary['totaled_scores'])
+
+    def test_sections_are_scored_once(self):
+        model_data_cache = self._model_data_cache()
+        with patch('courseware.grades.get_score', wraps=grades.get_score) as get_score:
+            grades.progress_and_grade(self.student, self.request, self.course, model_data_cache)
+
+        # the sections and the problems of the touched one, each scored once for both summaries
+        self.assertEqual(get_score.call_count, len(self.problems) + 2)
+
+    def test_untouched_sections_are_not_instantiated(self):
+        model_data_cache = self._model_data_cache()
+        with patch('courseware.grades.get_module_for_descriptor', wraps=grades.get_module_for_descriptor) as create:
+            courseware_summary, _ = grades.progress_and_grade(
+                self.student, self.request, self.course, model_data_cache)
+
+        created = set(call[0][2].location for call in create.call_args_list)
+        self.assertNotIn(self.untouched_section.location, created)
+        self.assertNotIn(self.weighted_problem.location, created)
+
+        untouched = courseware_summary[0]['sections'][1]
+        self.assertEqual(untouched['url_name'], self.untouched_section.location.name)
+        self.assertEqual([(score.earned, score.possible) for score in untouched['scores']], [(0, 2)])
+
+    @patch.dict("django.conf.settings.MITX_FEATURES", {"DISABLE_START_DATES": False})
+    def test_untouched_sections_leave_out_unreleased_problems(self):
+        ItemFactory.create(parent_location=self.untouched_section.location,
+                           template="i4x://edx/templates/problem/Blank_Common_Problem",
+                           data=StringResponseXMLFactory().build_xml(answer='foo'),
+                           metadata={'weight': 3, 'start': '2100-01-01T00:00'})
+        self.course = modulestore().get_instance(self.course.id, self.course.location, depth=None)
+        model_data_cache = self._model_data_cache()
+        courseware_summary, grade_summary = grades.progress_and_grade(
+            self.student, self.request, self.course, model_data_cache)
+
+        # as scored by instantiating every module of the section
+        section = modulestore().get_instance(self.course.id, self.untouched_section.location, depth=None)
+
+        def create_module(descriptor):
+            return grades.get_module_for_descriptor(self.student, self.request, descriptor,
+                                                    model_data_cache, self.course.id)
+
+        expected = grades.score_section(self.student, self.course, section, create_module, model_data_cache)
+        untouched = courseware_summary[0]['sections'][1]
+        self.assertEqual([(score.earned, score.possible) for score in untouched['scores']],
+                         [(correct, total) for _, correct, total in expected])
+        self.assertEqual([(score.earned, score.possible) for score in untouched['scores']], [(0, 2)])
+
+        separate_grade_summary = grades.grade(self.student, self.request, self.course, self._model_data_cache())
+        self.assertEqual(grade_summary['percent'], separate_grade_summary['percent'])
@@ -0,0 +1,64 @@
+import json
+from mock import patch
+
+from django.test import TestCase
+
+from courseware.models import StudentModule, StudentModuleHistory
+from courseware.models import COMPRESSED_STATE_PREFIX, compress_state, decompress_state
+from courseware.tests.factories import StudentModuleFactory
+
+STATE = json.dumps({'student_answers': dict(('input_{0}'.format(i), 'answer') for i in xrange(20)), 'done': True})
+
+
+class TestStateCompression(TestCase):
+    """
+    Tests for the optional compression of StudentModule state
+    """
+    def stored_state(self, module):
+        return StudentModule.objects.filter(pk=module.pk).values_list('state', flat=True)[0]
+
+    def test_round_trip(self):
+        compressed = compress_state(STATE)
+        self.assertTrue(compressed.startswith(COMPRESSED_STATE_PREFIX))
+        self.assertLess(len(compressed), len(STATE))
+        self.assertEqual(decompress_state(compressed), STATE)
+        self.assertEqual(compress_state(compressed), compressed)
+
+    def test_incompressible_state_is_left_plain(self):
+        self.assertEqual(compress_state('{}'), '{}')
+        self.assertEqual(compress_state(None), None)
+        self.assertEqual(decompress_state('{}'), '{}')
+        self.assertEqual(decompress_state(None), None)
+
+    @patch.dict("django.conf.settings.MITX_FEATURES", {"COMPRESS_STUDENT_MODULE_STATE": True})
+    def test_saved_compressed(self):
+        module = StudentModuleFactory.create(module_state_key='problem', state=STATE)
+        self.assertEqual(decompress_state(self.stored_state(module)), STATE)
+        self.assertTrue(self.stored_state(module).startswith(COMPRESSED_STATE_PREFIX))
+        self.assertEqual(StudentModule.objects.get(pk=module.pk).state, STATE)
+        self.assertEqual(StudentModuleHistory.objects.get(student_module=module).state, STATE)
+
+    def test_compressed_state_is_read_when_off(self):
+        with patch.dict("django.conf.settings.MITX_FEATURES", {"COMPRESS_STUDENT_MODULE_STATE": True}):
+            module = StudentModuleFactory.create(module_state_key='problem', state=STATE)
+
+        module = StudentModule.objects.get(pk=module.pk)
+        self.assertEqual(module.state, STATE)
+        module.save()
+        self.assertEqual(self.stored_state(module), STATE)
+
+    @patch.dict("django.conf.settings.MITX_FEATURES", {"COMPRESS_STUDENT_MODULE_STATE": True})
+    def test_plain_state_is_read_when_on(self):
+        module = StudentModuleFactory.create(module_state_key='problem', state=STATE)
+        StudentModule.objects.filter(pk=module.pk).update(state=STATE)
+        self.assertEqual(StudentModule.objects.get(pk=module.pk).state, STATE)
+
+    @patch.dict("django.conf.settings.MITX_FEATURES", {"COMPRESS_STUDENT_MODULE_STATE": True})
+    def test_state_is_decoded_lazily(self):
+        module = StudentModuleFactory.create(module_state_key='problem', state=STATE)
+        with patch('courseware.models.decompress_state') as decompress:
+            module = StudentModule.objects.get(pk=module.pk)
+            module.grade = 1
+            module.save()
+            self.assertFalse(decompress.called)
+        self.assertEqual(module.state, STATE)
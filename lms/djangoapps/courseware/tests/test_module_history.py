@@ -0,0 +1,89 @@
+from datetime import timedelta
+from mock import patch
+
+from django.test import TestCase
+from django.utils import timezone
+
+from courseware import module_history
+from courseware.models import StudentModuleHistory
+from courseware.tests.factories import StudentModuleFactory
+
+
+HISTORY_SETTINGS = {'SAMPLE_RATE': 1.0, 'BATCH_SIZE': 100, 'MAX_AGE_DAYS': None, 'MAX_ENTRIES_PER_MODULE': None}
+
+
+@patch.dict("django.conf.settings.STUDENT_MODULE_HISTORY", HISTORY_SETTINGS)
+@patch.dict("django.conf.settings.MITX_FEATURES", {"ENABLE_ASYNC_STUDENT_MODULE_HISTORY": True})
+class TestModuleHistory(TestCase):
+    """
+    Tests for the batched capture of StudentModuleHistory
+    """
+    def setUp(self):
+        module_history.flush()
+        # written as it is saved, since the settings are only patched for the tests
+        self.module = StudentModuleFactory.create(module_state_key='problem', state='{"attempts": 0}')
+
+    def save_states(self, count):
+        for attempts in xrange(1, count + 1):
+            self.module.state = '{{"attempts": {0}}}'.format(attempts)
+            self.module.save()
+
+    def history(self):
+        return list(reversed(StudentModuleHistory.objects.filter(student_module=self.module)
+                             .order_by(*module_history.LATEST_FIRST).values_list('state', flat=True)))
+
+    def test_written_when_flushed(self):
+        self.save_states(2)
+        self.assertEqual(self.history(), ['{"attempts": 0}'])
+        module_history.flush()
+        self.assertEqual(self.history(), ['{"attempts": 0}', '{"attempts": 1}', '{"attempts": 2}'])
+
+    @patch.dict("django.conf.settings.STUDENT_MODULE_HISTORY", {'BATCH_SIZE': 2})
+    def test_full_batch_is_written(self):
+        self.save_states(1)
+        self.assertEqual(len(self.history()), 1)
+        self.save_states(1)
+        self.assertEqual(len(self.history()), 3)
+
+    def test_written_at_end_of_request(self):
+        self.save_states(1)
+        self.client.get('/')
+        self.assertEqual(len(self.history()), 2)
+
+    def test_order_within_a_second(self):
+        self.save_states(2)
+        # written out of order, in the same second as the first entry
+        entries = list(reversed(module_history._pending()))
+        module_history._queue.entries = []
+        module_history.save(entries)
+        StudentModuleHistory.objects.filter(student_module=self.module).update(
+            created=self.module.modified.replace(microsecond=0))
+        self.assertEqual(self.history(), ['{"attempts": 0}', '{"attempts": 1}', '{"attempts": 2}'])
+
+    @patch.dict("django.conf.settings.STUDENT_MODULE_HISTORY", {'SAMPLE_RATE': 0})
+    def test_write(self):
+        self.module.state = '{"attempts": 1}'
+        module_history.write(self.module)
+        self.assertEqual(self.history(), ['{"attempts": 0}', '{"attempts": 1}'])
+
+    @patch.dict("django.conf.settings.STUDENT_MODULE_HISTORY", {'SAMPLE_RATE': 0})
+    def test_sampling(self):
+        self.save_states(3)
+        module_history.flush()
+        self.assertEqual(self.history(), ['{"attempts": 0}'])
+
+    @patch.dict("django.conf.settings.STUDENT_MODULE_HISTORY", {'MAX_ENTRIES_PER_MODULE': 2})
+    def test_prune_entries_per_module(self):
+        self.save_states(3)
+        module_history.flush()
+        self.assertEqual(module_history.prune(), 1)
+        self.assertEqual(self.history(), ['{"attempts": 2}', '{"attempts": 3}'])
+
+    @patch.dict("django.conf.settings.STUDENT_MODULE_HISTORY", {'MAX_AGE_DAYS': 30})
+    def test_prune_old_entries(self):
+        self.save_states(1)
+        module_history.flush()
+        StudentModuleHistory.objects.filter(state='{"attempts": 0}').update(
+            created=timezone.now() - timedelta(days=31))
+        module_history.prune()
+        self.assertEqual(self.history(), ['{"attempts": 1}'])
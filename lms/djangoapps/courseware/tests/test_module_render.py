@@ -1,4 +1,4 @@
-from mock import MagicMock
+from mock import MagicMock, patch
 import json
 
 from django.http import Http404, HttpResponse
@@ -95,6 +95,16 @@ class ModuleRenderTestCase(LoginEnrollmentTestCase):
         self.assertEquals(render.get_score_bucket(11, 10), 'incorrect')
         self.assertEquals(render.get_score_bucket(-1, 10), 'incorrect')
 
+    def test_xmodule_html_cache_key(self):
+        module = MagicMock()
+        module.location.url.return_value = 'i4x://edX/toy/html/toylab'
+        module.descriptor.data_dir = 'toy'
+        key = render.xmodule_html_cache_key(module, self.course_id, True, 'abc')
+        self.assertEquals(key, render.xmodule_html_cache_key(module, self.course_id, True, 'abc'))
+        self.assertNotEquals(key, render.xmodule_html_cache_key(module, self.course_id, True, 'abd'))
+        self.assertNotEquals(key, render.xmodule_html_cache_key(module, self.course_id, False, 'abc'))
+        self.assertNotEquals(key, render.xmodule_html_cache_key(module, 'edX/toy/other', True, 'abc'))
+
     def test_anonymous_modx_dispatch(self):
         dispatch_url = reverse(
             'modx_dispatch',
@@ -170,3 +180,15 @@ class TestTOC(TestCase):
 
         actual = render.toc_for_course(self.portal_user, request, self.toy_course, chapter, section, model_data_cache)
         self.assertEqual(expected, actual)
+
+    def test_toc_without_modules(self):
+        request = RequestFactory().get('/')
+        model_data_cache = ModelDataCache.cache_for_descriptor_descendents(
+            self.toy_course.id, self.portal_user, self.toy_course, depth=2)
+
+        with patch('courseware.module_render.get_module_for_descriptor') as get_module_for_descriptor:
+            toc = render.toc_for_course(self.portal_user, request, self.toy_course, 'Overview', 'Welcome',
+                                        model_data_cache)
+
+        self.assertFalse(get_module_for_descriptor.called)
+        self.assertEqual([chapter['url_name'] for chapter in toc], ['Overview', 'secret:magic'])
@@ -0,0 +1,61 @@
+from mock import Mock, patch
+
+from django.test import TestCase
+
+from courseware import xqueue_outbox
+from courseware.models import XQueueSubmission
+
+
+class TestXQueueOutbox(TestCase):
+    """
+    Tests for the outbox which delivers submissions to xqueue in the background
+    """
+    def setUp(self):
+        self.interface = Mock()
+        self.interface.send_to_queue.return_value = (0, 'Queued submission')
+
+    def submission(self):
+        with patch('courseware.tasks.deliver_xqueue_submission') as task:
+            (error, _) = xqueue_outbox.OutboxXQueueInterface(self.interface).send_to_queue('header', 'body')
+        self.assertEqual(error, 0)
+        submission = XQueueSubmission.objects.get()
+        task.apply_async.assert_called_once_with(args=[submission.id], countdown=xqueue_outbox.DELIVERY_DELAY)
+        return submission
+
+    def test_submission_is_saved_not_sent(self):
+        submission = self.submission()
+        self.assertEqual(submission.state, XQueueSubmission.PENDING)
+        self.assertFalse(self.interface.send_to_queue.called)
+
+    def test_submission_with_files_is_sent(self):
+        files = [Mock()]
+        xqueue_outbox.OutboxXQueueInterface(self.interface).send_to_queue('header', 'body', files)
+        self.interface.send_to_queue.assert_called_once_with('header', 'body', files)
+        self.assertFalse(XQueueSubmission.objects.exists())
+
+    def test_deliver(self):
+        submission = self.submission()
+        self.assertTrue(xqueue_outbox.deliver(submission.id, self.interface))
+        self.interface.send_to_queue.assert_called_once_with(header='header', body='body')
+        self.assertEqual(XQueueSubmission.objects.get().state, XQueueSubmission.DELIVERED)
+
+        # a delivered submission isn't sent again
+        self.assertTrue(xqueue_outbox.deliver(submission.id, self.interface))
+        self.assertEqual(self.interface.send_to_queue.call_count, 1)
+
+    def test_failed_delivery_is_retried_then_given_up(self):
+        submission = self.submission()
+        self.interface.send_to_queue.return_value = (1, 'cannot connect to server')
+
+        for _ in xrange(XQueueSubmission.MAX_ATTEMPTS - 1):
+            self.assertFalse(xqueue_outbox.deliver(submission.id, self.interface))
+            self.assertEqual(XQueueSubmission.objects.get().state, XQueueSubmission.PENDING)
+        self.assertTrue(xqueue_outbox.deliver(submission.id, self.interface))
+
+        submission = XQueueSubmission.objects.get()
+        self.assertEqual(submission.state, XQueueSubmission.FAILED)
+        self.assertEqual(submission.attempts, XQueueSubmission.MAX_ATTEMPTS)
+        self.assertEqual(submission.error, 'cannot connect to server')
+
+    def test_missing_submission_is_retried(self):
+        self.assertFalse(xqueue_outbox.deliver(1, self.interface))
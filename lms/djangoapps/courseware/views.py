@@ -15,7 +15,7 @@ from mitxmako.shortcuts import render_to_response, render_to_string
 from django_future.csrf import ensure_csrf_cookie
 from django.views.decorators.cache import cache_control
 
-from courseware import grades
+from courseware import grades, module_history
 from courseware.access import has_access
 from courseware.courses import (get_courses, get_course_with_access,get_course_about_section,
                                 get_courses_by_university, sort_by_announcement)
@@ -764,9 +764,8 @@ def progress(request, course_id, student_id=None):
     model_data_cache = ModelDataCache.cache_for_descriptor_descendents(
         course_id, student, course, depth=None)
 
-    courseware_summary = grades.progress_summary(student, request, course,
-                                                 model_data_cache)
-    grade_summary = grades.grade(student, request, course, model_data_cache)
+    courseware_summary, grade_summary = grades.progress_and_grade(student, request, course,
+                                                                  model_data_cache)
 
     if courseware_summary is None:
         #This means the student didn't have access to the course (which the instructor requested)
@@ -810,13 +809,13 @@ def submission_history(request, course_id, student_username, location):
                             .format(student_username, location))
 
     history_entries = StudentModuleHistory.objects \
-                      .filter(student_module=student_module).order_by('-id')
+                      .filter(student_module=student_module).order_by(*module_history.LATEST_FIRST)
 
-    # If no history records exist, let's force a save to get history started.
+    # If no history records exist, let's write one to get history started.
     if not history_entries:
-        student_module.save()
+        module_history.write(student_module)
         history_entries = StudentModuleHistory.objects \
-                          .filter(student_module=student_module).order_by('-id')
+                          .filter(student_module=student_module).order_by(*module_history.LATEST_FIRST)
 
     context = {
         'history_entries': history_entries,
@@ -0,0 +1,141 @@
+"""
+Asynchronous delivery of submissions to xqueue.
+
+With MITX_FEATURES['ENABLE_XQUEUE_OUTBOX'] on, modules are given an
+OutboxXQueueInterface: rather than posting a submission to xqueue inside the
+student's request, it saves the submission as an XQueueSubmission and hands it
+to the deliver_xqueue_submission celery task, which delivers it over the pooled
+connections of the worker's XQueueInterface, retrying failed deliveries up to
+XQueueSubmission.MAX_ATTEMPTS times. The module goes to its queued state as soon
+as the submission is saved, as it used to once xqueue had accepted it.
+
+Pending submissions whose task was lost (eg when the broker restarts) are
+delivered by the send_xqueue_outbox management command, which should be run
+periodically. Submissions with files are still sent inside the request, as the
+uploaded files only live as long as the request does.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from dogapi import dog_stats_api
+from requests.auth import HTTPBasicAuth
+
+from capa.xqueue_interface import XQueueInterface, DEFAULT_TIMEOUT, DEFAULT_POOL_SIZE
+from courseware.models import XQueueSubmission
+
+log = logging.getLogger(__name__)
+
+# seconds before the first retry of a failed delivery, doubled for each further retry
+RETRY_DELAY = 30
+
+# seconds between saving a submission and its first delivery attempt, so that the
+# student's request has committed it by then
+DELIVERY_DELAY = 1
+
+# a pending submission untouched for this long is taken to have lost its task
+STALE_AFTER = timedelta(minutes=10)
+
+
+def make_xqueue_interface():
+    """
+    The XQueueInterface configured by settings.XQUEUE_INTERFACE
+    """
+    if settings.XQUEUE_INTERFACE.get('basic_auth') is not None:
+        requests_auth = HTTPBasicAuth(*settings.XQUEUE_INTERFACE['basic_auth'])
+    else:
+        requests_auth = None
+
+    return XQueueInterface(
+        settings.XQUEUE_INTERFACE['url'],
+        settings.XQUEUE_INTERFACE['django_auth'],
+        requests_auth,
+        timeout=settings.XQUEUE_INTERFACE.get('timeout', DEFAULT_TIMEOUT),
+        pool_size=settings.XQUEUE_INTERFACE.get('pool_size', DEFAULT_POOL_SIZE),
+    )
+
+
+xqueue_interface = make_xqueue_interface()
+
+
+class OutboxXQueueInterface(object):
+    """
+    Stands in for an XQueueInterface, saving submissions to the outbox instead
+    of sending them. `interface` sends the submissions which can't be saved.
+    """
+    def __init__(self, interface):
+        self.interface = interface
+
+    def send_to_queue(self, header, body, files_to_upload=None):
+        """
+        Save a submission for delivery to xqueue. Takes the arguments of, and
+        returns what a successful, XQueueInterface.send_to_queue does.
+        """
+        if files_to_upload:
+            return self.interface.send_to_queue(header, body, files_to_upload)
+
+        # the task module imports this one
+        from courseware.tasks import deliver_xqueue_submission
+
+        submission = XQueueSubmission.objects.create(header=header, body=body)
+        deliver_xqueue_submission.apply_async(args=[submission.id], countdown=DELIVERY_DELAY)
+        dog_stats_api.increment('xqueue_outbox.enqueued')
+        return (0, 'Queued for delivery to the grader')
+
+
+def deliver(submission_id, interface=None):
+    """
+    Make a delivery attempt of the submission with id `submission_id`, through
+    `interface` (the module's XQueueInterface by default).
+
+    Returns False if the delivery should be retried later, True otherwise:
+    when the submission has been delivered or given up on, or isn't pending.
+    """
+    interface = interface or xqueue_interface
+    try:
+        submission = XQueueSubmission.objects.get(pk=submission_id)
+    except XQueueSubmission.DoesNotExist:
+        # the request which saved it may not have committed yet
+        return False
+
+    if submission.state != XQueueSubmission.PENDING:
+        return True
+
+    # Claim the attempt, so that two senders never deliver the same submission at once
+    attempt = submission.attempts + 1
+    claimed = XQueueSubmission.objects.filter(
+        pk=submission.pk, state=XQueueSubmission.PENDING, attempts=submission.attempts
+    ).update(attempts=attempt, modified=timezone.now())
+    if not claimed:
+        return True
+
+    with dog_stats_api.timer('xqueue_outbox.delivery.time'):
+        (error, msg) = interface.send_to_queue(header=submission.header, body=submission.body)
+
+    if not error:
+        state = XQueueSubmission.DELIVERED
+        msg = ''
+        dog_stats_api.increment('xqueue_outbox.delivered')
+        dog_stats_api.histogram('xqueue_outbox.delivery.delay',
+                                (timezone.now() - submission.created).total_seconds())
+    elif attempt >= XQueueSubmission.MAX_ATTEMPTS:
+        state = XQueueSubmission.FAILED
+        log.error("Giving up delivering xqueue submission %s after %s attempts: %s", submission.id, attempt, msg)
+        dog_stats_api.increment('xqueue_outbox.failed')
+    else:
+        state = XQueueSubmission.PENDING
+        log.warning("Delivery attempt %s of xqueue submission %s failed: %s", attempt, submission.id, msg)
+        dog_stats_api.increment('xqueue_outbox.retried')
+
+    XQueueSubmission.objects.filter(pk=submission.pk).update(state=state, error=msg, modified=timezone.now())
+    return state != XQueueSubmission.PENDING
+
+
+def stale_submissions():
+    """
+    The ids of the pending submissions which no delivery attempt has touched in STALE_AFTER
+    """
+    return XQueueSubmission.objects.filter(
+        state=XQueueSubmission.PENDING, modified__lt=timezone.now() - STALE_AFTER
+    ).order_by('created').values_list('id', flat=True)
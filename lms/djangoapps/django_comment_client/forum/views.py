@@ -10,7 +10,7 @@ from django.contrib.auth.models import User
 from mitxmako.shortcuts import render_to_response
 from courseware.courses import get_course_with_access
 from course_groups.cohorts import (is_course_cohorted, get_cohort_id, is_commentable_cohorted,
-                                   get_cohorted_commentables, get_course_cohorts, get_cohort_by_id)
+                                   get_cohorted_commentables, get_course_cohorts, get_cohort_names)
 from courseware.access import has_access
 
 from django_comment_client.permissions import cached_has_permission
@@ -84,10 +84,11 @@ def get_threads(request, course_id, discussion_id=None, per_page=THREADS_PER_PAG
     threads, page, num_pages = cc.Thread.search(query_params)
 
     #now add the group name if the thread has a group id
+    cohort_names = get_cohort_names(course_id) if any(thread.get('group_id') for thread in threads) else {}
     for thread in threads:
 
         if thread.get('group_id'):
-            thread['group_name'] = get_cohort_by_id(course_id, thread.get('group_id')).name
+            thread['group_name'] = cohort_names.get(int(thread.get('group_id')), '')
             thread['group_string'] = "This post visible only to Group %s." % (thread['group_name'])
         else:
             thread['group_name'] = ""
@@ -275,12 +276,13 @@ def single_thread(request, course_id, discussion_id, thread_id):
 
         course = get_course_with_access(request.user, course_id, 'load')
 
+        cohort_names = get_cohort_names(course_id)
         for thread in threads:
             courseware_context = get_courseware_context(thread, course)
             if courseware_context:
                 thread.update(courseware_context)
             if thread.get('group_id') and not thread.get('group_name'):
-                thread['group_name'] = get_cohort_by_id(course_id, thread.get('group_id')).name
+                thread['group_name'] = cohort_names.get(int(thread.get('group_id')), '')
 
             #patch for backward compatibility with comments service
             if not "pinned" in thread:
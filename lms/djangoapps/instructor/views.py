@@ -1,7 +1,6 @@
 """
 Instructor Views
 """
-from collections import defaultdict
 import csv
 import json
 import logging
@@ -26,7 +25,7 @@ import xmodule.graders as xmgraders
 from xmodule.modulestore.django import modulestore
 from xmodule.modulestore.exceptions import ItemNotFoundError
 
-from courseware import grades
+from courseware import answer_counts, grades
 from courseware.access import (has_access, get_access_group_name,
                                course_beta_test_group_name)
 from courseware.courses import get_course_with_access
@@ -45,6 +44,7 @@ from instructor_task.api import (get_running_instructor_tasks,
 from instructor_task.views import get_task_completion_info
 from mitxmako.shortcuts import render_to_response
 from psychometrics import psychoanalyze
+from psychometrics.models import PsychometricReport
 from student.models import CourseEnrollment, CourseEnrollmentAllowed
 import track.views
 from mitxmako.shortcuts import render_to_string
@@ -660,6 +660,15 @@ def instructor_dashboard(request, course_id):
         msg += nmsg
         track.views.server_track(request, "psychometrics-histogram-generation", {"problem": problem}, page="idashboard")
 
+    elif action == 'Download CSV of psychometrics report':
+        try:
+            report = PsychometricReport.objects.filter(course_id=course_id).latest()
+        except PsychometricReport.DoesNotExist:
+            msg += "<font color='red'>No psychometrics report has been generated for this course yet "
+            msg += "(see the psychometrics_report management command)</font>"
+        else:
+            return return_csv('psychometrics_{0}.csv'.format(course_id), psychoanalyze.report_datatable(report))
+
     if idash_mode == 'Psychometrics':
         problems = psychoanalyze.problems_with_psychometric_data(course_id)
 
@@ -1297,7 +1306,10 @@ def get_answers_distribution(request, course_id):
     """
     course = get_course_with_access(request.user, course_id, 'staff')
 
-    dist = grades.answer_distributions(request, course)
+    if settings.MITX_FEATURES.get('ENABLE_ANSWER_DISTRIBUTION_COUNTS'):
+        dist = answer_counts.answer_distributions(course.id, grades.graded_problems(course))
+    else:
+        dist = grades.answer_distributions(request, course)
 
     d = {}
     d['header'] = ['url_name', 'display name', 'answer id', 'answer', 'count']
@@ -1315,23 +1327,16 @@ def compute_course_stats(course):
     """
     Compute course statistics, including number of problems, videos, html.
 
-    course is a CourseDescriptor from the xmodule system.
+    course is a CourseDescriptor from the xmodule system. The statistics come from
+    its structure_summary, which is computed once per version of the course rather
+    than by walking the course on every visit to the dashboard.
     """
-
-    # walk the course by using get_children() until we come to the leaves; count the
-    # number of different leaf types
-
-    counts = defaultdict(int)
-
-    def walk(module):
-        children = module.get_children()
-        category = module.__class__.__name__ 	# HtmlDescriptor, CapaDescriptor, ...
-        counts[category] += 1
-        for c in children:
-            walk(c)
-
-    walk(course)
-    stats = dict(counts)  	# number of each kind of module
+    summary = course.structure_summary
+    stats = dict(summary['counts'])  	# number of each kind of module (HtmlDescriptor, CapaDescriptor, ...)
+    for depth, count in summary['depths'].items():
+        stats['# at depth %d' % depth] = count
+    for section_format, sections in summary['graded_sections'].items():
+        stats['# graded %s' % section_format] = len(sections)
     return stats
 
 
@@ -1355,29 +1360,24 @@ def dump_grading_context(course):
     msg += "-----------------------------------------------------------------------------\n"
     msg += "Listing grading context for course %s\n" % course.id
 
-    gc = course.grading_context
+    summary = course.structure_summary
     msg += "graded sections:\n"
 
-    msg += '%s\n' % gc['graded_sections'].keys()
-    for (gs, gsvals) in gc['graded_sections'].items():
+    msg += '%s\n' % summary['graded_sections'].keys()
+    for (gs, gsvals) in summary['graded_sections'].items():
         msg += "--> Section %s:\n" % (gs)
-        for sec in gsvals:
-            s = sec['section_descriptor']
-            grade_format = getattr(s.lms, 'grade_format', None)
+        for section_name, nscored in gsvals:
             aname = ''
-            if grade_format in graders:
-                g = graders[grade_format]
+            if gs in graders:
+                g = graders[gs]
                 aname = '%s %02d' % (g.short_label, g.index)
                 g.index += 1
-            elif s.display_name in graders:
-                g = graders[s.display_name]
+            elif section_name in graders:
+                g = graders[section_name]
                 aname = '%s' % g.short_label
-            notes = ''
-            if getattr(s, 'score_by_attempt', False):
-                notes = ', score by attempt!'
-            msg += "      %s (grade_format=%s, Assignment=%s%s)\n" % (s.display_name, grade_format, aname, notes)
+            msg += "      %s (grade_format=%s, Assignment=%s, scored modules=%d)\n" % (section_name, gs, aname, nscored)
     msg += "all descriptors:\n"
-    msg += "length=%d\n" % len(gc['all_descriptors'])
+    msg += "length=%d\n" % len(course.grading_context['all_descriptor_locations'])
     msg = '<pre>%s</pre>' % msg.replace('<', '&lt;')
     return msg
 
@@ -20,6 +20,9 @@ of the query for traversing StudentModule objects.
 
 """
 from celery import task
+from django.db.models import Q
+
+from courseware.models import COMPRESSED_STATE_PREFIX
 from instructor_task.tasks_helper import (update_problem_module_state,
                                           rescore_problem_module_state,
                                           reset_attempts_module_state,
@@ -47,7 +50,9 @@ def rescore_problem(entry_id, xmodule_instance_args):
     """
     action_name = 'rescored'
     update_fcn = rescore_problem_module_state
-    filter_fcn = lambda(modules_to_update): modules_to_update.filter(state__contains='"done": true')
+    # compressed state can't be searched, so those modules are checked by rescore_problem_module_state
+    filter_fcn = lambda(modules_to_update): modules_to_update.filter(
+        Q(state__contains='"done": true') | Q(state__startswith=COMPRESSED_STATE_PREFIX))
     return update_problem_module_state(entry_id,
                                        update_fcn, action_name, filter_fcn=filter_fcn,
                                        xmodule_instance_args=xmodule_instance_args)
@@ -34,6 +34,9 @@ TASK_LOG = get_task_logger(__name__)
 # define value to use when no task_id is provided:
 UNKNOWN_TASK_ID = 'unknown-task_id'
 
+# value returned by an update function for a student module it has nothing to do to:
+UPDATE_SKIPPED = 'skipped'
+
 
 def initialize_mako(sender=None, conf=None, **kwargs):
     """
@@ -87,6 +90,8 @@ def _perform_module_state_update(course_id, module_state_key, student_identifier
     module_state_key, the particular StudentModule to update, and the xmodule_instance_args being
     passed through.  If the value returned by the update function evaluates to a boolean True,
     the update is successful; False indicates the update on the particular student module failed.
+    UPDATE_SKIPPED indicates that there was nothing to update: the student module is then left out
+    of the counts, as if it had been filtered out.
     A raised exception indicates a fatal condition -- that no other student modules should be considered.
 
     The return value is a dict containing the task's results, with the following keys:
@@ -149,11 +154,15 @@ def _perform_module_state_update(course_id, module_state_key, student_identifier
     task_progress = get_task_progress()
     _get_current_task().update_state(state=PROGRESS, meta=task_progress)
     for module_to_update in modules_to_update:
-        num_attempted += 1
         # There is no try here:  if there's an error, we let it throw, and the task will
         # be marked as FAILED, with a stack trace.
         with dog_stats_api.timer('instructor_tasks.module.time.step', tags=['action:{name}'.format(name=action_name)]):
-            if update_fcn(module_descriptor, module_to_update, xmodule_instance_args):
+            result = update_fcn(module_descriptor, module_to_update, xmodule_instance_args)
+        if result == UPDATE_SKIPPED:
+            num_total -= 1
+        else:
+            num_attempted += 1
+            if result:
                 # If the update_fcn returns true, then it performed some kind of work.
                 # Logging of failures is left to the update_fcn itself.
                 num_updated += 1
@@ -307,13 +316,19 @@ def rescore_problem_module_state(module_descriptor, student_module, xmodule_inst
     In particular, raises UpdateProblemModuleStateError if module fails to instantiate,
     or if the module doesn't support rescoring.
 
-    Returns True if problem was successfully rescored for the given student, and False
-    if problem encountered some kind of error in rescoring.
+    Returns True if problem was successfully rescored for the given student, False
+    if problem encountered some kind of error in rescoring, and UPDATE_SKIPPED if the
+    student hasn't answered the problem.
     '''
     # unpack the StudentModule:
     course_id = student_module.course_id
     student = student_module.student
     module_state_key = student_module.module_state_key
+
+    if not json.loads(student_module.state or '{}').get('done'):
+        # only answered problems are rescored (compressed state can't be filtered on in the query)
+        return UPDATE_SKIPPED
+
     instance = _get_module_instance_for_task(course_id, student, module_descriptor, xmodule_instance_args, grade_bucket_type='rescore')
 
     if instance is None:
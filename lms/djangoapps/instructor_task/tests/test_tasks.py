@@ -16,6 +16,7 @@ from celery.states import SUCCESS, FAILURE
 from xmodule.modulestore.exceptions import ItemNotFoundError
 
 from courseware.model_data import StudentModule
+from courseware.models import COMPRESSED_STATE_PREFIX
 from courseware.tests.factories import StudentModuleFactory
 from student.tests.factories import UserFactory
 
@@ -147,6 +148,17 @@ class TestInstructorTasks(InstructorTaskModuleTestCase):
                                         state=state)
         return students
 
+    @patch.dict("django.conf.settings.MITX_FEATURES", {"COMPRESS_STUDENT_MODULE_STATE": True})
+    def test_rescore_skips_unanswered_compressed_state(self):
+        # compressed state can't be filtered on, so unanswered problems reach the update function
+        input_state = json.dumps({'done': False, 'input_state': dict(('input_%d' % i, {}) for i in xrange(20))})
+        self._create_students_with_state(3, input_state)
+        stored_states = StudentModule.objects.filter(module_state_key=self.problem_url).values_list('state', flat=True)
+        self.assertTrue(all(state.startswith(COMPRESSED_STATE_PREFIX) for state in stored_states))
+        with patch('instructor_task.tasks_helper._get_module_instance_for_task') as mock_get_instance:
+            self._test_run_with_task(rescore_problem, 'rescored', 0)
+            self.assertFalse(mock_get_instance.called)
+
     def _assert_num_attempts(self, students, num_attempts):
         """Check the number attempts for all students is the same"""
         for student in students:
@@ -25,9 +25,38 @@ NOTIFICATION_TYPES = (
     ('flagged_submissions_exist', 'open_ended_flagged_problems', 'Flagged Submissions')
 )
 
+# don't initialize until grading_services() is called--means that just
+# importing this file doesn't create objects that may not have the right config
+_services = None
+
+
+def grading_services():
+    """
+    The staff, peer and controller grading services the notifications come from,
+    shared by all the requests of the process.
+    """
+    global _services
+    if _services is None:
+        #Define a mock modulesystem
+        system = ModuleSystem(
+            ajax_url=None,
+            track_function=None,
+            get_module=None,
+            render_template=render_to_string,
+            replace_urls=None,
+            xblock_model_data={},
+            cache=cache,
+        )
+        _services = {
+            'staff': StaffGradingService(settings.OPEN_ENDED_GRADING_INTERFACE),
+            'peer': peer_grading_service.PeerGradingService(settings.OPEN_ENDED_GRADING_INTERFACE, system),
+            'controller': ControllerQueryService(settings.OPEN_ENDED_GRADING_INTERFACE, system),
+        }
+    return _services
+
 
 def staff_grading_notifications(course, user):
-    staff_gs = StaffGradingService(settings.OPEN_ENDED_GRADING_INTERFACE)
+    staff_gs = grading_services()['staff']
     pending_grading = False
     img_path = ""
     course_id = course.id
@@ -62,15 +91,7 @@ def staff_grading_notifications(course, user):
 
 
 def peer_grading_notifications(course, user):
-    system = ModuleSystem(
-        ajax_url=None,
-        track_function=None,
-        get_module = None,
-        render_template=render_to_string,
-        replace_urls=None,
-        xblock_model_data= {}
-    )
-    peer_gs = peer_grading_service.PeerGradingService(settings.OPEN_ENDED_GRADING_INTERFACE, system)
+    peer_gs = grading_services()['peer']
     pending_grading = False
     img_path = ""
     course_id = course.id
@@ -123,17 +144,7 @@ def combined_notifications(course, user):
     if not user.is_authenticated():
         return notification_dict
 
-    #Define a mock modulesystem
-    system = ModuleSystem(
-        ajax_url=None,
-        track_function=None,
-        get_module = None,
-        render_template=render_to_string,
-        replace_urls=None,
-        xblock_model_data= {}
-    )
-    #Initialize controller query service using our mock system
-    controller_qs = ControllerQueryService(settings.OPEN_ENDED_GRADING_INTERFACE, system)
+    controller_qs = grading_services()['controller']
     student_id = unique_id_for_user(user)
     user_is_staff = has_access(user, course, 'staff')
     course_id = course.id
@@ -10,6 +10,7 @@ from django.conf import settings
 from django.http import HttpResponse, Http404
 
 from courseware.access import has_access
+from util.cache import cache
 from util.json_request import expect_json
 from xmodule.course_module import CourseDescriptor
 from student.models import unique_id_for_user
@@ -72,7 +73,8 @@ class StaffGradingService(GradingService):
             get_module = None,
             render_template=render_to_string,
             replace_urls=None,
-            xblock_model_data= {}
+            xblock_model_data= {},
+            cache=cache,
         )
         super(StaffGradingService, self).__init__(config)
         self.url = config['url'] + config['staff_grading']
@@ -100,7 +102,7 @@ class StaffGradingService(GradingService):
             GradingServiceError: something went wrong with the connection.
         """
         params = {'course_id': course_id, 'grader_id': grader_id}
-        return self.get(self.get_problem_list_url, params)
+        return self.cached_get(self.get_problem_list_url, params)
 
 
     def get_next(self, course_id, location, grader_id):
@@ -154,7 +156,7 @@ class StaffGradingService(GradingService):
 
     def get_notifications(self, course_id):
         params = {'course_id': course_id}
-        response = self.get(self.get_notifications_url, params)
+        response = self.cached_get(self.get_notifications_url, params)
         return response
 
 
@@ -9,6 +9,7 @@ from django.core.urlresolvers import reverse
 
 from student.models import unique_id_for_user
 from courseware.courses import get_course_with_access
+from util.cache import cache
 
 from xmodule.x_module import ModuleSystem
 from xmodule.open_ended_grading_classes.controller_query_service import ControllerQueryService, convert_seconds_to_human_readable
@@ -33,7 +34,8 @@ system = ModuleSystem(
     get_module=None,
     render_template=render_to_string,
     replace_urls=None,
-    xblock_model_data={}
+    xblock_model_data={},
+    cache=cache,
 )
 
 controller_qs = ControllerQueryService(settings.OPEN_ENDED_GRADING_INTERFACE, system)
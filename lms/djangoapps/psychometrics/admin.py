@@ -2,7 +2,8 @@
 django admin pages for courseware model
 '''
 
-from psychometrics.models import PsychometricData
+from psychometrics.models import PsychometricData, PsychometricReport
 from django.contrib import admin
 
 admin.site.register(PsychometricData)
+admin.site.register(PsychometricReport)
@@ -0,0 +1,76 @@
+#!/usr/bin/python
+#
+# django management command: compute psychometric item statistics for every
+# problem in a course, and store them as a PsychometricReport
+
+import time
+from optparse import make_option
+
+import numpy as np
+
+from django.core.management.base import BaseCommand, CommandError
+
+from psychometrics import psychoanalyze
+
+
+def synthetic_problem_data(nstudents, nproblems, max_grade=2, seed=0):
+    '''
+    Generate problem data, in the form returned by psychoanalyze.load_problem_data,
+    for nstudents of normally distributed ability answering nproblems of normally
+    distributed difficulty, with grades and attempts following a 2PL model.
+    '''
+    rng = np.random.RandomState(seed)
+    ability = rng.normal(size=nstudents)
+    students = np.arange(nstudents)
+    problem_data = {}
+    for i in range(nproblems):
+        p_correct = psychoanalyze.func_2pl(ability, 1.0, rng.normal())
+        problem_data['i4x://Synthetic/Benchmark/problem/p%d' % i] = {
+            'students': students,
+            'grades': rng.binomial(max_grade, p_correct).astype(float),
+            'max_grades': np.ones(nstudents) * max_grade,
+            'attempts': np.minimum(rng.geometric(np.maximum(p_correct, 0.05)), 10),
+            'checktimes': [None] * nstudents,
+        }
+    return problem_data
+
+
+class Command(BaseCommand):
+    args = "<course_id>"
+    help = "Compute psychometric item statistics (difficulty, discrimination, attempt distributions, "
+    help += "IRT parameters) for every problem in a course, and store them as a report.\n"
+    help += "With --benchmark-students, time the computation on synthetic data instead (nothing is stored)."
+
+    option_list = BaseCommand.option_list + (
+        make_option('--processes',
+                    type='int',
+                    default=1,
+                    help='Number of processes to spread the problems over'),
+        make_option('--benchmark-students',
+                    type='int',
+                    dest='benchmark_students',
+                    default=0,
+                    help='Benchmark on synthetic data for this many students'),
+        make_option('--benchmark-problems',
+                    type='int',
+                    dest='benchmark_problems',
+                    default=20,
+                    help='Number of problems in the synthetic benchmark data'),
+    )
+
+    def handle(self, *args, **options):
+        processes = options['processes']
+
+        if options['benchmark_students']:
+            problem_data = synthetic_problem_data(options['benchmark_students'], options['benchmark_problems'])
+            start = time.time()
+            psychoanalyze.course_item_statistics(problem_data, processes)
+            print "Computed item statistics for %d students x %d problems with %d process(es) in %.2f seconds" % (
+                options['benchmark_students'], options['benchmark_problems'], processes, time.time() - start)
+            return
+
+        if len(args) != 1:
+            raise CommandError("psychometrics_report requires one argument: <course_id>")
+
+        report = psychoanalyze.generate_course_report(args[0], processes)
+        print "Stored %s in %d seconds" % (report, report.seconds)
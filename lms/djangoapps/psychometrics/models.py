@@ -43,3 +43,22 @@ class PsychometricData(models.Model):
                                                                                        sm.max_grade,
                                                                                        self.attempts,
                                                                                        self.checktimes)
+
+
+class PsychometricReport(models.Model):
+    """
+    Item statistics (difficulty, discrimination, attempt distributions and IRT
+    parameters) for every problem in a course, computed in one batch from
+    PsychometricData by psychoanalyze.generate_course_report.
+    """
+    class Meta:
+        get_latest_by = "created"
+
+    course_id = models.CharField(max_length=255, db_index=True)
+    created = models.DateTimeField(auto_now_add=True, db_index=True)
+    report = models.TextField()  			# item statistics by problem, stored as JSON
+    nproblems = models.IntegerField(default=0)
+    seconds = models.IntegerField(default=0)  	# seconds elapsed for computation
+
+    def __unicode__(self):
+        return "[PsychometricReport] %s: %s (%d problems)" % (self.course_id, self.created, self.nproblems)
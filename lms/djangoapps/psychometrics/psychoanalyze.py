@@ -6,15 +6,19 @@
 from __future__ import division
 
 import datetime
+import hashlib
 import logging
 import json
 import math
+import multiprocessing
+import time
 import numpy as np
 from scipy.optimize import curve_fit
 
 from django.conf import settings
-from django.db.models import Sum, Max
-from psychometrics.models import PsychometricData
+from django.core.cache import cache
+from django.db.models import Count
+from psychometrics.models import PsychometricData, PsychometricReport
 from courseware.models import StudentModule
 from pytz import UTC
 
@@ -25,6 +29,9 @@ log = logging.getLogger("mitx.psychometrics")
 
 db = getattr(settings, 'DATABASE_FOR_PSYCHOMETRICS', 'default')
 
+# how long (in seconds) the plots generated for a problem are reused before being recomputed
+cache_timeout = getattr(settings, 'PSYCHOMETRICS_CACHE_TIMEOUT', 5 * 60)
+
 #-----------------------------------------------------------------------------
 # fit functions
 
@@ -87,6 +94,20 @@ class StatVar(object):
         else:
             return 0
 
+    def add_array(self, xs):
+        """
+        Add all the values of the NumPy array xs at once, skipping NaNs (missing values)
+        """
+        xs = xs[~np.isnan(xs)]
+        if len(xs) == 0:
+            return
+        xmin, xmax = float(xs.min()), float(xs.max())
+        self.min = xmin if self.min is None else min(self.min, xmin)
+        self.max = xmax if self.max is None else max(self.max, xmax)
+        self.sum += float(xs.sum())
+        self.sum2 += float((xs ** 2).sum())
+        self.cnt += len(xs)
+
     def __str__(self):
         return 'cnt=%d, avg=%f, sdv=%f' % (self.cnt, self.avg(), self.sdv())
 
@@ -103,21 +124,19 @@ def make_histogram(ydata, bins=None):
     Generate histogram of ydata using bins provided, or by default bins
     from 0 to 100 by 10.  bins should be ordered in increasing order.
 
+    Each y is counted in the largest bin it is strictly greater than; missing
+    values (None or NaN), and those not greater than the first bin, are not counted.
+
     returns dict with keys being bins, and values being counts.
-    special: hist['bins'] = bins
     '''
     if bins is None:
         bins = range(0, 100, 10)
 
-    nbins = len(bins)
-    hist = dict(zip(bins, [0] * nbins))
-    for y in ydata:
-        for b in bins[::-1]:  # in reverse order
-            if y > b:
-                hist[b] += 1
-                break
-    # hist['bins'] = bins
-    return hist
+    ydata = np.asarray(ydata, dtype=float)
+    ydata = ydata[~np.isnan(ydata)]
+    indices = np.searchsorted(bins, ydata, side='left') - 1
+    counts = np.bincount(indices[indices >= 0], minlength=len(bins))
+    return dict(zip(bins, counts.tolist()))
 
 #-----------------------------------------------------------------------------
 
@@ -128,18 +147,110 @@ def problems_with_psychometric_data(course_id):
     Does this for a given course_id.
     '''
     pmdset = PsychometricData.objects.using(db).filter(studentmodule__course_id=course_id)
-    plist = [p['studentmodule__module_state_key'] for p in pmdset.values('studentmodule__module_state_key').distinct()]
-    problems = dict((p, pmdset.filter(studentmodule__module_state_key=p).count()) for p in plist)
+    counts = pmdset.values_list('studentmodule__module_state_key').annotate(count=Count('id'))
+    problems = dict(counts)
 
     return problems
 
 #-----------------------------------------------------------------------------
 
 
+def load_problem_data(**filters):
+    '''
+    Read the PsychometricData rows matching filters (eg studentmodule__course_id=course_id)
+    in one query, joined to their StudentModules and projected to the columns used here.
+
+    Returns dict of {problem (location url): data}, where data is a dict holding NumPy arrays
+    'students' (user ids), 'grades' and 'max_grades' (NaN where missing) and 'attempts',
+    and the list 'checktimes', with one entry per student.
+    '''
+    rows = PsychometricData.objects.using(db).filter(**filters).values_list(
+        'studentmodule__module_state_key',
+        'studentmodule__student_id',
+        'studentmodule__grade',
+        'studentmodule__max_grade',
+        'attempts',
+        'checktimes',
+    )
+
+    columns = {}
+    for problem, student, grade, max_grade, attempts, checktimes in rows.iterator():
+        problem_columns = columns.setdefault(problem, ([], [], [], [], []))
+        problem_columns[0].append(student)
+        problem_columns[1].append(grade)
+        problem_columns[2].append(max_grade)
+        problem_columns[3].append(attempts)
+        problem_columns[4].append(checktimes)
+
+    return dict(
+        (problem, {
+            'students': np.array(students, dtype=int),
+            'grades': np.array(grades, dtype=float),
+            'max_grades': np.array(max_grades, dtype=float),
+            'attempts': np.array(attempts, dtype=int),
+            'checktimes': checktimes,
+        })
+        for problem, (students, grades, max_grades, attempts, checktimes) in columns.iteritems()
+    )
+
+
+def check_time_differences(checktimes):
+    '''
+    Return the time differences (in minutes) between consecutive checks over all the
+    given checktimes logs, as one NumPy array.  Differences of 20 minutes or more are dropped.
+    '''
+    dts = []
+    for ctlog in checktimes:
+        try:
+            cts = eval(ctlog)  # log of attempt timestamps
+        except:
+            continue
+        dts.extend((ct - ct0).total_seconds() for ct0, ct in zip(cts, cts[1:]))
+    dts = np.array(dts, dtype=float) / 60.0
+    return dts[dts < 20]  # ignore if dt too long
+
+
+def irt_curve(attempts, max_attempts):
+    '''
+    Given the number of attempts of each student, return the cumulative fraction of
+    students who took at most x attempts, for x in 1..max_attempts.
+    '''
+    counts = np.bincount(attempts, minlength=max_attempts + 1)[1:max_attempts + 1]
+    return np.cumsum(counts) / len(attempts)
+
+
+def fit_2pl(xdat, ydat, max_attempts):
+    '''
+    Fit ydat to the 2PL logistic function.  Returns the fit parameters and their
+    covariance (as from curve_fit), or None if the fit failed.
+    '''
+    try:
+        return curve_fit(func_2pl, xdat, ydat, [1.0, max_attempts / 2.0])
+    except Exception as err:
+        log.debug('Error in psychoanalyze curve fitting: %s' % err)
+        return None
+
+
 def generate_plots_for_problem(problem):
+    '''
+    Return (msg, plots) for problem, recomputing them from its PsychometricData at most
+    once every cache_timeout seconds.
+    '''
+    cache_key = 'psychometrics.plots.%s' % hashlib.md5(problem.encode('utf-8')).hexdigest()
+    result = cache.get(cache_key)
+    if result is None:
+        data = load_problem_data(studentmodule__module_state_key=problem).get(problem)
+        result = generate_plots_for_problem_data(problem, data)
+        cache.set(cache_key, result, cache_timeout)
+    return result
 
-    pmdset = PsychometricData.objects.using(db).filter(studentmodule__module_state_key=problem)
-    nstudents = pmdset.count()
+
+def generate_plots_for_problem_data(problem, data):
+    '''
+    Generate the plots for problem from its data, as returned by load_problem_data
+    (None if it has no data).
+    '''
+    nstudents = 0 if data is None else len(data['attempts'])
     msg = ""
     plots = []
 
@@ -147,11 +258,12 @@ def generate_plots_for_problem(problem):
         msg += "%s nstudents=%d --> skipping, too few" % (problem, nstudents)
         return msg, plots
 
-    max_grade = pmdset[0].studentmodule.max_grade
+    grades = data['grades']
+    attempts = data['attempts']
+    max_grade = None if np.isnan(data['max_grades'][0]) else float(data['max_grades'][0])
 
-    agdat = pmdset.aggregate(Sum('attempts'), Max('attempts'))
-    max_attempts = agdat['attempts__max']
-    total_attempts = agdat['attempts__sum']  # not used yet
+    max_attempts = int(attempts.max())
+    total_attempts = int(attempts.sum())  # not used yet
 
     msg += "max attempts = %d" % max_attempts
 
@@ -159,10 +271,8 @@ def generate_plots_for_problem(problem):
     dataset = {'xdat': xdat}
 
     # compute grade statistics
-    grades = [pmd.studentmodule.grade for pmd in pmdset]
     gsv = StatVar()
-    for g in grades:
-        gsv += g
+    gsv.add_array(grades)
     msg += "<br><p><font color='blue'>Grade distribution: %s</font></p>" % gsv
 
     # generate grade histogram
@@ -181,6 +291,7 @@ def generate_plots_for_problem(problem):
     if gsv.max > max_grade:
         msg += "<br/><p><font color='red'>Something is wrong: max_grade=%s, but max(grades)=%s</font></p>" % (max_grade, gsv.max)
         max_grade = gsv.max
+    max_grade = max_grade or 0
 
     if max_grade > 1:
         ghist = make_histogram(grades, np.linspace(0, max_grade, max_grade + 1))
@@ -197,23 +308,9 @@ def generate_plots_for_problem(problem):
         msg += "<br/>Not generating histogram: max_grade=%s" % max_grade
 
     # histogram of time differences between checks
-    # Warning: this is inefficient - doesn't scale to large numbers of students
-    dtset = []  # time differences in minutes
+    dtset = check_time_differences(data['checktimes'])  # time differences in minutes
     dtsv = StatVar()
-    for pmd in pmdset:
-        try:
-            checktimes = eval(pmd.checktimes)  # update log of attempt timestamps
-        except:
-            continue
-        if len(checktimes) < 2:
-            continue
-        ct0 = checktimes[0]
-        for ct in checktimes[1:]:
-            dt = (ct - ct0).total_seconds() / 60.0
-            if dt < 20:  # ignore if dt too long
-                dtset.append(dt)
-                dtsv += dt
-            ct0 = ct
+    dtsv.add_array(dtset)
     if dtsv.cnt > 2:
         msg += "<br/><p><font color='brown'>Time differences between checks: %s</font></p>" % dtsv
         bins = np.linspace(0, 1.5 * dtsv.sdv(), 30)
@@ -234,29 +331,21 @@ def generate_plots_for_problem(problem):
     # one IRT plot curve for each grade received (TODO: this assumes integer grades)
     for grade in range(1, int(max_grade) + 1):
         yset = {}
-        gset = pmdset.filter(studentmodule__grade=grade)
-        ngset = gset.count()
-        if ngset == 0:
+        gattempts = attempts[grades == grade]
+        if len(gattempts) == 0:
             continue
-        ydat = []
-        ylast = 0
-        for x in xdat:
-            y = gset.filter(attempts=x).count() / ngset
-            ydat.append(y + ylast)
-            ylast = y + ylast
+        ydat = irt_curve(gattempts, max_attempts).tolist()
         yset['ydat'] = ydat
 
         if len(ydat) > 3:  # try to fit to logistic function if enough data points
-            try:
-                cfp = curve_fit(func_2pl, xdat, ydat, [1.0, max_attempts / 2.0])
+            cfp = fit_2pl(xdat, ydat, max_attempts)
+            if cfp is not None:
                 yset['fitparam'] = cfp
                 yset['fitpts'] = func_2pl(np.array(xdat), *cfp[0])
                 yset['fiterr'] = [yd - yf for (yd, yf) in zip(ydat, yset['fitpts'])]
                 fitx = np.linspace(xdat[0], xdat[-1], 100)
                 yset['fitx'] = fitx
                 yset['fity'] = func_2pl(np.array(fitx), *cfp[0])
-            except Exception as err:
-                log.debug('Error in psychoanalyze curve fitting: %s' % err)
 
         dataset['grade_%d' % grade] = yset
 
@@ -299,6 +388,140 @@ def generate_plots_for_problem(problem):
     return msg, plots
 
 #-----------------------------------------------------------------------------
+# course-wide item statistics
+
+
+def fraction_scores(data):
+    '''
+    Return the fraction of max_grade each student obtained, from a problem's data
+    (as from load_problem_data).  NaN where the grade or max_grade is missing.
+    '''
+    max_grades = data['max_grades'].copy()
+    max_grades[max_grades == 0] = np.nan
+    return data['grades'] / max_grades
+
+
+def item_statistics(data, rest_scores=None):
+    '''
+    Compute the item statistics of a problem from its data (as from load_problem_data):
+
+      nstudents       number of students with data for the problem
+      difficulty      average fraction of max_grade obtained
+      discrimination  correlation between the fraction of max_grade obtained and rest_scores,
+                      each student's score on the rest of the course (if given)
+      attempts        histogram of the number of attempts, as a list indexed by attempts
+      irt_a, irt_b    2PL parameters fit to the attempts of the students who got full marks
+
+    Statistics which can't be computed (eg too little data) are None.
+    '''
+    attempts = data['attempts']
+    stats = {
+        'nstudents': len(attempts),
+        'difficulty': None,
+        'discrimination': None,
+        'attempts': np.bincount(attempts).tolist() if len(attempts) else [],
+        'irt_a': None,
+        'irt_b': None,
+    }
+
+    scores = fraction_scores(data)
+    graded = ~np.isnan(scores)
+    if not graded.any():
+        return stats
+    stats['difficulty'] = float(scores[graded].mean())
+
+    if rest_scores is not None and graded.sum() > 2:
+        item, rest = scores[graded], rest_scores[graded]
+        if item.std() > 0 and rest.std() > 0:
+            stats['discrimination'] = float(np.corrcoef(item, rest)[0, 1])
+
+    # as for the IRT plots, only fit if there are enough attempts for it
+    max_attempts = int(attempts.max())
+    full_marks = attempts[graded][scores[graded] >= 1]
+    if max_attempts > 3 and len(full_marks):
+        xdat = range(1, max_attempts + 1)
+        cfp = fit_2pl(xdat, irt_curve(full_marks, max_attempts), max_attempts)
+        if cfp is not None and np.all(np.isfinite(cfp[0])):
+            stats['irt_a'], stats['irt_b'] = [float(param) for param in cfp[0]]
+
+    return stats
+
+
+def _item_statistics(args):
+    '''
+    item_statistics for a (problem, data, rest_scores) tuple, returning (problem, statistics);
+    a module level function so it can be mapped over a process pool.
+    '''
+    problem, data, rest_scores = args
+    return problem, item_statistics(data, rest_scores)
+
+
+def course_item_statistics(problem_data, processes=1):
+    '''
+    Compute item_statistics for every problem in problem_data (as from load_problem_data),
+    spreading the problems over a pool of processes if processes > 1.
+
+    Returns dict of {problem: statistics}.
+    '''
+    if not problem_data:
+        return {}
+
+    # the total score of each student over all the problems, for the discriminations
+    problems = sorted(problem_data)
+    scores = np.nan_to_num(np.concatenate([fraction_scores(problem_data[p]) for p in problems]))
+    _, student_index = np.unique(np.concatenate([problem_data[p]['students'] for p in problems]),
+                                 return_inverse=True)
+    totals = np.bincount(student_index, weights=scores)
+
+    tasks = []
+    start = 0
+    for problem in problems:
+        end = start + len(problem_data[problem]['students'])
+        rest_scores = totals[student_index[start:end]] - scores[start:end]
+        tasks.append((problem, problem_data[problem], rest_scores))
+        start = end
+
+    if processes > 1:
+        pool = multiprocessing.Pool(processes)
+        try:
+            results = pool.map(_item_statistics, tasks)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        results = map(_item_statistics, tasks)
+
+    return dict(results)
+
+
+def generate_course_report(course_id, processes=1):
+    '''
+    Compute the item statistics of every problem with psychometric data in course_id,
+    from one pass over its PsychometricData, and store them as a new PsychometricReport.
+    '''
+    start = time.time()
+    problem_data = load_problem_data(studentmodule__course_id=course_id)
+    statistics = course_item_statistics(problem_data, processes)
+
+    report = PsychometricReport(course_id=course_id,
+                                report=json.dumps(statistics),
+                                nproblems=len(statistics),
+                                seconds=int(time.time() - start))
+    report.save()
+    return report
+
+
+def report_datatable(report):
+    '''
+    Return the item statistics of a PsychometricReport as a datatable (header and data rows).
+    '''
+    columns = ['nstudents', 'difficulty', 'discrimination', 'irt_a', 'irt_b']
+    statistics = json.loads(report.report)
+    data = [[problem] + [stats[column] for column in columns] + [' '.join(str(n) for n in stats['attempts'])]
+            for problem, stats in sorted(statistics.items())]
+    return {'header': ['problem'] + columns + ['attempts'], 'data': data}
+
+#-----------------------------------------------------------------------------
 
 
 def make_psychometrics_data_update_handler(course_id, user, module_state_key):
@@ -44,6 +44,14 @@ DISCUSSION_SETTINGS = {
     'MAX_COMMENT_DEPTH': 2,
 }
 
+# Capture and retention of StudentModuleHistory (see courseware.module_history)
+STUDENT_MODULE_HISTORY = {
+    'SAMPLE_RATE': 1.0,  # fraction of the saves of a student module which are recorded
+    'BATCH_SIZE': 100,  # most entries queued by a process before they are written
+    'MAX_AGE_DAYS': None,  # None = keep entries forever
+    'MAX_ENTRIES_PER_MODULE': None,  # None = keep every entry
+}
+
 
 # Features
 MITX_FEATURES = {
@@ -75,6 +83,14 @@ MITX_FEATURES = {
 
     'ENABLE_PSYCHOMETRICS': False,  # real-time psychometrics (eg item response theory analysis in instructor dashboard)
 
+    # Keep running answer counts as problems are checked, and report answer
+    # distributions from them (see courseware.answer_counts)
+    'ENABLE_ANSWER_DISTRIBUTION_COUNTS': False,
+
+    # Reuse the rendered html of modules which opt in with XModule.html_cache_key
+    # across students (see courseware.module_render)
+    'ENABLE_XMODULE_HTML_CACHE': False,
+
     'ENABLE_DJANGO_ADMIN_SITE': False,  # set true to enable django's admin site, even on prod (e.g. for course ops)
     'ENABLE_SQL_TRACKING_LOGS': False,
     'ENABLE_LMS_MIGRATION': False,
@@ -144,6 +160,18 @@ MITX_FEATURES = {
 
     # Allow use of the hint managment instructor view.
     'ENABLE_HINTER_INSTRUCTOR_VIEW': False,
+
+    # Deliver submissions to xqueue from a celery task rather than inside the
+    # student's request (see courseware.xqueue_outbox)
+    'ENABLE_XQUEUE_OUTBOX': False,
+
+    # Save StudentModule state compressed (see courseware.models.StateField).
+    # State saved either way is read back, so this can be turned on and off.
+    'COMPRESS_STUDENT_MODULE_STATE': False,
+
+    # Write StudentModuleHistory in batches from a celery task rather than on
+    # every save of a StudentModule (see courseware.module_history)
+    'ENABLE_ASYNC_STUDENT_MODULE_HISTORY': False,
 }
 
 # Used for A/B testing